@@ -0,0 +1,60 @@
+"""
+Small HTTP endpoint for the worker's operational signals
+
+Runs on a daemon thread in the worker's main process (stdlib only) and
+serves whatever routes other modules register, e.g. /metrics for Fly
+autoscaling. Handlers return (status, content_type, body).
+"""
+
+import os
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HTTP_PORT = int(os.getenv("AGENT_HTTP_PORT", "9091"))
+
+Handler = Callable[[], Tuple[int, str, str]]
+_routes: Dict[str, Handler] = {}
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def register_route(path: str, handler: Handler):
+    """Serve GET path with handler"""
+    _routes[path] = handler
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        handler = _routes.get(self.path.split("?", 1)[0])
+        if handler is None:
+            status, content_type, body = 404, "text/plain", "not found\n"
+        else:
+            try:
+                status, content_type, body = handler()
+            except Exception as e:
+                logger.error("HTTP handler for %s failed: %s", self.path, e)
+                status, content_type, body = 500, "text/plain", "error\n"
+
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # probes hit these endpoints every few seconds
+
+
+def start_http_server(port: int = HTTP_PORT) -> ThreadingHTTPServer:
+    """Start the server once; later calls return the running instance"""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer(("0.0.0.0", port), _RequestHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="agent-http", daemon=True).start()
+        logger.info("Agent HTTP endpoint listening on :%d (%s)", port, ", ".join(sorted(_routes)))
+    return _server
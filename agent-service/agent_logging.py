@@ -0,0 +1,216 @@
+"""
+Structured, asynchronous logging for the agent hot path
+
+- Records are handed to a QueueHandler and written by a background
+  QueueListener thread, so the event loop never blocks on stdout.
+- Messages are formatted lazily on the listener thread (use %-style args,
+  not f-strings, at call sites).
+- Every record carries the call ID and turn ID of the call it belongs to.
+- Per-event sampling and rate limits keep high-frequency events (poll ticks,
+  transcripts) from flooding the logs.
+
+Usage:
+    setup_logging()
+    bind_call(ctx.room.name)
+    logger.info("Caller spoke", extra={"event": "caller_transcript", "transcript": text})
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+# Fraction of records kept per event (events not listed are always kept)
+DEFAULT_SAMPLE_RATES = {
+    "escalation_poll": 0.1,
+    "caller_interim": 0.0,
+}
+
+# (max records, per seconds) per event
+DEFAULT_RATE_LIMITS = {
+    "caller_transcript": (20, 10.0),
+    "kb_search": (20, 10.0),
+    "agent_speech": (20, 10.0),
+}
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "call_id", "turn_id"}
+
+
+class CallLogContext:
+    """Mutable per-call state shared by every task spawned for the call"""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.turn_id = 0
+
+    def next_turn(self) -> int:
+        self.turn_id += 1
+        return self.turn_id
+
+
+_call_context: contextvars.ContextVar[Optional[CallLogContext]] = contextvars.ContextVar(
+    "call_log_context", default=None
+)
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def bind_call(call_id: str) -> CallLogContext:
+    """Attach a call ID to every record logged from this task and its children"""
+    context = CallLogContext(call_id)
+    _call_context.set(context)
+    return context
+
+
+def next_turn() -> int:
+    """Advance the turn counter of the current call (no-op outside a call)"""
+    context = _call_context.get()
+    return context.next_turn() if context else 0
+
+
+class CallContextFilter(logging.Filter):
+    """Stamp call_id/turn_id onto the record on the calling thread (contextvars are thread-local)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _call_context.get()
+        record.call_id = context.call_id if context else None
+        record.turn_id = context.turn_id if context else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records of each sampled event. Warnings and errors always pass."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or random.random() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """Fixed-window rate limit per event. Suppressed counts are reported on the next kept record."""
+
+    def __init__(self, limits: Dict[str, Tuple[int, float]]):
+        super().__init__()
+        self.limits = limits
+        self._windows = {}  # {event: [window_start, count, suppressed]}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, "event", None)
+        limit = self.limits.get(event)
+        if limit is None or record.levelno >= logging.WARNING:
+            return True
+
+        max_records, per_seconds = limit
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(event, [now, 0, 0])
+            if now - window[0] >= per_seconds:
+                if window[2]:
+                    record.suppressed = window[2]
+                window[:] = [now, 0, 0]
+            if window[1] >= max_records:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that skips formatting on the calling thread.
+
+    The stock handler renders the message in prepare(); here the record is
+    enqueued as-is and the listener thread does all the formatting work.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with call/turn IDs and any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "call_id": getattr(record, "call_id", None),
+            "turn_id": getattr(record, "turn_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def setup_logging(level: int = logging.INFO, json_output: Optional[bool] = None):
+    """
+    Route the root logger through a background queue listener.
+
+    Existing root handlers (e.g. the ones installed by the LiveKit CLI) are
+    kept and driven by the listener thread; if there are none, a stdout
+    handler is added. Safe to call more than once.
+    """
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        if json_output is None:
+            json_output = os.getenv("LOG_FORMAT", "json") == "json"
+
+        root = logging.getLogger()
+        handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+        if not handlers:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(
+                JsonFormatter() if json_output
+                else logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(call_id)s/%(turn_id)s] %(message)s")
+            )
+            handlers = [stream_handler]
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(CallContextFilter())
+        queue_handler.addFilter(SamplingFilter(DEFAULT_SAMPLE_RATES))
+        queue_handler.addFilter(RateLimitFilter(DEFAULT_RATE_LIMITS))
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(min(root.level or level, level))
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush and stop the listener thread"""
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
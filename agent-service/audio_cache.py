@@ -0,0 +1,174 @@
+"""
+Pre-synthesized audio for fixed agent utterances
+
+The greeting, the hold message and the callback apology never change, so
+they are synthesized once per voice and replayed from memory instead of
+going through TTS on every call. Entries are keyed by TTS voice/model and a
+hash of the text, and are also written to disk (AUDIO_CACHE_DIR) so a
+restarted worker does not have to synthesize them again.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "/tmp/agent-audio-cache")
+
+# Fixed utterances (keep the wording in sync with BASE_SYSTEM_PROMPT)
+GREETING = "Hello! Thank you for calling Luxe Beauty Salon. I'm Bella. How may I help you today?"
+HOLD_MESSAGE = "Let me check with my supervisor on that for you. Please hold for just a moment."
+CALLBACK_APOLOGY = (
+    "I apologize, my supervisor is assisting another client right now. "
+    "I've noted your question and we'll call you back within the hour. "
+    "Is there anything else I can help you with today?"
+)
+FIXED_UTTERANCES = [GREETING, HOLD_MESSAGE, CALLBACK_APOLOGY]
+
+
+class CachedUtterance:
+    """Raw PCM for one utterance plus the format needed to rebuild frames"""
+
+    def __init__(self, pcm: bytes, sample_rate: int, num_channels: int, samples_per_frame: int):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.samples_per_frame = samples_per_frame
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        bytes_per_frame = self.samples_per_frame * self.num_channels * 2  # 16-bit PCM
+        for start in range(0, len(self.pcm), bytes_per_frame):
+            chunk = self.pcm[start:start + bytes_per_frame]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // (self.num_channels * 2),
+            )
+
+
+class UtteranceAudioCache:
+    """Memory (and disk) cache of synthesized audio keyed by voice and text hash"""
+
+    def __init__(self, tts, voice_id: str, cache_dir: Optional[str] = AUDIO_CACHE_DIR):
+        self.tts = tts
+        self.voice_id = voice_id
+        self.cache_dir = cache_dir
+        self._entries: Dict[str, CachedUtterance] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        return f"{self.voice_id.replace('/', '_')}-{digest}"
+
+    def _load_from_disk(self, key: str) -> Optional[CachedUtterance]:
+        if not self.cache_dir:
+            return None
+        meta_path = os.path.join(self.cache_dir, f"{key}.json")
+        pcm_path = os.path.join(self.cache_dir, f"{key}.pcm")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(pcm_path, "rb") as f:
+                pcm = f.read()
+        except (OSError, ValueError):
+            return None
+        return CachedUtterance(pcm, meta["sample_rate"], meta["num_channels"], meta["samples_per_frame"])
+
+    def _save_to_disk(self, key: str, utterance: CachedUtterance):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, f"{key}.pcm"), "wb") as f:
+                f.write(utterance.pcm)
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "w") as f:
+                json.dump({
+                    "sample_rate": utterance.sample_rate,
+                    "num_channels": utterance.num_channels,
+                    "samples_per_frame": utterance.samples_per_frame,
+                }, f)
+        except OSError as e:
+            logger.warning("Could not persist audio cache entry %s: %s", key, e)
+
+    async def _synthesize(self, text: str) -> CachedUtterance:
+        frames: List[rtc.AudioFrame] = []
+        async with self.tts.synthesize(text) as stream:
+            async for event in stream:
+                frames.append(event.frame)
+
+        if not frames:
+            raise RuntimeError("TTS returned no audio")
+
+        return CachedUtterance(
+            pcm=b"".join(bytes(frame.data) for frame in frames),
+            sample_rate=frames[0].sample_rate,
+            num_channels=frames[0].num_channels,
+            samples_per_frame=frames[0].samples_per_channel,
+        )
+
+    async def get(self, text: str) -> CachedUtterance:
+        """Return cached audio for text, synthesizing it on first use"""
+        key = self.key(text)
+        utterance = self._entries.get(key)
+        if utterance is not None:
+            return utterance
+
+        # Prewarm and the first caller may ask for the same text at once: synthesize it only once
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, text))
+            self._loading[key] = task
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, text: str) -> CachedUtterance:
+        utterance = self._load_from_disk(key)
+        if utterance is None:
+            logger.info("[AUDIO CACHE] Synthesizing %s", key, extra={"event": "audio_cache_miss"})
+            utterance = await self._synthesize(text)
+            self._save_to_disk(key, utterance)
+
+        self._entries[key] = utterance
+        return utterance
+
+    async def prewarm(self, texts: List[str] = FIXED_UTTERANCES):
+        """Make sure every fixed utterance is in memory before the caller needs it"""
+        for text in texts:
+            try:
+                await self.get(text)
+            except Exception as e:
+                logger.warning("[AUDIO CACHE] Prewarm failed for %s: %s", self.key(text), e)
+
+    async def say(self, session, text: str, **kwargs):
+        """
+        Speak text from cached audio, falling back to live TTS if the
+        utterance could not be synthesized ahead of time.
+        """
+        try:
+            utterance = await self.get(text)
+        except Exception as e:
+            logger.warning("[AUDIO CACHE] Falling back to live TTS: %s", e)
+            return session.say(text, **kwargs)
+        return session.say(text, audio=utterance.frames(), **kwargs)
+
+
+# One cache per voice, shared by every call handled by this process
+_caches: Dict[str, UtteranceAudioCache] = {}
+
+
+def get_audio_cache(tts, voice_id: str) -> UtteranceAudioCache:
+    """Get or create the process-wide cache for a TTS voice"""
+    cache = _caches.get(voice_id)
+    if cache is None:
+        cache = UtteranceAudioCache(tts, voice_id)
+        _caches[voice_id] = cache
+    else:
+        cache.tts = tts
+    return cache
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local VAD (local_vad.EnergyTurnDetector)
+
+Feeds N concurrent synthetic call streams (noise + speech-like bursts)
+through independent detectors and reports CPU cost, memory per stream and
+end-of-turn detection delay. Needs only NumPy.
+
+    python bench_vad.py --streams 8 --seconds 30
+"""
+import time
+import argparse
+import resource
+import tracemalloc
+
+import numpy as np
+
+from local_vad import EnergyTurnDetector, VADOptions
+
+
+def synthesize_call(sample_rate: int, seconds: float, seed: int):
+    """Background noise with alternating speech-like bursts; returns (int16 audio, burst end times)"""
+    rng = np.random.default_rng(seed)
+    n = int(sample_rate * seconds)
+    audio = rng.normal(0, 0.01, n).astype(np.float32)
+    burst_ends = []
+
+    t = 1.0
+    while t < seconds - 2.0:
+        length = rng.uniform(0.8, 2.5)
+        start, end = int(t * sample_rate), int(min(t + length, seconds) * sample_rate)
+        time_axis = np.arange(end - start) / sample_rate
+        pitch = rng.uniform(110, 220)
+        voiced = sum(np.sin(2 * np.pi * pitch * k * time_axis) / k for k in range(1, 6))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * 4.0 * time_axis))  # ~4 Hz syllable rate
+        audio[start:end] += 0.2 * voiced * syllables
+        burst_ends.append(end / sample_rate)
+        t += length + rng.uniform(0.8, 2.0)
+
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16), burst_ends
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local VAD")
+    parser.add_argument("--streams", type=int, default=8, help="Concurrent call streams")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Audio seconds per stream")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    parser.add_argument("--hangover-ms", type=int, default=VADOptions.hangover_ms)
+    args = parser.parse_args()
+
+    opts = VADOptions(hangover_ms=args.hangover_ms)
+    calls = [synthesize_call(args.sample_rate, args.seconds, seed) for seed in range(args.streams)]
+
+    rss_before = rss_mb()
+    tracemalloc.start()
+    detectors = [EnergyTurnDetector(args.sample_rate, opts) for _ in range(args.streams)]
+    frame_size = detectors[0].frame_size
+
+    end_events = [[] for _ in range(args.streams)]
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    # Interleave streams frame by frame, as concurrent calls would be
+    for offset in range(0, int(args.sample_rate * args.seconds) - frame_size, frame_size):
+        for i, detector in enumerate(detectors):
+            decision = detector.process(calls[i][0][offset:offset + frame_size])
+            if decision.event == "end":
+                end_events[i].append((offset + frame_size) / args.sample_rate)
+
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    delays = []
+    detected = 0
+    total_bursts = 0
+    for (_, burst_ends), events in zip(calls, end_events):
+        total_bursts += len(burst_ends)
+        for burst_end in burst_ends:
+            after = [e - burst_end for e in events if 0 <= e - burst_end < 2.0]
+            if after:
+                detected += 1
+                delays.append(min(after))
+
+    audio_seconds = args.streams * args.seconds
+    print(f"Streams:               {args.streams} x {args.seconds:.0f}s @ {args.sample_rate} Hz")
+    print(f"CPU time:              {cpu:.3f}s ({cpu / audio_seconds * 100:.3f}% of one core per stream)")
+    print(f"Per 20 ms frame:       {wall / (audio_seconds * 1000 / opts.frame_ms) * 1e6:.1f} us")
+    print(f"Traced memory/stream:  {peak_bytes / args.streams / 1024:.1f} KB")
+    print(f"Max RSS delta:         {rss_mb() - rss_before:.1f} MB")
+    print(f"Turns detected:        {detected}/{total_bursts}")
+    if delays:
+        print(f"End-of-turn delay:     p50 {np.percentile(delays, 50) * 1000:.0f} ms, "
+              f"p95 {np.percentile(delays, 95) * 1000:.0f} ms (hangover {opts.hangover_ms} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Write-behind call recording
+
+Turns, KB hits and stage timings are appended to an in-memory buffer on the
+call path (no I/O). The buffer is flushed as one gzip-compressed JSON batch
+to the dashboard (POST /api/calls) when it reaches RECORD_MAX_EVENTS, every
+RECORD_FLUSH_INTERVAL seconds, and once more when the call ends, so a full
+call record is available for replay and tuning without a write per turn.
+
+    recorder = CallRecorder(api_url, ctx.job.id, room_name=ctx.room.name)
+    recorder.start()
+    recorder.turn("user", transcript)
+    recorder.timing("kb_search", 42.0)
+    await recorder.stop()   # final flush
+"""
+
+import os
+import gzip
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RECORDING_ENABLED = os.getenv("CALL_RECORDING", "1") == "1"
+FLUSH_INTERVAL = float(os.getenv("RECORD_FLUSH_INTERVAL", "120"))
+MAX_EVENTS = int(os.getenv("RECORD_MAX_EVENTS", "200"))
+MAX_PENDING_EVENTS = 5000  # drop the oldest rather than grow without bound if the API is down
+MAX_TEXT_CHARS = 2000
+
+
+class CallRecorder:
+    """Buffers one call's events and ships them in compressed batches"""
+
+    def __init__(self, api_url: str, call_id: str, interval: float = FLUSH_INTERVAL,
+                 max_events: int = MAX_EVENTS, room_name: Optional[str] = None):
+        self.api_url = api_url
+        # Unique per call (the LiveKit job ID): room names are reused, and seq
+        # restarts at 0, so a room-keyed record would overwrite an earlier call
+        self.call_id = call_id
+        self.room_name = room_name
+        self.interval = interval
+        self.max_events = max_events
+        self.enabled = RECORDING_ENABLED
+        self.started_at = time.time()
+        self._events: List[Dict[str, Any]] = []
+        self._seq = 0  # batch number; the API stores batches by (callId, seq) so retries are idempotent
+        self._summary: Dict[str, Any] = {"turns": 0, "kbHits": 0, "escalations": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    def _append(self, kind: str, **data):
+        if not self.enabled:
+            return
+        data["kind"] = kind
+        data["t"] = round(time.time() - self.started_at, 3)
+        self._events.append(data)
+        if len(self._events) > MAX_PENDING_EVENTS:
+            del self._events[: len(self._events) - MAX_PENDING_EVENTS]
+        if len(self._events) >= self.max_events:
+            self._wakeup.set()
+
+    def turn(self, role: str, text: str, turn_id: int = 0, **extra):
+        self._summary["turns"] += 1
+        self._append("turn", role=role, text=text[:MAX_TEXT_CHARS], turn=turn_id, **extra)
+
+    def kb_hit(self, query: str, results: List[dict], turn_id: int = 0):
+        if results:
+            self._summary["kbHits"] += 1
+        self._append(
+            "kb",
+            query=query[:MAX_TEXT_CHARS],
+            turn=turn_id,
+            matches=[
+                {"id": r.get("id"), "score": round(float(r.get("score", 0.0)), 4), "confidence": r.get("confidence")}
+                for r in results
+            ],
+        )
+
+    def timing(self, stage: str, ms: float, turn_id: int = 0):
+        self._append("timing", stage=stage, ms=round(ms, 1), turn=turn_id)
+
+    def event(self, name: str, turn_id: int = 0, **data):
+        if name == "escalation":
+            self._summary["escalations"] += 1
+        self._append("event", name=name, turn=turn_id, **data)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self, final: bool = False) -> bool:
+        """
+        Send the buffered events in batches of at most max_events, one sequence
+        number each, so a backlog left by failed flushes never becomes one
+        oversized record. Unsent events are kept for the next flush.
+        """
+        async with self._flush_lock:
+            if not self._events and not final:
+                return True
+            while True:
+                events = self._events[: self.max_events]
+                last = len(self._events) <= self.max_events
+                if not await self._send(events, final=final and last):
+                    return False
+                # Events appended while sending stay in the buffer
+                del self._events[: len(events)]
+                if last or not self._events:
+                    return True
+
+    async def _send(self, events: List[Dict[str, Any]], final: bool) -> bool:
+        payload = {
+            "callId": self.call_id,
+            "roomName": self.room_name,
+            "seq": self._seq,
+            "final": final,
+            "startedAt": self.started_at,
+            "events": events,
+        }
+        if final:
+            payload["summary"] = {**self._summary, "durationSec": round(time.time() - self.started_at, 1)}
+        body = gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), compresslevel=6)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.api_url}/api/calls",
+                    data=body,
+                    headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                    timeout=aiohttp.ClientTimeout(total=10),
+                ) as response:
+                    result = await response.json()
+                    if not result.get("success"):
+                        raise RuntimeError(result.get("error", f"HTTP {response.status}"))
+            self._seq += 1
+            logger.debug(
+                "Flushed %d call events (%d bytes)", len(events), len(body),
+                extra={"event": "call_record_flush"},
+            )
+            return True
+        except Exception as e:
+            logger.warning("Call record flush failed: %s", e, extra={"event": "call_record_flush_error"})
+            return False
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush(final=True)
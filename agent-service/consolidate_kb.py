@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Consolidate near-duplicate learned answers in the knowledge base
+
+Every supervisor resolution adds a new `learned_answer` vector, so over time
+the index fills up with paraphrases of the same question. This job clusters
+learned answers by embedding similarity, folds each cluster into a single
+canonical entry (the other questions become its `variations`) and deletes
+the redundant entries from Firestore and Pinecone through the dashboard API.
+
+Run periodically (e.g. a scheduled Fly machine or cron):
+    python consolidate_kb.py            # apply changes
+    python consolidate_kb.py --dry-run  # only report clusters
+"""
+import os
+import sys
+import asyncio
+import argparse
+from typing import Dict, List
+
+import aiohttp
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cosine similarity above which two learned questions are treated as the same question.
+# Keep in sync with DUPLICATE_SIMILARITY_THRESHOLD in lib/pinecone/consolidation.ts
+DUPLICATE_SIMILARITY = 0.92
+
+FETCH_BATCH_SIZE = 100
+
+
+def cluster_near_duplicates(vectors: np.ndarray, threshold: float = DUPLICATE_SIMILARITY) -> List[List[int]]:
+    """
+    Greedy single-pass clustering by cosine similarity.
+
+    Each unassigned row seeds a cluster and absorbs every other unassigned
+    row whose similarity to the seed is at or above the threshold.
+
+    Args:
+        vectors: (N, D) array of embeddings
+        threshold: Minimum cosine similarity to join a cluster
+
+    Returns:
+        List of clusters (row indices), only clusters with more than one member
+    """
+    if len(vectors) == 0:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.maximum(norms, 1e-12)
+    similarity = normalized @ normalized.T
+
+    assigned = np.zeros(len(vectors), dtype=bool)
+    clusters = []
+    for seed in range(len(vectors)):
+        if assigned[seed]:
+            continue
+        members = np.where((similarity[seed] >= threshold) & ~assigned)[0]
+        assigned[members] = True
+        if len(members) > 1:
+            clusters.append(members.tolist())
+    return clusters
+
+
+def pick_canonical(vectors: np.ndarray, members: List[int]) -> int:
+    """Pick the cluster medoid (member closest to the cluster centroid) as the entry to keep"""
+    cluster = vectors[members]
+    centroid = cluster.mean(axis=0)
+    distances = np.linalg.norm(cluster - centroid, axis=1)
+    return members[int(np.argmin(distances))]
+
+
+def load_learned_answers(index) -> Dict[str, Dict]:
+    """
+    Fetch all learned-answer vectors (values + metadata) from Pinecone
+
+    Returns:
+        {vector_id: {"values": [...], "question": str}}
+    """
+    ids = []
+    for page in index.list():
+        ids.extend(page)
+
+    learned = {}
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        response = index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE])
+        for vector_id, vector in response.vectors.items():
+            metadata = vector.metadata or {}
+            if metadata.get("type") != "learned_answer":
+                continue
+            learned[vector_id] = {
+                "values": vector.values,
+                "question": metadata.get("question", ""),
+            }
+    return learned
+
+
+async def merge_cluster(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    canonical_id: str,
+    duplicate_ids: List[str],
+) -> bool:
+    """Fold duplicate entries into the canonical entry's variations, then delete them"""
+    async with session.get(f"{api_url}/api/knowledge-base/entries/{canonical_id}") as response:
+        result = await response.json()
+        if not result.get("success"):
+            print(f"[WARNING] Canonical entry {canonical_id} not found in Firestore, skipping cluster")
+            return False
+        canonical = result["data"]
+
+    variations = list(canonical.get("variations") or [])
+    for duplicate_id in duplicate_ids:
+        async with session.get(f"{api_url}/api/knowledge-base/entries/{duplicate_id}") as response:
+            result = await response.json()
+            if not result.get("success"):
+                continue
+            duplicate = result["data"]
+        for question in [duplicate.get("question", "")] + list(duplicate.get("variations") or []):
+            if question and question != canonical["question"] and question not in variations:
+                variations.append(question)
+
+    async with session.put(
+        f"{api_url}/api/knowledge-base/entries/{canonical_id}",
+        json={"variations": variations},
+    ) as response:
+        if response.status != 200:
+            print(f"[ERROR] Failed to update canonical entry {canonical_id}: {await response.text()}")
+            return False
+
+    for duplicate_id in duplicate_ids:
+        async with session.delete(f"{api_url}/api/knowledge-base/entries/{duplicate_id}") as response:
+            if response.status != 200:
+                print(f"[ERROR] Failed to delete duplicate entry {duplicate_id}: {await response.text()}")
+
+    return True
+
+
+async def consolidate(dry_run: bool = False, threshold: float = DUPLICATE_SIMILARITY):
+    """Run one consolidation pass over the learned answers"""
+    try:
+        from pinecone import Pinecone
+    except ImportError:
+        from pinecone.grpc import PineconeGRPC as Pinecone
+
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    if not pinecone_api_key:
+        print("[ERROR] PINECONE_API_KEY not set")
+        return 1
+
+    api_url = os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000")
+    index = Pinecone(api_key=pinecone_api_key).Index(os.getenv("PINECONE_INDEX_NAME", "luxe-salon-knowledge"))
+
+    print("[INFO] Loading learned answers from Pinecone...")
+    learned = load_learned_answers(index)
+    print(f"[INFO] {len(learned)} learned answers loaded")
+
+    ids = list(learned.keys())
+    if not ids:
+        return 0
+    vectors = np.asarray([learned[i]["values"] for i in ids], dtype=np.float32)
+    clusters = cluster_near_duplicates(vectors, threshold)
+    print(f"[INFO] Found {len(clusters)} near-duplicate clusters (threshold {threshold:.2f})")
+
+    merged = 0
+    removed = 0
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        for members in clusters:
+            canonical = pick_canonical(vectors, members)
+            canonical_id = ids[canonical]
+            duplicate_ids = [ids[m] for m in members if m != canonical]
+
+            print(f"\nKeep:   {learned[canonical_id]['question'][:70]}")
+            for duplicate_id in duplicate_ids:
+                print(f"Merge:  {learned[duplicate_id]['question'][:70]}")
+
+            if dry_run:
+                continue
+
+            if await merge_cluster(session, api_url, canonical_id, duplicate_ids):
+                merged += 1
+                removed += len(duplicate_ids)
+
+    if dry_run:
+        print("\n[INFO] Dry run - no changes made")
+    else:
+        print(f"\n[SUCCESS] Merged {merged} clusters, removed {removed} redundant entries")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge near-duplicate learned answers")
+    parser.add_argument("--dry-run", action="store_true", help="Only report clusters, do not modify anything")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_SIMILARITY, help="Cosine similarity threshold")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(consolidate(dry_run=args.dry_run, threshold=args.threshold)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Per-call resource and cost accounting
+
+Each call gets a CallLedger bound to its context (contextvars, so tasks and
+asyncio.to_thread workers spawned by the call inherit it). Call sites count
+billable units with a single cheap call, attributed to the current turn:
+
+    count("embedding_calls")          # knowledge_base.generate_embedding
+    count("pinecone_queries")         # knowledge_base search paths
+    count("kb_lookups")               # one per caller turn searched (local or KB_IPC)
+    count("escalation_polls")         # SupervisorChat._poll_for_answer
+
+LLM tokens, TTS characters and STT seconds come from the session's
+`metrics_collected` events (CallLedger.on_metrics). At call end the ledger
+logs a summary (with an estimated cost from COST_PER_UNIT) and adds its
+totals to per-worker counters in shared memory, served as Prometheus
+counters on /metrics so rates and per-call averages can be graphed.
+Counting outside a call (e.g. the main process serving KB_IPC lookups) is a
+no-op.
+"""
+
+import os
+import time
+import fcntl
+import logging
+import contextvars
+from collections import Counter, defaultdict, deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from shared_kb_cache import open_segment
+from worker_load import register_metrics
+
+logger = logging.getLogger(__name__)
+
+UNITS = (
+    "embedding_calls",
+    "embedding_cache_hits",
+    "pinecone_queries",
+    "pinecone_fetches",
+    "snapshot_searches",
+    "kb_subqueries",
+    "kb_lookups",
+    "llm_requests",
+    "llm_prompt_tokens",
+    "llm_cached_tokens",
+    "llm_completion_tokens",
+    "tts_characters",
+    "tts_audio_seconds",
+    "stt_audio_seconds",
+    "escalation_polls",
+)
+
+# Rough USD list prices per unit for the summary estimate; override via env as
+# COST_<UNIT>=<usd per unit>. Units without a price are counted but not costed.
+DEFAULT_COST_PER_UNIT = {
+    "embedding_calls": 0.0,
+    "pinecone_queries": 16.0 / 1_000_000 * 10,  # ~10 read units per query
+    "pinecone_fetches": 16.0 / 1_000_000 * 5,
+    "llm_prompt_tokens": 0.10 / 1_000_000,
+    "llm_cached_tokens": -0.075 / 1_000_000,  # cached tokens are billed at a discount
+    "llm_completion_tokens": 0.40 / 1_000_000,
+    "tts_characters": 0.015 / 1000,
+    "stt_audio_seconds": 0.0043 / 60,
+}
+COST_PER_UNIT = {
+    unit: float(os.getenv(f"COST_{unit.upper()}", DEFAULT_COST_PER_UNIT.get(unit, 0.0)))
+    for unit in UNITS
+}
+
+COST_SEGMENT = os.getenv("WORKER_COST_SHM", "worker-costs")
+COST_LOCK_FILE = os.getenv("WORKER_COST_LOCK", "/tmp/worker-costs.lock")
+_MAGIC = 0x434F5354  # "COST"
+_COLUMNS = ("calls",) + UNITS
+
+RECENT_CALLS = 50  # per-process window for rolling per-call averages
+
+_current_ledger: contextvars.ContextVar[Optional["CallLedger"]] = contextvars.ContextVar(
+    "call_ledger", default=None
+)
+
+
+class CallLedger:
+    """Units consumed by one call, in total and per turn"""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.started_at = time.time()
+        self.turn = 0
+        self.totals: Counter = Counter()
+        self.per_turn: Dict[int, Counter] = defaultdict(Counter)
+        self.closed = False
+
+    def bind(self) -> "CallLedger":
+        """Attribute count() calls from this task and its children to this ledger"""
+        _current_ledger.set(self)
+        return self
+
+    def count(self, unit: str, amount: float = 1):
+        if self.closed or not amount:
+            return
+        self.totals[unit] += amount
+        self.per_turn[self.turn][unit] += amount
+
+    def on_metrics(self, event):
+        """Handler for AgentSession `metrics_collected` events"""
+        metrics = getattr(event, "metrics", event)
+        kind = type(metrics).__name__
+        if kind == "LLMMetrics":
+            self.count("llm_requests")
+            self.count("llm_prompt_tokens", getattr(metrics, "prompt_tokens", 0) or 0)
+            self.count("llm_cached_tokens", getattr(metrics, "prompt_cached_tokens", 0) or 0)
+            self.count("llm_completion_tokens", getattr(metrics, "completion_tokens", 0) or 0)
+        elif kind == "TTSMetrics":
+            self.count("tts_characters", getattr(metrics, "characters_count", 0) or 0)
+            self.count("tts_audio_seconds", getattr(metrics, "audio_duration", 0.0) or 0.0)
+        elif kind == "STTMetrics":
+            self.count("stt_audio_seconds", getattr(metrics, "audio_duration", 0.0) or 0.0)
+
+    def estimated_cost(self) -> float:
+        return sum(amount * COST_PER_UNIT.get(unit, 0.0) for unit, amount in self.totals.items())
+
+    def summary(self) -> Dict:
+        turns = [t for t in self.per_turn if t > 0]
+        return {
+            "duration_sec": round(time.time() - self.started_at, 1),
+            "turns": len(turns),
+            "units": {unit: round(amount, 3) for unit, amount in sorted(self.totals.items())},
+            "estimated_cost_usd": round(self.estimated_cost(), 6),
+            # The most expensive turns point at fan-out (sub-queries, re-embeds)
+            "top_turns": sorted(
+                (
+                    {"turn": turn, "kb_subqueries": c["kb_subqueries"], "embedding_calls": c["embedding_calls"],
+                     "pinecone_queries": c["pinecone_queries"], "llm_prompt_tokens": c["llm_prompt_tokens"]}
+                    for turn, c in self.per_turn.items()
+                ),
+                key=lambda row: (row["pinecone_queries"] + row["embedding_calls"], row["llm_prompt_tokens"]),
+                reverse=True,
+            )[:3],
+        }
+
+    async def close(self) -> Dict:
+        """Finish the call: log the summary and add it to the worker aggregates"""
+        summary = self.summary()
+        self.closed = True
+        logger.info(
+            "Call cost: ~$%.4f over %d turns", summary["estimated_cost_usd"], summary["turns"],
+            extra={"event": "call_cost", **summary},
+        )
+        _recent_calls.append(summary)
+        worker = _get_worker_totals()
+        if worker:
+            worker.add(self.totals)
+        _log_rolling_averages()
+        return summary
+
+
+def count(unit: str, amount: float = 1):
+    """Count `amount` of `unit` against the current call, if any"""
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.count(unit, amount)
+
+
+def current_ledger() -> Optional[CallLedger]:
+    return _current_ledger.get()
+
+
+# ---------------------------------------------------------------------------
+# Worker aggregates
+# ---------------------------------------------------------------------------
+
+class WorkerCostTotals:
+    """Cumulative unit totals of every finished call on this host (shared memory)"""
+
+    def __init__(self, name: str = COST_SEGMENT):
+        size = 8 + len(_COLUMNS) * 8
+        self._segment, created = open_segment(name, size)
+        buf = self._segment.buf
+        header = np.ndarray((1,), dtype=np.uint64, buffer=buf)
+        if created:
+            header[0] = _MAGIC
+        if int(header[0]) != _MAGIC:
+            raise RuntimeError(f"Shared segment {name} has an unexpected layout")
+        self.values = np.ndarray((len(_COLUMNS),), dtype=np.float64, buffer=buf, offset=8)
+
+    def add(self, totals: Counter):
+        # Read-modify-write from several job processes: serialize with a file lock
+        with open(COST_LOCK_FILE, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.values[0] += 1
+                for i, unit in enumerate(UNITS, start=1):
+                    self.values[i] += totals.get(unit, 0)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(_COLUMNS, self.values.copy())}
+
+
+_worker_totals: Optional[WorkerCostTotals] = None
+_recent_calls: deque = deque(maxlen=RECENT_CALLS)
+
+
+def _get_worker_totals() -> Optional[WorkerCostTotals]:
+    global _worker_totals
+    if _worker_totals is None:
+        try:
+            _worker_totals = WorkerCostTotals()
+        except Exception as e:
+            logger.warning("Worker cost totals unavailable: %s", e)
+            return None
+    return _worker_totals
+
+
+def _log_rolling_averages():
+    """Per-call averages over the last calls handled by this process"""
+    calls = len(_recent_calls)
+    averages = {
+        unit: round(sum(s["units"].get(unit, 0) for s in _recent_calls) / calls, 2)
+        for unit in UNITS
+    }
+    averages["estimated_cost_usd"] = round(sum(s["estimated_cost_usd"] for s in _recent_calls) / calls, 6)
+    logger.info(
+        "Rolling per-call averages over %d calls", calls,
+        extra={"event": "call_cost_rolling", "calls": calls, "averages": averages},
+    )
+
+
+def metrics_lines():
+    """Prometheus counters for /metrics (worker main process)"""
+    worker = _get_worker_totals()
+    if worker is None:
+        return []
+    totals = worker.snapshot()
+    lines = [
+        "# HELP agent_calls_accounted_total Finished calls included in agent_cost_units_total",
+        "# TYPE agent_calls_accounted_total counter",
+        f"agent_calls_accounted_total {totals['calls']:.0f}",
+        "# HELP agent_cost_units_total Billable units consumed by finished calls",
+        "# TYPE agent_cost_units_total counter",
+    ]
+    for unit in UNITS:
+        lines.append(f'agent_cost_units_total{{unit="{unit}"}} {totals[unit]:.3f}')
+    estimated = sum(totals[unit] * COST_PER_UNIT.get(unit, 0.0) for unit in UNITS)
+    lines += [
+        "# HELP agent_estimated_cost_usd_total Estimated spend of finished calls",
+        "# TYPE agent_estimated_cost_usd_total counter",
+        f"agent_estimated_cost_usd_total {estimated:.6f}",
+    ]
+    return lines
+
+
+register_metrics(metrics_lines)
@@ -2,40 +2,36 @@
 """
 Dispatch an agent to a room manually
 This ensures the agent joins when you connect
+Pooled rooms (room_pool.py) are dispatched when they are created;
+this is for rooms created outside the pool.
+
+    python dispatch_agent.py [room_name]
 """
-import os
+import sys
 import asyncio
 from dotenv import load_dotenv
-from livekit import api
+
+from room_pool import create_livekit_api, dispatch_agent
 
 load_dotenv()
 
 async def dispatch_agent_to_room():
-    """Dispatch the agent to first_room"""
+    """Dispatch the agent to a room (default: Second_room)"""
 
-    livekit_api = api.LiveKitAPI(
-        url=os.getenv("LIVEKIT_URL"),
-        api_key=os.getenv("LIVEKIT_API_KEY"),
-        api_secret=os.getenv("LIVEKIT_API_SECRET"),
-    )
+    livekit_api = create_livekit_api()
 
-    room_name = "Second_room"
+    room_name = sys.argv[1] if len(sys.argv) > 1 else "Second_room"
 
     try:
         # Create or update room with agent dispatch
         print(f"Dispatching agent to room: {room_name}")
 
         # Create agent dispatch
-        result = await livekit_api.agent_dispatch.create_dispatch(
-            api.CreateAgentDispatchRequest(
-                room=room_name,
-                agent_name="",  # Empty means use any available agent
-            )
-        )
+        dispatch_id = await dispatch_agent(livekit_api, room_name)
 
         print(f"Agent dispatch created!")
-        print(f"   Dispatch ID: {result.agent_dispatch.id}")
-        print(f"   Room: {result.agent_dispatch.room}")
+        print(f"   Dispatch ID: {dispatch_id}")
+        print(f"   Room: {room_name}")
 
     except Exception as e:
         print(f"Error dispatching agent: {e}")
@@ -0,0 +1,79 @@
+"""
+Confidence-gated fast path for knowledge base answers
+
+When the knowledge base returns a clear, high-confidence match for the
+caller's question, the stored answer is spoken directly through TTS and the
+LLM turn is skipped. Guardrails decide when this is safe:
+
+1. Top match score >= min_score (CONFIDENCE_HIGH by default)
+2. Margin over the runner-up >= min_margin (no ambiguity between entries)
+3. Answer is short enough to speak verbatim (max_answer_chars)
+4. Answer is plain text (no structured business context JSON)
+5. No tool call (e.g. an escalation) is in progress
+
+Enable with KB_FAST_PATH=1.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional
+
+from knowledge_base import CONFIDENCE_HIGH
+
+logger = logging.getLogger(__name__)
+
+
+class FastPathPolicy:
+    """Decides whether a KB result can be spoken without an LLM round trip"""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        min_score: float = CONFIDENCE_HIGH,
+        min_margin: float = 0.08,
+        max_answer_chars: int = 300,
+    ):
+        self.enabled = enabled
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.max_answer_chars = max_answer_chars
+
+    @classmethod
+    def from_env(cls) -> "FastPathPolicy":
+        return cls(
+            enabled=os.getenv("KB_FAST_PATH", "0") == "1",
+            min_score=float(os.getenv("KB_FAST_PATH_MIN_SCORE", str(CONFIDENCE_HIGH))),
+            min_margin=float(os.getenv("KB_FAST_PATH_MARGIN", "0.08")),
+            max_answer_chars=int(os.getenv("KB_FAST_PATH_MAX_CHARS", "300")),
+        )
+
+    def choose(self, matches: List[Dict], tool_call_pending: bool = False) -> Optional[Dict]:
+        """
+        Return the match to speak directly, or None to fall through to the LLM.
+
+        Args:
+            matches: KB matches sorted by score (highest first)
+            tool_call_pending: Whether a function tool is currently executing
+        """
+        if not self.enabled or not matches or tool_call_pending:
+            return None
+
+        top = matches[0]
+        if top.get("confidence") != "high" or top["score"] < self.min_score:
+            return None
+
+        runner_up = matches[1]["score"] if len(matches) > 1 else 0.0
+        if top["score"] - runner_up < self.min_margin:
+            logger.debug(
+                "[FAST PATH] Skipped: margin %.3f below %.3f", top["score"] - runner_up, self.min_margin,
+                extra={"event": "fast_path_skip"},
+            )
+            return None
+
+        answer = (top.get("answer") or "").strip()
+        if not answer or len(answer) > self.max_answer_chars:
+            return None
+        if top.get("type") == "business_context" or answer.startswith(("{", "[")):
+            return None
+
+        return top
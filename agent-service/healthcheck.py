@@ -5,6 +5,9 @@ Verifies that critical services are accessible
 
 import os
 import sys
+import json
+import urllib.error
+import urllib.request
 
 
 def check_environment():
@@ -25,24 +28,58 @@ def check_environment():
 
 
 def check_knowledge_base():
-    """Check if knowledge base service can be initialized"""
-    try:
-        from knowledge_base import get_knowledge_base_service
-
-        kb_service = get_knowledge_base_service()
-        if kb_service.enabled:
-            print("✅ Knowledge base service is enabled")
-            return True
-        else:
-            print("⚠️  Knowledge base service is disabled (missing API keys)")
-            # Not a failure - agent can still work without KB
-            return True
-
-    except Exception as e:
-        print(f"⚠️  Knowledge base check failed: {e}")
+    """
+    Check that the knowledge base can be enabled, without importing the KB
+    stack (Pinecone/Gemini SDKs take seconds to import and the service
+    connects to Pinecone on construction)
+    """
+    import importlib.util
+
+    missing_keys = [var for var in ("PINECONE_API_KEY", "GEMINI_API_KEY") if not os.getenv(var)]
+    if missing_keys:
+        print(f"⚠️  Knowledge base service is disabled (missing {', '.join(missing_keys)})")
+        # Not a failure - agent can still work without KB
+        return True
+
+    missing_packages = []
+    for module in ("pinecone", "google.generativeai"):
+        try:
+            if importlib.util.find_spec(module) is None:
+                missing_packages.append(module)
+        except ModuleNotFoundError:
+            missing_packages.append(module)
+    if missing_packages:
+        print(f"⚠️  Knowledge base packages not installed: {', '.join(missing_packages)}")
         # Not a critical failure
         return True
 
+    print("✅ Knowledge base service is configured")
+    return True
+
+
+def check_readiness():
+    """Report the running worker's cached dependency latencies (GET /ready)"""
+    port = os.getenv("AGENT_HTTP_PORT", "9091")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=2) as response:
+            report = json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        report = json.loads(e.read() or b"{}")
+    except (urllib.error.URLError, OSError):
+        print("⚠️  Worker not running, skipping readiness probe")
+        return True
+
+    for name, dep in report.get("dependencies", {}).items():
+        p50 = f"{dep['p50_ms']:.0f} ms p50" if dep.get("p50_ms") is not None else "no samples"
+        print(f"   {name}: {dep['status']} ({p50}, budget {dep['budget_ms']:.0f} ms)")
+
+    if report.get("status") != "ready":
+        print(f"❌ Worker is {report.get('status', 'unknown')}")
+        return False
+
+    print("✅ Worker dependencies ready")
+    return True
+
 
 def main():
     """Run health checks"""
@@ -51,6 +88,7 @@ def main():
     checks = [
         ("Environment variables", check_environment),
         ("Knowledge base", check_knowledge_base),
+        ("Readiness", check_readiness),
     ]
 
     all_passed = True
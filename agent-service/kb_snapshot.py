@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped knowledge base snapshot
+
+A compact, versioned file with every KB vector and its text, written by a
+sync job and mmap'd by KnowledgeBaseService at startup. A restarted worker
+can then answer (master context, local vector and keyword search) without
+reaching Pinecone first, and pages are shared by every process on the host.
+
+File layout (little-endian):
+    header      magic "KBSNAP\\0\\0", version, dtype, dim, count, created_at,
+                section offsets (see HEADER)
+    vectors     count x dim, float16 or int8 (L2-normalized before quantizing)
+    scales      count x float32 (int8 only: per-row dequantization scale)
+    index       count x 10 uint32: (offset, length) of id, question, answer, type, tags
+    strings     packed UTF-8
+
+Build with:
+    python kb_snapshot.py build [--out kb_snapshot.bin] [--dtype float16|int8]
+
+The worker's main process also rebuilds it in a subprocess at boot and every
+KB_SNAPSHOT_REFRESH seconds (start_refresh), and a snapshot older than
+KB_SNAPSHOT_MAX_AGE is not loaded at all, so a forgotten file never serves
+outdated answers.
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import logging
+import argparse
+import threading
+import subprocess
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv("KB_SNAPSHOT_PATH", "kb_snapshot.bin")
+SNAPSHOT_MAX_AGE = float(os.getenv("KB_SNAPSHOT_MAX_AGE", "86400"))  # seconds; older snapshots are ignored
+SNAPSHOT_REFRESH = float(os.getenv("KB_SNAPSHOT_REFRESH", "3600"))  # seconds between rebuilds; 0 disables
+BUILD_TIMEOUT = 600
+
+MAGIC = b"KBSNAP\0\0"
+VERSION = 1
+DTYPE_FLOAT16 = 1
+DTYPE_INT8 = 2
+
+# magic, version, dtype, dim, count, created_at, vectors_off, scales_off, index_off, strings_off, strings_len
+HEADER = struct.Struct("<8sIIIIdQQQQQ")
+_FIELDS = ("id", "question", "answer", "type", "tags")
+
+FETCH_BATCH_SIZE = 100
+
+
+def write_snapshot(path: str, entries: Iterable[Dict], dtype: str = "float16") -> int:
+    """
+    Write entries ({id, values, question, answer, type, tags}) to path atomically.
+
+    Returns:
+        Number of entries written
+    """
+    entries = list(entries)
+    if not entries:
+        raise ValueError("Refusing to write an empty snapshot")
+
+    vectors = np.asarray([e["values"] for e in entries], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    count, dim = vectors.shape
+
+    if dtype == "int8":
+        dtype_code = DTYPE_INT8
+        scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+        packed_vectors = np.round(vectors / scales[:, None]).astype(np.int8)
+        scales_bytes = scales.astype(np.float32).tobytes()
+    else:
+        dtype_code = DTYPE_FLOAT16
+        packed_vectors = vectors.astype(np.float16)
+        scales_bytes = b""
+
+    strings = bytearray()
+    index = np.zeros((count, 2 * len(_FIELDS)), dtype=np.uint32)
+    for row, entry in enumerate(entries):
+        for col, field in enumerate(_FIELDS):
+            value = entry.get(field) or ""
+            if isinstance(value, list):
+                value = ",".join(value)
+            encoded = str(value).encode("utf-8")
+            index[row, 2 * col] = len(strings)
+            index[row, 2 * col + 1] = len(encoded)
+            strings.extend(encoded)
+
+    vectors_off = HEADER.size
+    scales_off = vectors_off + packed_vectors.nbytes
+    index_off = scales_off + len(scales_bytes)
+    strings_off = index_off + index.nbytes
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, dtype_code, dim, count, time.time(),
+            vectors_off, scales_off, index_off, strings_off, len(strings),
+        ))
+        f.write(packed_vectors.tobytes())
+        f.write(scales_bytes)
+        f.write(index.tobytes())
+        f.write(bytes(strings))
+    os.replace(tmp_path, path)
+    return count
+
+
+class KBSnapshot:
+    """Read-only view over a snapshot file; vectors are searched in place via mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, dtype_code, dim, count, created_at,
+         vectors_off, scales_off, index_off, strings_off, strings_len) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a KB snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported KB snapshot version {version}")
+
+        self.dim = dim
+        self.count = count
+        self.created_at = created_at
+        vector_dtype = np.int8 if dtype_code == DTYPE_INT8 else np.float16
+        self._vectors = np.frombuffer(self._mmap, dtype=vector_dtype, count=count * dim, offset=vectors_off).reshape(count, dim)
+        self._scales = (
+            np.frombuffer(self._mmap, dtype=np.float32, count=count, offset=scales_off)
+            if dtype_code == DTYPE_INT8 else None
+        )
+        self._index = np.frombuffer(self._mmap, dtype=np.uint32, count=count * 2 * len(_FIELDS), offset=index_off).reshape(count, -1)
+        self._strings_off = strings_off
+        self._rows_by_id: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def load(cls, path: str = SNAPSHOT_PATH, max_age: float = SNAPSHOT_MAX_AGE) -> Optional["KBSnapshot"]:
+        """Open a snapshot if the file exists, is valid and is at most max_age seconds old, else None"""
+        if not os.path.exists(path):
+            return None
+        try:
+            snapshot = cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if snapshot.age_seconds > max_age:
+            logger.warning(
+                "Ignoring KB snapshot %s: %.1fh old (max %.1fh)",
+                path, snapshot.age_seconds / 3600, max_age / 3600,
+            )
+            snapshot.close()
+            return None
+        return snapshot
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created_at
+
+    def _field(self, row: int, field: str) -> str:
+        col = _FIELDS.index(field)
+        offset, length = self._index[row, 2 * col], self._index[row, 2 * col + 1]
+        start = self._strings_off + int(offset)
+        return self._mmap[start:start + int(length)].decode("utf-8")
+
+    def entry(self, row: int) -> Dict:
+        tags = self._field(row, "tags")
+        return {
+            "id": self._field(row, "id"),
+            "question": self._field(row, "question"),
+            "answer": self._field(row, "answer"),
+            "type": self._field(row, "type"),
+            "tags": tags.split(",") if tags else [],
+        }
+
+    def row_of(self, entry_id: str) -> Optional[int]:
+        if self._rows_by_id is None:
+            self._rows_by_id = {self._field(row, "id"): row for row in range(self.count)}
+        return self._rows_by_id.get(entry_id)
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        row = self.row_of(entry_id)
+        return self.entry(row) if row is not None else None
+
+    def entries(self) -> Iterable[Dict]:
+        for row in range(self.count):
+            yield self.entry(row)
+
+    def vector(self, row: int) -> np.ndarray:
+        vector = self._vectors[row].astype(np.float32)
+        if self._scales is not None:
+            vector *= self._scales[row]
+        return vector
+
+    def search(self, query_vector: List[float], top_k: int = 3) -> List[Dict]:
+        """Cosine similarity search over all vectors; returns entries with `score`"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        scores = self._vectors.astype(np.float32) @ query
+        if self._scales is not None:
+            scores *= self._scales
+
+        top_k = min(top_k, self.count)
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.entry(int(row)), "score": float(scores[row])} for row in top]
+
+    def close(self):
+        self._vectors = self._scales = self._index = None
+        self._mmap.close()
+        self._file.close()
+
+
+def fetch_all_entries(index) -> List[Dict]:
+    """Fetch every vector (values + metadata) from a Pinecone index"""
+    ids = []
+    for page in index.list():
+        ids.extend(page)
+
+    entries = []
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        response = index.fetch(ids=ids[start:start + FETCH_BATCH_SIZE])
+        for vector_id, vector in response.vectors.items():
+            metadata = vector.metadata or {}
+            entries.append({
+                "id": vector_id,
+                "values": vector.values,
+                "question": metadata.get("question", ""),
+                "answer": metadata.get("answer", ""),
+                "type": metadata.get("type", ""),
+                "tags": metadata.get("tags", ""),
+            })
+    return entries
+
+
+def build(out: str, dtype: str) -> int:
+    """Sync job: dump the Pinecone index into a snapshot file"""
+    from dotenv import load_dotenv
+    try:
+        from pinecone import Pinecone
+    except ImportError:
+        from pinecone.grpc import PineconeGRPC as Pinecone
+
+    load_dotenv()
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    if not pinecone_api_key:
+        print("[ERROR] PINECONE_API_KEY not set")
+        return 1
+
+    index = Pinecone(api_key=pinecone_api_key).Index(os.getenv("PINECONE_INDEX_NAME", "luxe-salon-knowledge"))
+    print("[INFO] Fetching vectors from Pinecone...")
+    entries = fetch_all_entries(index)
+    count = write_snapshot(out, entries, dtype=dtype)
+    print(f"[SUCCESS] Wrote {count} entries to {out} ({os.path.getsize(out) / 1024:.0f} KB, {dtype})")
+    return 0
+
+
+def _snapshot_age(path: str) -> Optional[float]:
+    snapshot = KBSnapshot.load(path, max_age=float("inf"))
+    if snapshot is None:
+        return None
+    age = snapshot.age_seconds
+    snapshot.close()
+    return age
+
+
+def start_refresh(path: str = SNAPSHOT_PATH, interval: float = SNAPSHOT_REFRESH) -> Optional[threading.Thread]:
+    """
+    Keep the snapshot fresh from the worker's main process: rebuild it whenever
+    it is missing or older than interval. The build runs in a subprocess, so
+    the Pinecone SDK and the fetched vectors never stay in the main process;
+    job processes started afterwards load the new file (replaced atomically).
+    """
+    if interval <= 0 or not os.getenv("PINECONE_API_KEY"):
+        return None
+
+    def run():
+        while True:
+            age = _snapshot_age(path)
+            if age is None or age >= interval:
+                try:
+                    result = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "build", "--out", path],
+                        capture_output=True, text=True, timeout=BUILD_TIMEOUT,
+                    )
+                    if result.returncode == 0:
+                        logger.info("KB snapshot rebuilt: %s", result.stdout.strip().splitlines()[-1])
+                    else:
+                        logger.warning("KB snapshot build failed: %s", (result.stderr or result.stdout).strip()[-500:])
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    logger.warning("KB snapshot build failed: %s", e)
+                age = 0.0
+            time.sleep(max(interval - age, 60.0))
+
+    thread = threading.Thread(target=run, name="kb-snapshot-refresh", daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Knowledge base snapshot tool")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Write a snapshot from Pinecone")
+    build_parser.add_argument("--out", default=SNAPSHOT_PATH)
+    build_parser.add_argument("--dtype", choices=["float16", "int8"], default="float16")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sys.exit(build(args.out, args.dtype))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,18 @@ the knowledge base before answering caller questions.
 """
 
 import os
+import re
+import json
+import time
 import logging
+from collections import OrderedDict
 from typing import List, Dict, Optional, Tuple
-try:
-    from pinecone import Pinecone
-except ImportError:
-    from pinecone.grpc import PineconeGRPC as Pinecone
-import google.generativeai as genai
+
+from resilience import ResilientDependency, CircuitOpenError, SingleFlight
+from shared_kb_cache import SharedEmbeddingCache, SharedBlob, RemoteKnowledgeBaseService, LOOKUP_SOCKET
+from kb_snapshot import KBSnapshot
+from rerank import RERANK_ENABLED, CandidateVectors, mmr_rerank
+from cost_ledger import count
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +26,164 @@ logger = logging.getLogger(__name__)
 CONFIDENCE_HIGH = 0.75  # Very strong match
 CONFIDENCE_MEDIUM = 0.55  # Good match, use with context
 
+# Per-dependency deadlines on the turn path (seconds)
+EMBEDDING_TIMEOUT = float(os.getenv("KB_EMBEDDING_TIMEOUT", "1.5"))
+QUERY_TIMEOUT = float(os.getenv("KB_QUERY_TIMEOUT", "1.5"))
+
+EMBEDDING_CACHE_SIZE = 512
+
+# Serve vector search from the local snapshot instead of Pinecone (see kb_snapshot.py)
+SNAPSHOT_SEARCH = os.getenv("KB_SNAPSHOT_SEARCH", "0") == "1"
+
+# Query Pinecone for IDs and scores only; text comes from the local AnswerStore
+SLIM_QUERIES = os.getenv("KB_SLIM_QUERIES", "1") == "1"
+ANSWER_STORE_TTL = float(os.getenv("KB_ANSWER_STORE_TTL", "600"))  # seconds before an answer is refreshed
+ANSWER_STORE_FETCH_BATCH = 100  # IDs per fetch when warming the answer store
+# Bounds on one warm: the rest of the store fills as queries return new IDs
+ANSWER_WARM_BUDGET = float(os.getenv("KB_ANSWER_WARM_BUDGET", "20"))  # seconds
+ANSWER_WARM_MAX_ENTRIES = int(os.getenv("KB_ANSWER_WARM_MAX_ENTRIES", "5000"))
+MASTER_CONTEXT_QUESTION = "MASTER_BUSINESS_CONTEXT"
+# Seconds a master context copy (in-process or shared) is used before it is re-fetched
+MASTER_CONTEXT_TTL = float(os.getenv("KB_MASTER_CONTEXT_TTL", "300"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "do", "does", "you", "your", "i", "we", "my",
+    "to", "of", "for", "in", "on", "at", "what", "how", "can", "it", "and", "or",
+}
+
+
+def _pinecone_class():
+    """Import the Pinecone SDK on first use; it costs seconds of cold start otherwise"""
+    try:
+        from pinecone import Pinecone
+    except ImportError:
+        from pinecone.grpc import PineconeGRPC as Pinecone
+    return Pinecone
+
+
+def _genai():
+    """Import the Google Generative AI SDK on first use"""
+    import google.generativeai as genai
+    return genai
+
+
+def confidence_for(score: float) -> str:
+    """Map a similarity score to a confidence level"""
+    if score >= CONFIDENCE_HIGH:
+        return "high"
+    elif score >= CONFIDENCE_MEDIUM:
+        return "medium"
+    return "low"
+
+
+def _tokenize(text: str) -> set:
+    return {t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS}
+
+
+class LocalLexicalIndex:
+    """
+    Small in-process keyword index used as a fallback while Pinecone or the
+    embedding API is unavailable. It is filled from entries seen in successful
+    searches and from the sections of the master business context.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # {id: (tokens, match_dict)}
+
+    def add(self, entry: Dict):
+        entry_id = entry["id"]
+        tokens = _tokenize(f"{entry.get('question', '')} {' '.join(entry.get('tags', []))}")
+        self.entries[entry_id] = (tokens, entry)
+        self.entries.move_to_end(entry_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def add_master_context(self, business_data: Dict):
+        """Index each top-level section of the master context as its own entry"""
+        for section, value in business_data.items():
+            words = re.sub(r"([a-z])([A-Z])", r"\1 \2", section)
+            keys = " ".join(value.keys()) if isinstance(value, dict) else ""
+            self.add({
+                "id": f"master:{section}",
+                "question": f"{words} {keys}".strip(),
+                "answer": json.dumps(value, ensure_ascii=False),
+                "type": "business_context",
+                "tags": [section],
+            })
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        query_tokens = _tokenize(query)
+        if not query_tokens:
+            return []
+
+        scored = []
+        for tokens, entry in self.entries.values():
+            overlap = len(query_tokens & tokens)
+            if overlap:
+                scored.append((overlap / len(query_tokens | tokens), entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        matches = []
+        for score, entry in scored[:top_k]:
+            # Keyword overlap is never as trustworthy as a vector match: cap below HIGH
+            score = min(score, CONFIDENCE_HIGH - 0.01)
+            matches.append({
+                **entry,
+                "score": score,
+                "confidence": "medium" if score >= CONFIDENCE_MEDIUM else "low",
+                "source": "local",
+            })
+        return matches
+
+
+class AnswerStore:
+    """
+    ID-keyed question/answer text for slim queries. Filled once per process
+    (snapshot, then KnowledgeBaseService.warm_answer_store in prewarm or the
+    KB_IPC server). Only IDs the store has never seen are fetched on the turn
+    path; entries older than ANSWER_STORE_TTL are still served and refreshed
+    in the background.
+    """
+
+    def __init__(self, ttl: float = ANSWER_STORE_TTL):
+        self.ttl = ttl
+        self.entries: Dict[str, Tuple[float, Optional[Dict]]] = {}  # {id: (loaded_at, entry or None if deleted)}
+
+    def load(self, entries, loaded_at: float):
+        for entry in entries:
+            if entry["question"] != MASTER_CONTEXT_QUESTION:
+                self.entries[entry["id"]] = (loaded_at, entry)
+
+    def put(self, entry: Dict):
+        self.entries[entry["id"]] = (time.time(), entry)
+
+    def put_deleted(self, entry_id: str):
+        """Remember that an ID no longer exists so it is not re-fetched on every query"""
+        self.entries[entry_id] = (time.time(), None)
+
+    def missing(self, ids: List[str]) -> List[str]:
+        return [i for i in ids if i not in self.entries]
+
+    def stale(self, ids: List[str]) -> List[str]:
+        now = time.time()
+        return [i for i in ids if i in self.entries and now - self.entries[i][0] > self.ttl]
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        item = self.entries.get(entry_id)
+        return item[1] if item else None
+
+
+def _entry_from_metadata(entry_id: str, metadata: Dict) -> Dict:
+    return {
+        "id": entry_id,
+        "question": metadata.get("question", ""),
+        "answer": metadata.get("answer", ""),
+        "type": metadata.get("type", ""),
+        "tags": metadata.get("tags", "").split(",") if metadata.get("tags") else [],
+    }
+
 
 class KnowledgeBaseService:
     """
@@ -34,6 +197,33 @@ class KnowledgeBaseService:
         """Initialize Pinecone and Google AI clients"""
         self.master_business_context = None
         self.master_context_fetched = False
+        self.master_context_fetched_at = 0.0  # when the cached copy was fetched from Pinecone
+
+        # Degraded-mode state: used while a dependency is slow or its breaker is open
+        self.embedding_cache = OrderedDict()
+        self.lexical_index = LocalLexicalIndex()
+        self.embedding_dependency = ResilientDependency("gemini-embedding", timeout=EMBEDDING_TIMEOUT)
+        self.index_dependency = ResilientDependency("pinecone-query", timeout=QUERY_TIMEOUT)
+        self.search_flight = SingleFlight()
+        self.answer_store = AnswerStore()
+        self._refresh_executor = None  # single thread for background answer store refreshes
+        self._answer_refresh = None  # Future of the running refresh, if any
+        self.candidate_vectors = CandidateVectors(fallback=self._snapshot_vector)
+
+        # Host-wide caches shared with the other job processes (optional)
+        self.shared_embeddings = None
+        self.shared_context = None
+        if os.getenv("KB_SHARED_CACHE", "1") == "1":
+            try:
+                self.shared_embeddings = SharedEmbeddingCache()
+                self.shared_context = SharedBlob()
+            except Exception as e:
+                logger.warning(f"[WARNING] Shared KB cache unavailable, using process-local caches: {e}")
+
+        # Local snapshot: master context, keyword index and vectors without a network round trip
+        self.snapshot = KBSnapshot.load()
+        if self.snapshot:
+            self._load_snapshot()
 
         # Initialize Pinecone
         pinecone_api_key = os.getenv("PINECONE_API_KEY")
@@ -42,7 +232,7 @@ class KnowledgeBaseService:
             self.enabled = False
             return
 
-        self.pc = Pinecone(api_key=pinecone_api_key)
+        self.pc = _pinecone_class()(api_key=pinecone_api_key)
         self.index_name = os.getenv("PINECONE_INDEX_NAME", "luxe-salon-knowledge")
 
         try:
@@ -60,31 +250,128 @@ class KnowledgeBaseService:
             self.enabled = False
             return
 
-        genai.configure(api_key=gemini_api_key)
+        self.genai = _genai()
+        self.genai.configure(api_key=gemini_api_key)
         self.enabled = True
         logger.info("[SUCCESS] Knowledge base service initialized with hierarchical search")
 
+    def _load_snapshot(self):
+        """Warm master context, the answer store and the local keyword index from the mmap'd snapshot"""
+        # Stamped with the build time, so entries older than the answer store
+        # TTL (and the master context) are refreshed from Pinecone on first use
+        self.answer_store.load(self.snapshot.entries(), loaded_at=self.snapshot.created_at)
+        for entry in self.snapshot.entries():
+            if entry["question"] == "MASTER_BUSINESS_CONTEXT":
+                try:
+                    self.master_business_context = json.loads(entry["answer"])
+                    self.master_context_fetched = True
+                    self.master_context_fetched_at = self.snapshot.created_at
+                    self.lexical_index.add_master_context(self.master_business_context)
+                except json.JSONDecodeError:
+                    pass
+            else:
+                self.lexical_index.add(entry)
+        logger.info(
+            f"[SUCCESS] Loaded KB snapshot: {self.snapshot.count} entries, "
+            f"{self.snapshot.age_seconds / 3600:.1f}h old"
+        )
+
+    def _fetch_answers(self, ids: List[str]):
+        """Fetch text (and vectors) for ids into the answer store; unknown ids are remembered as deleted"""
+        count("pinecone_fetches")
+        fetched = self.index_dependency.call(self.index.fetch, ids=ids)
+        for vector_id, vector in fetched.vectors.items():
+            self.answer_store.put(_entry_from_metadata(vector_id, vector.metadata or {}))
+            self.candidate_vectors.put(vector_id, vector.values)
+        for vector_id in set(ids) - set(fetched.vectors):
+            self.answer_store.put_deleted(vector_id)
+
+    def warm_answer_store(self) -> int:
+        """
+        Fill the answer store with the entries in the index, so slim queries on
+        the turn path need no fetch. Stops after ANSWER_WARM_BUDGET seconds or
+        ANSWER_WARM_MAX_ENTRIES entries. Call once per process on a background
+        thread (job prewarm, KB_IPC server). Returns the number of entries loaded.
+        """
+        if not self.enabled or not SLIM_QUERIES:
+            return 0
+        started = time.perf_counter()
+        deadline = started + ANSWER_WARM_BUDGET
+        loaded = 0
+        try:
+            for ids in self.index.list():
+                ids = [i for i in ids if i not in self.answer_store.entries]
+                for start in range(0, len(ids), ANSWER_STORE_FETCH_BATCH):
+                    if time.perf_counter() > deadline or loaded >= ANSWER_WARM_MAX_ENTRIES:
+                        logger.info(f"[INFO] Answer store warm stopped at its budget ({loaded} entries)")
+                        return loaded
+                    self._fetch_answers(ids[start:start + ANSWER_STORE_FETCH_BATCH])
+                    loaded += len(ids[start:start + ANSWER_STORE_FETCH_BATCH])
+        except Exception as e:
+            # Pod indexes cannot list IDs; the store then fills as queries return new IDs
+            logger.warning(f"[WARNING] Could not warm the answer store: {e}")
+        logger.info(f"[SUCCESS] Answer store warmed with {loaded} entries in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return loaded
+
+    def _refresh_stale_answers(self, ids: List[str]):
+        """Re-fetch stale entries in the background; at most one refresh at a time"""
+        if self._answer_refresh is not None and not self._answer_refresh.done():
+            return
+        if self._refresh_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="answer-refresh")
+        self._answer_refresh = self._refresh_executor.submit(self._fetch_answers, ids)
+
+    def _snapshot_vector(self, entry_id: str):
+        if not self.snapshot:
+            return None
+        row = self.snapshot.row_of(entry_id)
+        return self.snapshot.vector(row) if row is not None else None
+
+    def search_snapshot(self, query_embedding: List[float], top_k: int = 3) -> List[Dict]:
+        """Vector search over the local snapshot (excluding the master context record)"""
+        if not self.snapshot:
+            return []
+        matches = []
+        for entry in self.snapshot.search(query_embedding, top_k=top_k + 1):
+            if entry["question"] == "MASTER_BUSINESS_CONTEXT":
+                continue
+            matches.append({**entry, "confidence": confidence_for(entry["score"]), "source": "snapshot"})
+        return matches[:top_k]
+
     def get_master_business_context(self) -> Optional[Dict]:
         """
         Fetch the master business context record from Pinecone.
         This contains all structured business information (working hours, pricing, etc.)
-        Cached after first fetch for performance.
+        Cached (and shared with the host's other job processes) for
+        MASTER_CONTEXT_TTL seconds, so dashboard edits reach running workers.
 
         Returns:
             Dictionary with business context or None if not found
         """
-        if self.master_context_fetched:
+        if self.master_context_fetched and time.time() - self.master_context_fetched_at < MASTER_CONTEXT_TTL:
             return self.master_business_context
 
         if not self.enabled:
-            return None
+            return self.master_business_context
+
+        # Another job process on this host may already have fetched it
+        shared = self.shared_context.read(max_age=MASTER_CONTEXT_TTL) if self.shared_context else None
+        if shared is not None:
+            self.master_business_context, self.master_context_fetched_at = shared
+            self.master_context_fetched = True
+            self.lexical_index.add_master_context(self.master_business_context)
+            return self.master_business_context
 
         try:
             logger.info("[MASTER CONTEXT] Fetching master business context from Pinecone...")
 
             # Search for the master context record using metadata filter
             # We filter by type='business_context' and question='MASTER_BUSINESS_CONTEXT'
-            results = self.index.query(
+            count("pinecone_queries")
+            results = self.index_dependency.call(
+                self.index.query,
                 vector=[0] * 768,  # Dummy vector, we only care about filter match
                 top_k=1,
                 filter={
@@ -99,11 +386,14 @@ class KnowledgeBaseService:
                 metadata = match.metadata
 
                 # Parse the JSON answer field
-                import json
                 try:
                     business_data = json.loads(metadata.get('answer', '{}'))
                     self.master_business_context = business_data
                     self.master_context_fetched = True
+                    self.master_context_fetched_at = time.time()
+                    self.lexical_index.add_master_context(business_data)
+                    if self.shared_context:
+                        self.shared_context.write(business_data, written_at=self.master_context_fetched_at)
                     logger.info("[SUCCESS] Master business context loaded and cached")
                     return business_data
                 except json.JSONDecodeError as e:
@@ -112,12 +402,15 @@ class KnowledgeBaseService:
             else:
                 logger.warning("[WARNING] Master business context not found in Pinecone")
                 logger.warning("[WARNING] Please run: node scripts/add_business_context.js")
+                self.master_business_context = None
                 self.master_context_fetched = True
+                self.master_context_fetched_at = time.time()
                 return None
 
         except Exception as e:
+            # Keep serving the expired copy (if any) until a refresh succeeds
             logger.error(f"[ERROR] Failed to fetch master business context: {e}")
-            return None
+            return self.master_business_context
 
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -129,17 +422,40 @@ class KnowledgeBaseService:
         Returns:
             List of floats representing the embedding (768 dimensions)
         """
+        cache_key = " ".join(text.lower().split())
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            self.embedding_cache.move_to_end(cache_key)
+            count("embedding_cache_hits")
+            return cached
+
+        cached = self.shared_embeddings.get(cache_key) if self.shared_embeddings else None
+        if cached is not None:
+            self.embedding_cache[cache_key] = cached
+            count("embedding_cache_hits")
+            return cached
+
+        count("embedding_calls")
+
         try:
-            result = genai.embed_content(
+            result = self.embedding_dependency.call(
+                self.genai.embed_content,
                 model="models/text-embedding-004",
                 content=text,
                 task_type="retrieval_query"
             )
-            return result['embedding']
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             raise
 
+        embedding = result['embedding']
+        self.embedding_cache[cache_key] = embedding
+        if self.shared_embeddings:
+            self.shared_embeddings.put(cache_key, embedding)
+        if len(self.embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self.embedding_cache.popitem(last=False)
+        return embedding
+
     def search(
         self,
         query: str,
@@ -161,61 +477,133 @@ class KnowledgeBaseService:
             logger.warning("Knowledge base search is disabled")
             return []
 
+        # Identical normalized queries in flight at the same time share one embedding + query
+        # (within this process; across calls only when KB_IPC=1 runs lookups in one process)
+        key = (" ".join(query.lower().split()), top_k, tuple(sorted(filter_tags or [])))
+        return self.search_flight.do(key, self._search, query, top_k, filter_tags)
+
+    def _search(
+        self,
+        query: str,
+        top_k: int,
+        filter_tags: Optional[List[str]]
+    ) -> List[Dict]:
+        """Uncoalesced search; see search()"""
         try:
             # Generate embedding for query
             query_embedding = self.generate_embedding(query)
 
-            # Build filter - only filter by tags if specified
-            filter_dict = None
-            if filter_tags:
-                filter_dict = {"tags": {"$in": filter_tags}}
+            if SNAPSHOT_SEARCH and self.snapshot and not filter_tags:
+                count("snapshot_searches")
+                return self.search_snapshot(query_embedding, top_k)
 
-            # Query Pinecone
-            query_params = {
-                "vector": query_embedding,
-                "top_k": top_k,
-                "include_metadata": True
-            }
-
-            # Only add filter if it exists
-            if filter_dict:
-                query_params["filter"] = filter_dict
+            if SLIM_QUERIES:
+                matches = self._query_slim(query_embedding, top_k, filter_tags)
+            else:
+                matches = self._query_full(query_embedding, top_k, filter_tags)
 
-            results = self.index.query(**query_params)
+            for match in matches:
+                if match["question"] != "MASTER_BUSINESS_CONTEXT":
+                    self.lexical_index.add(match)
 
-            # Parse results
-            matches = []
-            for match in results.matches:
-                score = match.score
-                metadata = match.metadata
-
-                # Determine confidence level
-                if score >= CONFIDENCE_HIGH:
-                    confidence = "high"
-                elif score >= CONFIDENCE_MEDIUM:
-                    confidence = "medium"
-                else:
-                    confidence = "low"
-
-                matches.append({
-                    "id": match.id,
-                    "question": metadata.get("question", ""),
-                    "answer": metadata.get("answer", ""),
-                    "type": metadata.get("type", ""),
-                    "tags": metadata.get("tags", "").split(",") if metadata.get("tags") else [],
-                    "score": score,
-                    "confidence": confidence
-                })
-
-            logger.info(f"[SEARCH] Found {len(matches)} matches for query: {query[:50]}...")
-            if matches:
-                logger.info(f"   Top match: {matches[0]['question'][:50]}... (score: {matches[0]['score']:.3f}, confidence: {matches[0]['confidence']})")
+            logger.debug(
+                "[SEARCH] Found %d matches for query: %s", len(matches), query[:50],
+                extra={"event": "kb_query", "top_score": matches[0]["score"] if matches else None},
+            )
 
             return matches
 
+        except (CircuitOpenError, TimeoutError) as e:
+            logger.warning("[DEGRADED] %s - answering from local index", e, extra={"event": "kb_degraded"})
+            return self.degraded_search(query, top_k)
         except Exception as e:
-            logger.error(f"Error searching knowledge base: {e}")
-            return []
+            logger.error("Error searching knowledge base: %s", e, extra={"event": "kb_query_error"})
+            return self.degraded_search(query, top_k)
+
+    def _query_full(self, query_embedding: List[float], top_k: int, filter_tags: Optional[List[str]]) -> List[Dict]:
+        """Query with metadata: every hit carries its full question/answer text"""
+        # Build filter - only filter by tags if specified
+        filter_dict = None
+        if filter_tags:
+            filter_dict = {"tags": {"$in": filter_tags}}
+
+        # Query Pinecone
+        query_params = {
+            "vector": query_embedding,
+            "top_k": top_k,
+            "include_metadata": True,
+            "include_values": RERANK_ENABLED,  # vectors for diversity reranking
+        }
+
+        # Only add filter if it exists
+        if filter_dict:
+            query_params["filter"] = filter_dict
+
+        count("pinecone_queries")
+        results = self.index_dependency.call(self.index.query, **query_params)
+
+        matches = []
+        for match in results.matches:
+            self.candidate_vectors.put(match.id, getattr(match, "values", None))
+            matches.append({
+                **_entry_from_metadata(match.id, match.metadata),
+                "score": match.score,
+                "confidence": confidence_for(match.score),
+            })
+        return matches
+
+    def _query_slim(self, query_embedding: List[float], top_k: int, filter_tags: Optional[List[str]]) -> List[Dict]:
+        """
+        Query for IDs and scores only, with the master context record excluded
+        server-side, then attach text from the answer store.
+        """
+        filter_dict = {"question": {"$ne": MASTER_CONTEXT_QUESTION}}
+        if filter_tags:
+            filter_dict = {"$and": [filter_dict, {"tags": {"$in": filter_tags}}]}
+
+        count("pinecone_queries")
+        results = self.index_dependency.call(
+            self.index.query,
+            vector=query_embedding,
+            top_k=top_k,
+            filter=filter_dict,
+            include_metadata=False,
+        )
+
+        ids = [match.id for match in results.matches]
+        missing = self.answer_store.missing(ids)
+        if missing:
+            # Only IDs added since the store was warmed cost a second round trip
+            self._fetch_answers(missing)
+        stale = self.answer_store.stale(ids)
+        if stale:
+            self._refresh_stale_answers(stale)
+
+        matches = []
+        for match in results.matches:
+            entry = self.answer_store.get(match.id)
+            if entry is None:
+                continue  # deleted since the index was queried
+            matches.append({**entry, "score": match.score, "confidence": confidence_for(match.score)})
+        return matches
+
+    def degraded_search(self, query: str, top_k: int = 3) -> List[Dict]:
+        """
+        Answer from local data only (master context sections and previously
+        seen entries) while Pinecone or the embedding API is unavailable.
+        Uses snapshot vectors when the query embedding is already cached,
+        keyword overlap otherwise.
+        """
+        cache_key = " ".join(query.lower().split())
+        embedding = self.embedding_cache.get(cache_key)
+        if embedding is None and self.shared_embeddings:
+            embedding = self.shared_embeddings.get(cache_key)
+        if embedding is not None and self.snapshot:
+            return self.search_snapshot(embedding, top_k)
+
+        matches = self.lexical_index.search(query, top_k=top_k)
+        logger.debug("[DEGRADED] %d local matches for query: %s", len(matches), query[:50], extra={"event": "kb_degraded"})
+        return matches
 
     def get_best_match(self, query: str) -> Optional[Tuple[Dict, str]]:
         """
@@ -307,7 +695,7 @@ class KnowledgeBaseService:
             if user_questions:
                 # Combine previous question with current for better context
                 context_query = f"{user_questions[-1]} {query}"
-                logger.info(f"[CONTEXT] Enriched query: {context_query[:80]}...")
+                logger.debug("[CONTEXT] Enriched query: %s", context_query[:80])
                 return context_query
 
         return query
@@ -363,7 +751,7 @@ class KnowledgeBaseService:
                 if service in query_lower:
                     queries.append(f"{service} pricing")
 
-        logger.info(f"[MULTI-QUERY] Expanded to {len(queries)} queries: {queries}")
+        logger.debug("[MULTI-QUERY] Expanded to %d queries: %s", len(queries), queries)
         return queries
 
     def search_with_context(
@@ -397,17 +785,10 @@ class KnowledgeBaseService:
             return (None, [])
 
         try:
-            logger.info(f"[SEARCH] Starting search for: '{query[:60]}...'")
-
             # STEP 1: Fetch master business context
             master_context = self.get_master_business_context()
-            if master_context:
-                logger.info("[MASTER CONTEXT] ✓ Business context available")
-            else:
-                logger.warning("[MASTER CONTEXT] ✗ Business context not available")
 
             # STEP 2: Semantic vector search
-            logger.info("[SEMANTIC SEARCH] Performing vector search...")
 
             # Enrich query with conversation context
             enriched_query = self.extract_context_from_history(
@@ -417,6 +798,7 @@ class KnowledgeBaseService:
 
             # Expand query into sub-queries
             queries = self.expand_query_to_sub_queries(enriched_query)
+            count("kb_subqueries", len(queries))
 
             # Search with each query
             all_matches = {}  # Use dict to deduplicate by ID
@@ -429,22 +811,32 @@ class KnowledgeBaseService:
                     if result_id not in all_matches or result['score'] > all_matches[result_id]['score']:
                         all_matches[result_id] = result
 
-            # Sort by score and filter out the master context record itself
-            sorted_matches = sorted(
-                [m for m in all_matches.values() if m.get('question') != 'MASTER_BUSINESS_CONTEXT'],
-                key=lambda x: x['score'],
-                reverse=True
-            )[:top_k]
-
-            logger.info(f"[SEARCH] ✓ Complete - Master context: {bool(master_context)}, Semantic matches: {len(sorted_matches)}")
-            if sorted_matches:
-                top = sorted_matches[0]
-                logger.info(f"[SEARCH] Top semantic match: {top['question'][:50]}... (score: {top['score']:.3f}, confidence: {top['confidence']})")
+            candidates = [m for m in all_matches.values() if m.get('question') != 'MASTER_BUSINESS_CONTEXT']
+            if RERANK_ENABLED and len(candidates) > 1:
+                # Drop paraphrases of the same answer in favour of diverse snippets
+                sorted_matches = mmr_rerank(
+                    candidates,
+                    [self.candidate_vectors.get(m['id']) for m in candidates],
+                    top_k=top_k,
+                )
+            else:
+                # Sort by score and filter out the master context record itself
+                sorted_matches = sorted(candidates, key=lambda x: x['score'], reverse=True)[:top_k]
+
+            logger.info(
+                "[SEARCH] Complete - master context: %s, semantic matches: %d of %d candidates, sub-queries: %d",
+                bool(master_context), len(sorted_matches), len(candidates), len(queries),
+                extra={
+                    "event": "kb_search",
+                    "query": query[:60],
+                    "top_score": sorted_matches[0]["score"] if sorted_matches else None,
+                },
+            )
 
             return (master_context, sorted_matches)
 
         except Exception as e:
-            logger.error(f"[ERROR] Search failed: {e}")
+            logger.error("[ERROR] Search failed: %s", e, extra={"event": "kb_search_error"})
             # Fallback to basic search
             return (None, self.search(query, top_k=top_k))
 
@@ -454,8 +846,20 @@ _kb_service = None
 
 
 def get_knowledge_base_service() -> KnowledgeBaseService:
-    """Get or create the global KnowledgeBaseService instance"""
+    """
+    Get or create the global KnowledgeBaseService instance.
+
+    Inside a job process, lookups go to the worker's shared lookup service
+    (see shared_kb_cache.start_lookup_server) when it is running.
+    """
     global _kb_service
     if _kb_service is None:
+        if os.path.exists(LOOKUP_SOCKET):
+            try:
+                _kb_service = RemoteKnowledgeBaseService(LOOKUP_SOCKET)
+                logger.info("[SUCCESS] Using shared knowledge base lookup service")
+                return _kb_service
+            except Exception as e:
+                logger.warning(f"[WARNING] Shared lookup service unavailable, using local client: {e}")
         _kb_service = KnowledgeBaseService()
     return _kb_service
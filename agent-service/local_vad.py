@@ -0,0 +1,214 @@
+"""
+Lightweight local voice-activity and end-of-turn detection
+
+Silero VAD was removed because it costs ~300 MB per process, which leaves
+turn-taking to server-side detection and its extra latency. This detector
+uses only NumPy on 20 ms frames:
+
+1. Frame energy (dB) against an adaptive noise floor
+2. Spectral flux (how fast the spectrum changes) to reject stationary noise
+3. A speech onset minimum and a configurable hangover before end-of-turn
+
+EnergyTurnDetector is framework-free (see bench_vad.py); VAD/VADStream adapt
+it to the LiveKit agents VAD interface so it plugs into AgentSession.
+
+Enable with LOCAL_VAD=1.
+"""
+
+import os
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+
+@dataclass
+class VADOptions:
+    frame_ms: int = 20
+    threshold_db: float = 9.0  # energy above noise floor to count as voiced
+    flux_threshold: float = 0.12  # minimum normalized spectral flux at speech onset
+    min_speech_ms: int = 60  # voiced run needed to declare start of speech
+    hangover_ms: int = 450  # silence needed to declare end of turn
+    noise_adapt: float = 0.05  # noise floor tracking rate during non-speech
+
+    @classmethod
+    def from_env(cls) -> "VADOptions":
+        return cls(
+            threshold_db=float(os.getenv("LOCAL_VAD_THRESHOLD_DB", "9.0")),
+            min_speech_ms=int(os.getenv("LOCAL_VAD_MIN_SPEECH_MS", "60")),
+            hangover_ms=int(os.getenv("LOCAL_VAD_HANGOVER_MS", "450")),
+        )
+
+
+@dataclass
+class FrameDecision:
+    voiced: bool
+    probability: float
+    event: Optional[str] = None  # "start", "end" or None
+
+
+class EnergyTurnDetector:
+    """Energy + spectral-flux voice activity detector with hangover, for one mono stream"""
+
+    def __init__(self, sample_rate: int, opts: Optional[VADOptions] = None):
+        self.opts = opts or VADOptions()
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * self.opts.frame_ms / 1000)
+        self._window = np.hanning(self.frame_size).astype(np.float32)
+        self._prev_spectrum: Optional[np.ndarray] = None
+        self.noise_floor_db: Optional[float] = None
+        self.speaking = False
+        self.speech_run_ms = 0
+        self.silence_ms = 0
+
+    def process(self, frame: np.ndarray) -> FrameDecision:
+        """
+        Classify one frame of frame_size samples (int16 or float in [-1, 1]).
+        """
+        samples = frame.astype(np.float32)
+        if frame.dtype == np.int16:
+            samples /= 32768.0
+
+        energy_db = 10.0 * np.log10(np.mean(samples * samples) + 1e-10)
+
+        spectrum = np.abs(np.fft.rfft(samples * self._window))
+        spectrum /= spectrum.sum() + 1e-10
+        if self._prev_spectrum is None:
+            flux = 0.0
+        else:
+            flux = float(np.maximum(spectrum - self._prev_spectrum, 0.0).sum())
+        self._prev_spectrum = spectrum
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = energy_db
+        snr_db = energy_db - self.noise_floor_db
+
+        # Flux gates onsets only; once speaking, energy alone keeps the turn open
+        voiced = snr_db > self.opts.threshold_db and (self.speaking or self.speech_run_ms > 0 or flux > self.opts.flux_threshold)
+        probability = float(1.0 / (1.0 + np.exp(-(snr_db - self.opts.threshold_db) / 2.0)))
+
+        if not voiced:
+            # Track the noise floor: drop immediately, rise slowly
+            if energy_db < self.noise_floor_db:
+                self.noise_floor_db = energy_db
+            else:
+                self.noise_floor_db += self.opts.noise_adapt * (energy_db - self.noise_floor_db)
+
+        event = None
+        frame_ms = self.opts.frame_ms
+        if not self.speaking:
+            self.speech_run_ms = self.speech_run_ms + frame_ms if voiced else 0
+            if self.speech_run_ms >= self.opts.min_speech_ms:
+                self.speaking = True
+                self.silence_ms = 0
+                event = "start"
+        else:
+            self.silence_ms = 0 if voiced else self.silence_ms + frame_ms
+            if self.silence_ms >= self.opts.hangover_ms:
+                self.speaking = False
+                self.speech_run_ms = 0
+                event = "end"
+
+        return FrameDecision(voiced=voiced, probability=probability, event=event)
+
+
+try:
+    from livekit import rtc
+    from livekit.agents import vad as agents_vad
+except ImportError:  # detector and benchmark work without the LiveKit SDK
+    agents_vad = None
+
+
+if agents_vad is not None:
+
+    class VAD(agents_vad.VAD):
+        """LiveKit VAD backed by EnergyTurnDetector (a few hundred KB per stream)"""
+
+        def __init__(self, opts: Optional[VADOptions] = None):
+            self._opts = opts or VADOptions.from_env()
+            super().__init__(capabilities=agents_vad.VADCapabilities(update_interval=self._opts.frame_ms / 1000))
+
+        @classmethod
+        def load(cls, opts: Optional[VADOptions] = None) -> "VAD":
+            return cls(opts)
+
+        def stream(self) -> "VADStream":
+            return VADStream(self, self._opts)
+
+    class VADStream(agents_vad.VADStream):
+        MAX_BUFFERED_SPEECH_S = 30
+
+        def __init__(self, vad: VAD, opts: VADOptions):
+            super().__init__(vad)
+            self._opts = opts
+
+        async def _main_task(self):
+            detector: Optional[EnergyTurnDetector] = None
+            pending = np.zeros(0, dtype=np.int16)
+            speech_frames: List[rtc.AudioFrame] = []
+            samples_index = 0
+            speech_start_index = 0
+            speech_end_index = 0
+
+            async for input_frame in self._input_ch:
+                if not isinstance(input_frame, rtc.AudioFrame):
+                    continue  # flush sentinel
+
+                if detector is None:
+                    detector = EnergyTurnDetector(input_frame.sample_rate, self._opts)
+                sample_rate = detector.sample_rate
+
+                data = np.frombuffer(input_frame.data, dtype=np.int16)
+                if input_frame.num_channels > 1:
+                    data = data.reshape(-1, input_frame.num_channels)[:, 0]
+                pending = np.concatenate((pending, data))
+
+                if detector.speaking or detector.speech_run_ms > 0:
+                    speech_frames.append(input_frame)
+                    if len(speech_frames) * input_frame.duration > self.MAX_BUFFERED_SPEECH_S:
+                        speech_frames.pop(0)
+
+                while len(pending) >= detector.frame_size:
+                    window, pending = pending[:detector.frame_size], pending[detector.frame_size:]
+                    started = time.perf_counter()
+                    decision = detector.process(window)
+                    inference_duration = time.perf_counter() - started
+                    samples_index += detector.frame_size
+
+                    if decision.event == "start":
+                        speech_start_index = samples_index - detector.speech_run_ms * sample_rate // 1000
+                        speech_frames = speech_frames[-1:] if speech_frames else [input_frame]
+                    elif decision.event == "end":
+                        speech_end_index = samples_index - detector.silence_ms * sample_rate // 1000
+
+                    speech_duration = (
+                        (samples_index - speech_start_index) / sample_rate if detector.speaking
+                        else (speech_end_index - speech_start_index) / sample_rate
+                    )
+                    common = dict(
+                        samples_index=samples_index,
+                        timestamp=samples_index / sample_rate,
+                        speech_duration=max(speech_duration, 0.0),
+                        silence_duration=detector.silence_ms / 1000,
+                        probability=decision.probability,
+                        inference_duration=inference_duration,
+                        speaking=detector.speaking,
+                    )
+
+                    self._event_ch.send_nowait(agents_vad.VADEvent(
+                        type=agents_vad.VADEventType.INFERENCE_DONE, frames=[input_frame], **common
+                    ))
+                    if decision.event == "start":
+                        self._event_ch.send_nowait(agents_vad.VADEvent(
+                            type=agents_vad.VADEventType.START_OF_SPEECH, frames=list(speech_frames), **common
+                        ))
+                    elif decision.event == "end":
+                        self._event_ch.send_nowait(agents_vad.VADEvent(
+                            type=agents_vad.VADEventType.END_OF_SPEECH, frames=speech_frames, **common
+                        ))
+                        speech_frames = []
+
+                # Yield between bursts so a long buffer never starves the event loop
+                await asyncio.sleep(0)
@@ -0,0 +1,290 @@
+"""
+Stable prompt prefix and provider-side prefix caching
+
+The prompt sent to the LLM is split in two:
+
+    prefix  persona + compacted master business context. Identical bytes for
+            every turn of every call until the persona or the business data
+            changes, identified by a content-hash version.
+    suffix  the few lines of KB matches for the current turn, appended after
+            the conversation so the prefix (and history) stay cacheable.
+
+The prefix is registered with a PrefixCache backend:
+
+    PROMPT_CACHE=local   in-process stand-in (default; tests, dev, providers
+                         that cache identical prefixes implicitly)
+    PROMPT_CACHE=gemini  Gemini CachedContent via google-genai, reused across
+                         job processes by display name until it expires
+    PROMPT_CACHE=off     no registration
+
+    prefix = build_prefix(BASE_SYSTEM_PROMPT, kb_service.get_master_business_context(),
+                          tool_schemas(agent_tools))
+    handle = await get_prefix_cache().register(prefix)
+
+A provider cache holds the tool declarations too: Gemini rejects requests
+that combine cached_content with tools, so the LiveKit plugin drops them
+from every request once the LLM is bound to a cache.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHE_BACKEND = os.getenv("PROMPT_CACHE", "local")
+PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", "3600"))  # seconds
+# Explicit caching needs a pinned model version (not an -exp alias)
+PROMPT_CACHE_MODEL = os.getenv("PROMPT_CACHE_MODEL", "models/gemini-2.0-flash-001")
+
+MAX_MASTER_CONTEXT_CHARS = 6000
+MAX_SUFFIX_ANSWER_CHARS = 400
+REFRESH_BEFORE_EXPIRY = 300  # seconds
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    text: str
+    version: str  # content hash; changes only when the persona, business data or tools change
+    tools: Tuple[Dict, ...] = ()  # Gemini function declarations (JSON schema dicts)
+
+    @property
+    def approx_tokens(self) -> int:
+        return len(self.text) // 4
+
+
+@dataclass
+class PrefixHandle:
+    """Where a registered prefix lives; `cached_content` is set for provider caches"""
+    version: str
+    backend: str
+    cached_content: Optional[str] = None
+    expires_at: Optional[float] = None
+    includes_tools: bool = False  # the provider cache holds the tool declarations
+
+
+def _compact_value(value) -> str:
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {_compact_value(v)}" for k, v in sorted(value.items()) if v not in (None, "", [], {}))
+    if isinstance(value, list):
+        return ", ".join(_compact_value(v) for v in value if v not in (None, "", [], {}))
+    return " ".join(str(value).split())
+
+
+def compact_master_context(business_data: Optional[Dict]) -> str:
+    """One line per top-level section, keys sorted so the output is byte-stable"""
+    if not business_data:
+        return ""
+    lines = []
+    for section, value in sorted(business_data.items()):
+        text = _compact_value(value)
+        if text:
+            lines.append(f"- {section.replace('_', ' ')}: {text}")
+    compacted = "\n".join(lines)
+    if len(compacted) > MAX_MASTER_CONTEXT_CHARS:
+        compacted = compacted[:MAX_MASTER_CONTEXT_CHARS].rsplit("\n", 1)[0]
+    return compacted
+
+
+def tool_schemas(tools: Sequence) -> Tuple[Dict, ...]:
+    """Gemini function declarations for the agent's tools, as the plugin would send them"""
+    if not tools:
+        return ()
+    from livekit.agents import llm
+
+    return tuple(llm.ToolContext(list(tools)).parse_function_tools("google"))
+
+
+def build_prefix(persona: str, business_data: Optional[Dict] = None,
+                 tools: Sequence[Dict] = ()) -> PromptPrefix:
+    """Persona plus the compacted master context (and tool schemas), versioned by content hash"""
+    text = persona.strip()
+    business = compact_master_context(business_data)
+    if business:
+        text += "\n\n## Business Information\n" + business
+    digest = hashlib.sha256(text.encode("utf-8"))
+    if tools:
+        digest.update(json.dumps(list(tools), sort_keys=True).encode("utf-8"))
+    return PromptPrefix(text=text, version=digest.hexdigest()[:12], tools=tuple(tools))
+
+
+def build_turn_suffix(kb_results: Optional[List[Dict]]) -> str:
+    """Per-turn KB guidance, kept short; appended after the conversation"""
+    if not kb_results:
+        return "[KB] No knowledge base match for this question. Escalate to the supervisor."
+
+    top = kb_results[0]
+    guidance = {
+        "high": "Answer with this directly. Do NOT escalate.",
+        "medium": "Use as guidance; ask to clarify or escalate if the question differs.",
+        "low": "Weak match; escalate to the supervisor.",
+    }[top.get("confidence", "low")]
+    lines = [
+        f"[KB {top.get('confidence', 'low')} {top.get('score', 0.0):.2f}] {guidance}",
+        f"Q: {top['question']}",
+        f"A: {top['answer'][:MAX_SUFFIX_ANSWER_CHARS]}",
+    ]
+    for result in kb_results[1:3]:
+        lines.append(f"Related: {result['question']}: {result['answer'][:80]}")
+    return "\n".join(lines)
+
+
+class LocalPrefixCache:
+    """In-process stand-in: records registrations and hit/miss counts, no network"""
+
+    backend = "local"
+
+    def __init__(self):
+        self.handles: Dict[str, PrefixHandle] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def register(self, prefix: PromptPrefix) -> PrefixHandle:
+        handle = self.handles.get(prefix.version)
+        if handle is not None:
+            self.hits += 1
+            return handle
+        self.misses += 1
+        handle = PrefixHandle(version=prefix.version, backend=self.backend)
+        self.handles[prefix.version] = handle
+        return handle
+
+
+class GeminiPrefixCache(LocalPrefixCache):
+    """
+    Gemini context caching: the prefix is stored once as a CachedContent
+    (display name carries the version) and reused by every job process until
+    shortly before it expires. Falls back to local behaviour on any error,
+    e.g. a prefix below the provider's minimum cacheable size.
+    """
+
+    backend = "gemini"
+
+    def __init__(self, model: str = PROMPT_CACHE_MODEL, ttl: int = PROMPT_CACHE_TTL):
+        super().__init__()
+        self.model = model
+        self.ttl = ttl
+        self._client = None
+        self._lock = asyncio.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        return self._client
+
+    def _display_name(self, prefix: PromptPrefix) -> str:
+        return f"salon-prefix-{prefix.version}"
+
+    def _find_or_create(self, prefix: PromptPrefix) -> PrefixHandle:
+        from google.genai import types
+
+        client = self._get_client()
+        display_name = self._display_name(prefix)
+        now = time.time()
+        for cache in client.caches.list():
+            expires_at = cache.expire_time.timestamp() if cache.expire_time else 0
+            if cache.display_name == display_name and expires_at - now > REFRESH_BEFORE_EXPIRY:
+                return PrefixHandle(prefix.version, self.backend, cache.name, expires_at, bool(prefix.tools))
+
+        tool_options = {}
+        if prefix.tools:
+            # Requests bound to the cache carry no tools; the cache must declare them
+            tool_options = {
+                "tools": [types.Tool(function_declarations=[
+                    types.FunctionDeclaration.model_validate(schema) for schema in prefix.tools
+                ])],
+                "tool_config": types.ToolConfig(
+                    function_calling_config=types.FunctionCallingConfig(
+                        mode=types.FunctionCallingConfigMode.AUTO
+                    )
+                ),
+            }
+        cache = client.caches.create(
+            model=self.model,
+            config=types.CreateCachedContentConfig(
+                display_name=display_name,
+                system_instruction=prefix.text,
+                ttl=f"{self.ttl}s",
+                **tool_options,
+            ),
+        )
+        logger.info(
+            "Created Gemini context cache %s for prompt prefix %s (~%d tokens)",
+            cache.name, prefix.version, prefix.approx_tokens,
+            extra={"event": "prompt_cache_created"},
+        )
+        return PrefixHandle(prefix.version, self.backend, cache.name, now + self.ttl, bool(prefix.tools))
+
+    async def register(self, prefix: PromptPrefix) -> PrefixHandle:
+        async with self._lock:
+            handle = self.handles.get(prefix.version)
+            if handle is not None and (handle.expires_at or 0) - time.time() > REFRESH_BEFORE_EXPIRY:
+                self.hits += 1
+                return handle
+            self.misses += 1
+            try:
+                handle = await asyncio.to_thread(self._find_or_create, prefix)
+            except Exception as e:
+                logger.warning(
+                    "Gemini context cache unavailable, sending the prefix uncached: %s", e,
+                    extra={"event": "prompt_cache_error"},
+                )
+                # Do not retry on every call; try again after one TTL
+                handle = PrefixHandle(version=prefix.version, backend="local", expires_at=time.time() + self.ttl)
+            self.handles[prefix.version] = handle
+            return handle
+
+
+class DisabledPrefixCache(LocalPrefixCache):
+    backend = "off"
+
+
+_prefix_cache: Optional[LocalPrefixCache] = None
+
+
+def get_prefix_cache() -> LocalPrefixCache:
+    """Process-wide backend selected by PROMPT_CACHE"""
+    global _prefix_cache
+    if _prefix_cache is None:
+        backends = {"local": LocalPrefixCache, "gemini": GeminiPrefixCache, "off": DisabledPrefixCache}
+        _prefix_cache = backends.get(PROMPT_CACHE_BACKEND, LocalPrefixCache)()
+    return _prefix_cache
+
+
+def llm_cache_options(llm_class, handle: Optional[PrefixHandle], has_tools: bool = False) -> Dict:
+    """
+    Constructor kwargs that bind the LLM to a provider cache, if both exist.
+    Plugin versions without a cached_content option get none, and the
+    byte-stable prefix is sent as plain instructions instead. An agent with
+    tools is only bound to a cache that declares them, since the plugin
+    strips tools from cache-bound requests.
+    """
+    if handle is None or not handle.cached_content:
+        return {}
+    if has_tools and not handle.includes_tools:
+        logger.warning(
+            "Provider cache %s has no tool declarations; not binding the LLM to it", handle.cached_content,
+            extra={"event": "prompt_cache_unbound"},
+        )
+        return {}
+    import inspect
+
+    try:
+        accepted = inspect.signature(llm_class).parameters
+    except (TypeError, ValueError):
+        return {}
+    if "cached_content" not in accepted:
+        logger.info(
+            "LLM plugin has no cached_content option; relying on the stable prefix",
+            extra={"event": "prompt_cache_unbound"},
+        )
+        return {}
+    return {"cached_content": handle.cached_content}
+
@@ -0,0 +1,263 @@
+"""
+Deep readiness probe for the worker
+
+A background thread in the worker's main process measures the latency of
+each dependency a call needs (embedding API, Pinecone query, dashboard
+help-requests API) at a fixed, rate-limited interval and caches the results.
+GET /ready only reads that cache, so probes never multiply with traffic.
+
+    200 {"status": "ready", ...}     every dependency answered within budget
+    503 {"status": "degraded", ...}  a probe failed or its p50 is over budget
+
+The readiness result also feeds worker_load, but only as a partial weight
+below the load threshold: dependency slowness hits every worker at once, and
+the degraded KB mode can still serve calls, so it only makes a worker less
+preferred. The dashboard API probe is reported on /ready but not counted.
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+
+from resilience import LatencyTracker
+from agent_http import register_route
+from worker_load import LOAD_THRESHOLD, register_load_component
+
+logger = logging.getLogger(__name__)
+
+PROBE_INTERVAL = float(os.getenv("READINESS_PROBE_INTERVAL", "30"))  # seconds between probe rounds
+PROBE_TIMEOUT = float(os.getenv("READINESS_PROBE_TIMEOUT", "3"))
+PROBE_WINDOW = 20  # p50 over the last N probes
+
+# p50 latency budgets (ms) per dependency
+LATENCY_BUDGETS_MS = {
+    "embedding": float(os.getenv("READINESS_EMBEDDING_BUDGET_MS", "800")),
+    "pinecone_query": float(os.getenv("READINESS_QUERY_BUDGET_MS", "500")),
+    "help_requests_api": float(os.getenv("READINESS_API_BUDGET_MS", "1000")),
+}
+
+# Load contributed by a slow or failing KB dependency; kept below the threshold
+# so a fleet-wide dependency problem never makes every worker refuse calls
+DEPENDENCY_LOAD = min(float(os.getenv("READINESS_DEPENDENCY_LOAD", "0.5")), LOAD_THRESHOLD - 0.05)
+LOAD_PROBES = ("embedding", "pinecone_query")
+
+PROBE_TEXT = "What are your opening hours?"
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+PINECONE_API_URL = "https://api.pinecone.io"
+PINECONE_API_VERSION = "2024-07"
+
+
+class DependencyProbe:
+    """One dependency's probe function plus its cached results"""
+
+    def __init__(self, name: str, fn: Callable[[], None], budget_ms: float):
+        self.name = name
+        self.fn = fn
+        self.budget_ms = budget_ms
+        self.latency = LatencyTracker(window=PROBE_WINDOW)
+        self.last_ok: Optional[bool] = None
+        self.last_error: Optional[str] = None
+        self.last_latency_ms: Optional[float] = None
+        self.checked_at: Optional[float] = None
+
+    def run(self, executor: ThreadPoolExecutor):
+        started = time.perf_counter()
+        try:
+            executor.submit(self.fn).result(timeout=PROBE_TIMEOUT)
+        except FutureTimeoutError:
+            self.last_ok, self.last_error = False, f"timed out after {PROBE_TIMEOUT}s"
+        except Exception as e:
+            self.last_ok, self.last_error = False, str(e)
+        else:
+            self.last_ok, self.last_error = True, None
+        elapsed = time.perf_counter() - started
+        self.last_latency_ms = elapsed * 1000
+        if self.last_ok:
+            self.latency.record(elapsed)
+        self.checked_at = time.time()
+
+    @property
+    def p50_ms(self) -> Optional[float]:
+        p50 = self.latency.percentile(50)
+        return p50 * 1000 if p50 is not None else None
+
+    @property
+    def status(self) -> str:
+        if self.last_ok is None:
+            return "unknown"
+        if not self.last_ok:
+            return "failing"
+        if self.p50_ms is not None and self.p50_ms > self.budget_ms:
+            return "slow"
+        return "ok"
+
+    def report(self) -> Dict:
+        return {
+            "status": self.status,
+            "p50_ms": round(self.p50_ms, 1) if self.p50_ms is not None else None,
+            "last_ms": round(self.last_latency_ms, 1) if self.last_latency_ms is not None else None,
+            "budget_ms": self.budget_ms,
+            "samples": len(self.latency),
+            "checked_at": self.checked_at,
+            "error": self.last_error,
+        }
+
+
+class ReadinessMonitor:
+    """
+    Runs every probe once per interval on a daemon thread. The probes are
+    built on that thread, so starting the monitor adds nothing to worker
+    cold start.
+    """
+
+    def __init__(self, build: Callable[[], Dict[str, DependencyProbe]], interval: float = PROBE_INTERVAL):
+        self._build = build
+        self.probes: Dict[str, DependencyProbe] = {}
+        self.interval = interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="readiness", daemon=True).start()
+
+    def _run(self):
+        try:
+            probes = self._build()
+        except Exception as e:
+            logger.error("Readiness probes unavailable: %s", e, extra={"event": "readiness_probe"})
+            return
+        # Probes that hang past their timeout keep a thread; give them room
+        self._executor = ThreadPoolExecutor(max_workers=len(probes) + 1, thread_name_prefix="readiness")
+        self.probes = probes
+        logger.info("Readiness probes running every %.0fs: %s", self.interval, ", ".join(probes))
+
+        while not self._stop.is_set():
+            for probe in self.probes.values():
+                probe.run(self._executor)
+                if probe.status != "ok":
+                    logger.warning(
+                        "Readiness probe %s: %s (%s)", probe.name, probe.status, probe.last_error or f"{probe.p50_ms:.0f} ms p50",
+                        extra={"event": "readiness_probe"},
+                    )
+            # Jitter so a fleet of workers does not probe in lockstep
+            self._stop.wait(self.interval * random.uniform(0.9, 1.1))
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.probes) and all(probe.status == "ok" for probe in self.probes.values())
+
+    def report(self) -> Dict:
+        if not self.probes:
+            return {"status": "starting", "dependencies": {}}
+        return {
+            "status": "ready" if self.ready else "degraded",
+            "dependencies": {name: probe.report() for name, probe in self.probes.items()},
+        }
+
+
+def _request_json(url: str, body: Optional[Dict] = None, headers: Optional[Dict] = None) -> Dict:
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json", **(headers or {})})
+    with urllib.request.urlopen(request, timeout=PROBE_TIMEOUT) as response:
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+        return json.loads(response.read() or b"{}")
+
+
+def build_probes(api_url: Optional[str] = None) -> Dict[str, DependencyProbe]:
+    """
+    Probe functions for the embedding API, Pinecone and the dashboard API.
+    Each is a plain HTTPS call against the same endpoint the KB client uses,
+    so the main process never imports the Pinecone/genai SDKs or holds a
+    KB client just to probe.
+    """
+    api_url = api_url or os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000")
+    probes = {}
+    last_embedding = {}
+
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if gemini_api_key:
+        def probe_embedding():
+            # Direct call: the KB service's caches would hide the real latency
+            result = _request_json(
+                f"{GEMINI_API_URL}/models/text-embedding-004:embedContent",
+                {"content": {"parts": [{"text": PROBE_TEXT}]}, "taskType": "RETRIEVAL_QUERY"},
+                headers={"x-goog-api-key": gemini_api_key},
+            )
+            last_embedding["vector"] = result["embedding"]["values"]
+
+        probes["embedding"] = DependencyProbe("embedding", probe_embedding, LATENCY_BUDGETS_MS["embedding"])
+
+    pinecone_api_key = os.getenv("PINECONE_API_KEY")
+    if pinecone_api_key:
+        pinecone_headers = {"Api-Key": pinecone_api_key, "X-Pinecone-API-Version": PINECONE_API_VERSION}
+        index_name = os.getenv("PINECONE_INDEX_NAME", "luxe-salon-knowledge")
+        index_host = {}
+
+        def probe_query():
+            # The data-plane host is looked up once from the control plane
+            if "host" not in index_host:
+                index_host["host"] = _request_json(f"{PINECONE_API_URL}/indexes/{index_name}", headers=pinecone_headers)["host"]
+            vector = last_embedding.get("vector") or [1.0 / 768 ** 0.5] * 768
+            _request_json(
+                f"https://{index_host['host']}/query",
+                {"vector": vector, "topK": 1, "includeMetadata": False},
+                headers=pinecone_headers,
+            )
+
+        probes["pinecone_query"] = DependencyProbe("pinecone_query", probe_query, LATENCY_BUDGETS_MS["pinecone_query"])
+
+    def probe_api():
+        request = urllib.request.Request(f"{api_url}/api/help-requests/pending?limit=1", headers={"Cache-Control": "no-cache"})
+        with urllib.request.urlopen(request, timeout=PROBE_TIMEOUT) as response:
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}")
+            response.read()
+
+    probes["help_requests_api"] = DependencyProbe("help_requests_api", probe_api, LATENCY_BUDGETS_MS["help_requests_api"])
+    return probes
+
+
+_monitor: Optional[ReadinessMonitor] = None
+
+
+def ready_handler():
+    if _monitor is None:
+        return 503, "application/json", json.dumps({"status": "starting"})
+    report = _monitor.report()
+    return (200 if _monitor.ready else 503), "application/json", json.dumps(report)
+
+
+def _dependency_load() -> float:
+    # Slow or failing KB dependencies add a partial weight; unknown (not yet probed) does not
+    if _monitor is None:
+        return 0.0
+    unhealthy = any(
+        probe.status in ("slow", "failing")
+        for name, probe in _monitor.probes.items()
+        if name in LOAD_PROBES
+    )
+    return DEPENDENCY_LOAD if unhealthy else 0.0
+
+
+def start_readiness_probes() -> ReadinessMonitor:
+    """Start probing from the worker's main process (probes are built on the probe thread)"""
+    global _monitor
+    if _monitor is None:
+        _monitor = ReadinessMonitor(build_probes)
+        _monitor.start()
+    return _monitor
+
+
+register_route("/ready", ready_handler)
+register_load_component("dependencies", _dependency_load)
@@ -0,0 +1,135 @@
+"""
+Diversity-aware reranking of merged KB candidates
+
+search_with_context merges the hits of every sub-query, which often leaves
+several paraphrases of the same learned answer in the top results. This
+stage reranks the merged candidates with Maximal Marginal Relevance over
+their embedding vectors (one NumPy similarity matrix for the whole candidate
+set) and applies per-type quotas per cluster of near-duplicates, e.g. at
+most one `learned_answer` per cluster. The LLM gets fewer, more diverse
+snippets and a shorter prompt.
+
+Candidates without a known vector are kept, but only count as duplicates of
+entries with the same normalized question.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+RERANK_ENABLED = os.getenv("KB_RERANK", "1") == "1"
+# 1.0 = rank by relevance only, 0.0 = diversity only
+MMR_LAMBDA = float(os.getenv("KB_RERANK_LAMBDA", "0.7"))
+# Candidates at least this similar to each other are treated as one cluster
+CLUSTER_SIMILARITY = float(os.getenv("KB_RERANK_CLUSTER_SIM", "0.9"))
+# Max entries of a type per cluster; types not listed are only limited by MMR
+TYPE_QUOTAS = {"learned_answer": 1}
+
+VECTOR_CACHE_SIZE = 2048
+
+
+class CandidateVectors:
+    """
+    Unit-normalized embedding vectors by entry ID, filled from what the search
+    path already receives (query values, fetch results); `fallback` looks up
+    IDs not seen yet (e.g. in the local snapshot).
+    """
+
+    def __init__(self, fallback: Optional[Callable[[str], Optional[np.ndarray]]] = None,
+                 max_size: int = VECTOR_CACHE_SIZE):
+        self.fallback = fallback
+        self.max_size = max_size
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def put(self, entry_id: str, values) -> None:
+        if values is None or len(values) == 0:
+            return
+        vector = np.asarray(values, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return
+        self._vectors[entry_id] = vector / norm
+        self._vectors.move_to_end(entry_id)
+        while len(self._vectors) > self.max_size:
+            self._vectors.popitem(last=False)
+
+    def get(self, entry_id: str) -> Optional[np.ndarray]:
+        vector = self._vectors.get(entry_id)
+        if vector is None and self.fallback is not None:
+            values = self.fallback(entry_id)
+            if values is not None:
+                self.put(entry_id, values)
+                vector = self._vectors.get(entry_id)
+        return vector
+
+
+def _similarity_matrix(candidates: List[Dict], vectors: List[Optional[np.ndarray]]) -> np.ndarray:
+    """Pairwise cosine similarity; pairs without vectors are 1.0 for identical questions, else 0"""
+    n = len(candidates)
+    known = np.array([v is not None for v in vectors], dtype=bool)
+    sims = np.zeros((n, n), dtype=np.float32)
+    if known.any():
+        dim = next(v for v in vectors if v is not None).shape[0]
+        matrix = np.zeros((n, dim), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            if vector is not None and vector.shape[0] == dim:
+                matrix[i] = vector
+        sims = matrix @ matrix.T
+        sims[~known, :] = 0.0
+        sims[:, ~known] = 0.0
+
+    questions = [" ".join(c.get("question", "").lower().split()) for c in candidates]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if questions[i] and questions[i] == questions[j]:
+                sims[i, j] = sims[j, i] = 1.0
+    np.fill_diagonal(sims, 1.0)
+    return sims
+
+
+def mmr_rerank(
+    candidates: List[Dict],
+    vectors: List[Optional[np.ndarray]],
+    top_k: int,
+    lambda_: float = MMR_LAMBDA,
+    cluster_similarity: float = CLUSTER_SIMILARITY,
+    type_quotas: Optional[Dict[str, int]] = None,
+) -> List[Dict]:
+    """
+    Greedy MMR: repeatedly take the candidate maximizing
+    lambda * score - (1 - lambda) * max similarity to anything already taken,
+    skipping candidates whose type quota is used up in their cluster.
+    """
+    if not candidates:
+        return []
+    quotas = TYPE_QUOTAS if type_quotas is None else type_quotas
+
+    scores = np.array([float(c.get("score", 0.0)) for c in candidates], dtype=np.float32)
+    sims = _similarity_matrix(candidates, vectors)
+    types = [c.get("type", "") for c in candidates]
+
+    available = np.ones(len(candidates), dtype=bool)
+    max_sim_to_selected = np.zeros(len(candidates), dtype=np.float32)
+    selected: List[int] = []
+
+    while len(selected) < top_k and available.any():
+        mmr = lambda_ * scores - (1 - lambda_) * max_sim_to_selected
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        available[best] = False
+        selected.append(best)
+        max_sim_to_selected = np.maximum(max_sim_to_selected, sims[best])
+
+        # Quota: drop remaining same-type candidates in this cluster once it is full
+        quota = quotas.get(types[best])
+        if quota is not None:
+            in_cluster = sims[best] >= cluster_similarity
+            same_type = np.array([t == types[best] for t in types], dtype=bool)
+            taken = sum(1 for i in selected if same_type[i] and in_cluster[i])
+            if taken >= quota:
+                available &= ~(in_cluster & same_type)
+
+    # Results are presented to the LLM (and the fast path) best match first
+    return sorted((candidates[i] for i in selected), key=lambda c: c.get("score", 0.0), reverse=True)
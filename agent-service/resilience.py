@@ -0,0 +1,237 @@
+"""
+Resilience primitives for external dependencies (Pinecone, Gemini embeddings)
+
+Every call to a dependency goes through a ResilientDependency, which adds:
+1. A hard per-call timeout (the turn path never waits longer than this)
+2. A circuit breaker (closed -> open after repeated failures -> half-open probe)
+3. Hedged requests (a duplicate call is fired once the primary exceeds the p95 latency)
+
+SingleFlight coalesces concurrent identical calls so only one of them reaches
+the dependency and every caller shares its result. It works within one
+process: each call runs in its own job process, so lookups from different
+calls are only merged with KB_IPC=1, where the worker's main process runs
+every lookup.
+
+The SDK clients are synchronous, so calls run on a small shared thread pool
+and the caller waits on the futures with a deadline.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for blocking SDK calls. Sized for a 1-CPU VM: enough for the
+# primary + hedge of an embedding and a query per concurrent turn.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DEPENDENCY_POOL_SIZE", "8")),
+    thread_name_prefix="dependency",
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the dependency's breaker is open"""
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    closed:    calls pass through; consecutive failures are counted
+    open:      calls are rejected until reset_timeout has elapsed
+    half_open: a single probe call is let through; success closes, failure re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 15.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # Half-open: only one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"[BREAKER] {self.name} closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"[BREAKER] {self.name} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ResilientDependency:
+    """Timeout + circuit breaker + hedging wrapper around a blocking dependency"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        failure_threshold: int = 3,
+        reset_timeout: float = 15.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Delay after which a duplicate request is fired, or None if not enough data yet"""
+        if len(self.latency) < self.hedge_min_samples:
+            return None
+        delay = self.latency.percentile(self.hedge_percentile)
+        if delay is None or delay >= self.timeout:
+            return None
+        return delay
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) with the dependency's guarantees.
+
+        Raises:
+            CircuitOpenError: breaker is open, the call was not attempted
+            TimeoutError: no attempt completed within the timeout
+            Exception: the error raised by the last failed attempt
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        pending = {_executor.submit(fn, *args, **kwargs)}
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done:
+                logger.info(
+                    "[HEDGE] %s exceeded p%.0f (%.0fms), sending hedge request",
+                    self.name, self.hedge_percentile, hedge_delay * 1000,
+                    extra={"event": "dependency_hedge"},
+                )
+                pending.add(_executor.submit(fn, *args, **kwargs))
+
+        last_error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    self.latency.record(time.monotonic() - start)
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = error
+
+        self.breaker.record_failure()
+        if last_error is not None and not pending:
+            raise last_error
+        raise TimeoutError(f"{self.name} timed out after {self.timeout:.1f}s")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight block on the same future and get the same result (or
+    exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            logger.debug("[SINGLE-FLIGHT] Joined in-flight call", extra={"event": "single_flight_join"})
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Pre-provisioned LiveKit room pool
+
+Setting up a call used to be several sequential round trips at call time
+(create room, dispatch agent, mint token). The pool keeps ROOM_POOL_SIZE
+rooms ready with an agent already dispatched and a caller token minted, so
+connecting a caller is a checkout from local state. Replenishment creates
+rooms concurrently in bounded batches.
+
+Pool state is a small JSON file (ROOM_POOL_FILE) guarded by a file lock, so
+a long-running `room_pool.py run` can keep it filled while short-lived
+processes (generate_token.py) check rooms out.
+
+Every pooled room has an agent job waiting in it, which keeps the room alive
+(empty_timeout never fires). Expired rooms are therefore deleted through the
+API when the pool is refilled, which also ends their jobs. A waiting job does
+not count as an active call for job acceptance until a caller joins
+(worker_load.JobLoadReporter.mark_active).
+
+    python room_pool.py fill       # top the pool up once
+    python room_pool.py run        # keep it topped up
+    python room_pool.py checkout   # print a ready room + token as JSON
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import fcntl
+import asyncio
+import argparse
+from datetime import timedelta
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from livekit import api
+
+load_dotenv()
+
+POOL_SIZE = int(os.getenv("ROOM_POOL_SIZE", "2"))
+POOL_FILE = os.getenv("ROOM_POOL_FILE", "/tmp/livekit-room-pool.json")
+ROOM_TTL = int(os.getenv("ROOM_POOL_TTL", "1800"))  # seconds a pooled room is handed out for
+CREATE_CONCURRENCY = 5  # LiveKit API calls in flight while replenishing
+REFILL_INTERVAL = 10
+TOKEN_TTL_SLACK = 3600  # token stays valid for a call that starts near the end of ROOM_TTL
+
+
+@dataclass
+class PooledRoom:
+    room_name: str
+    identity: str
+    token: str
+    dispatch_id: str
+    created_at: float
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self.created_at > ROOM_TTL
+
+
+def mint_token(room_name: str, identity: str, name: Optional[str] = None) -> str:
+    """Caller token for room_name (local JWT signing, no API call)"""
+    token = api.AccessToken(
+        api_key=os.getenv("LIVEKIT_API_KEY"),
+        api_secret=os.getenv("LIVEKIT_API_SECRET"),
+    )
+    token.with_identity(identity)
+    token.with_name(name or identity)
+    token.with_ttl(timedelta(seconds=ROOM_TTL + TOKEN_TTL_SLACK))
+    token.with_grants(api.VideoGrants(
+        room_join=True,
+        room=room_name,
+        can_publish=True,
+        can_subscribe=True,
+    ))
+    return token.to_jwt()
+
+
+async def dispatch_agent(livekit_api: api.LiveKitAPI, room_name: str) -> str:
+    """Dispatch any available agent to room_name; returns the dispatch id"""
+    result = await livekit_api.agent_dispatch.create_dispatch(
+        api.CreateAgentDispatchRequest(
+            room=room_name,
+            agent_name="",  # Empty = any available agent
+        )
+    )
+    # Older SDKs wrap the dispatch in a response message
+    return result.agent_dispatch.id if hasattr(result, "agent_dispatch") else result.id
+
+
+async def provision_room(livekit_api: api.LiveKitAPI) -> PooledRoom:
+    """Create a room, dispatch an agent to it and mint a caller token"""
+    room_name = f"call-{uuid.uuid4().hex[:12]}"
+    await livekit_api.room.create_room(
+        api.CreateRoomRequest(
+            name=room_name,
+            # Rooms wait empty in the pool, so they must outlive ROOM_TTL
+            empty_timeout=ROOM_TTL + 300,
+            max_participants=10,
+        )
+    )
+    dispatch_id = await dispatch_agent(livekit_api, room_name)
+    identity = f"caller-{uuid.uuid4().hex[:8]}"
+    return PooledRoom(
+        room_name=room_name,
+        identity=identity,
+        token=mint_token(room_name, identity, "Caller"),
+        dispatch_id=dispatch_id,
+        created_at=time.time(),
+    )
+
+
+class RoomPool:
+    """Ready rooms persisted in a locked JSON file"""
+
+    def __init__(self, livekit_api: api.LiveKitAPI, size: int = POOL_SIZE, path: str = POOL_FILE):
+        self.livekit_api = livekit_api
+        self.size = size
+        self.path = path
+
+    @contextmanager
+    def _locked(self):
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self) -> List[PooledRoom]:
+        try:
+            with open(self.path) as f:
+                return [PooledRoom(**room) for room in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def _save(self, rooms: List[PooledRoom]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump([asdict(room) for room in rooms], f)
+        os.replace(tmp_path, self.path)
+
+    def available(self) -> int:
+        with self._locked():
+            return sum(1 for room in self._load() if not room.expired)
+
+    def checkout(self, name: Optional[str] = None) -> Optional[PooledRoom]:
+        """
+        Take the freshest ready room, or None if the pool is empty.
+        Passing a display name re-mints the token locally (still no API call).
+        Expired rooms stay in the file until fill() deletes them.
+        """
+        with self._locked():
+            rooms = self._load()
+            ready = [room for room in rooms if not room.expired]
+            if not ready:
+                return None
+            room = max(ready, key=lambda room: room.created_at)
+            self._save([r for r in rooms if r.room_name != room.room_name])
+
+        if name:
+            room.token = mint_token(room.room_name, room.identity, name)
+        return room
+
+    async def prune(self) -> int:
+        """Delete expired rooms (and with them their waiting agent jobs); returns how many"""
+        with self._locked():
+            rooms = self._load()
+            expired = [room for room in rooms if room.expired]
+            if not expired:
+                return 0
+            self._save([room for room in rooms if not room.expired])
+
+        semaphore = asyncio.Semaphore(CREATE_CONCURRENCY)
+
+        async def delete(room: PooledRoom):
+            async with semaphore:
+                await self.livekit_api.room.delete_room(api.DeleteRoomRequest(room=room.room_name))
+
+        results = await asyncio.gather(*(delete(room) for room in expired), return_exceptions=True)
+        failed = [room for room, result in zip(expired, results) if isinstance(result, Exception)]
+        for room, result in zip(expired, results):
+            if isinstance(result, Exception):
+                print(f"[WARNING] Deleting expired room {room.room_name} failed: {result}")
+        if failed:
+            # Keep them (still expired) so the next fill retries the delete
+            with self._locked():
+                self._save(self._load() + failed)
+        return len(expired) - len(failed)
+
+    async def fill(self) -> int:
+        """Delete expired rooms, then create rooms until the pool is full; returns how many were added"""
+        await self.prune()
+        with self._locked():
+            rooms = [room for room in self._load() if not room.expired]
+        missing = self.size - len(rooms)
+        if missing <= 0:
+            return 0
+
+        semaphore = asyncio.Semaphore(CREATE_CONCURRENCY)
+
+        async def provision():
+            async with semaphore:
+                return await provision_room(self.livekit_api)
+
+        results = await asyncio.gather(*(provision() for _ in range(missing)), return_exceptions=True)
+        created = [room for room in results if isinstance(room, PooledRoom)]
+        for error in (r for r in results if isinstance(r, Exception)):
+            print(f"[WARNING] Room provisioning failed: {error}")
+
+        with self._locked():
+            self._save(self._load() + created)
+        return len(created)
+
+    async def checkout_or_provision(self, name: Optional[str] = None) -> PooledRoom:
+        """Checkout, falling back to provisioning a room on demand when the pool is empty"""
+        room = self.checkout(name)
+        if room is None:
+            room = await provision_room(self.livekit_api)
+            if name:
+                room.token = mint_token(room.room_name, room.identity, name)
+        return room
+
+    async def run(self, interval: float = REFILL_INTERVAL):
+        while True:
+            added = await self.fill()
+            if added:
+                print(f"[INFO] Room pool replenished: +{added} ({self.available()}/{self.size} ready)")
+            await asyncio.sleep(interval)
+
+
+def create_livekit_api() -> api.LiveKitAPI:
+    return api.LiveKitAPI(
+        url=os.getenv("LIVEKIT_URL"),
+        api_key=os.getenv("LIVEKIT_API_KEY"),
+        api_secret=os.getenv("LIVEKIT_API_SECRET"),
+    )
+
+
+async def main_async(args) -> int:
+    livekit_api = create_livekit_api()
+    pool = RoomPool(livekit_api, size=args.size)
+    try:
+        if args.command == "fill":
+            added = await pool.fill()
+            print(f"[SUCCESS] Added {added} rooms ({pool.available()}/{pool.size} ready)")
+        elif args.command == "run":
+            print(f"[INFO] Keeping {pool.size} rooms ready (state: {pool.path})")
+            await pool.run()
+        elif args.command == "checkout":
+            room = await pool.checkout_or_provision(args.name)
+            print(json.dumps({**asdict(room), "ws_url": os.getenv("LIVEKIT_URL")}))
+            await pool.fill()
+    finally:
+        await livekit_api.aclose()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-provisioned LiveKit room pool")
+    parser.add_argument("command", choices=["fill", "run", "checkout"])
+    parser.add_argument("--size", type=int, default=POOL_SIZE)
+    parser.add_argument("--name", help="Caller display name (checkout only)")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
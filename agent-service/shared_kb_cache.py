@@ -0,0 +1,296 @@
+"""
+Cross-process knowledge base cache for the worker host
+
+LiveKit runs every call in its own job process, so each process used to build
+its own Pinecone client, master context copy and caches. This module shares
+that state across processes on the same host:
+
+1. SharedEmbeddingCache - a shared_memory hash table of query embeddings
+2. SharedBlob - a shared_memory segment holding the master business context
+3. KBLookupServer / RemoteKnowledgeBaseService - a Unix-socket lookup service
+   run by the worker's main process; job processes send searches to it
+   instead of creating their own clients
+
+Segments are written with a seqlock-style protocol (version marker written
+last, re-checked after reading), so readers never need a cross-process lock.
+Embedding slots also carry a checksum of (key, vector): two processes writing
+the same slot at once can leave one key next to a mix of both vectors, and
+the checksum lets readers reject that instead of returning a wrong vector.
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import hashlib
+import logging
+import threading
+import socketserver
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_SEGMENT = os.getenv("KB_SHM_EMBEDDINGS", "kb-embedding-cache")
+CONTEXT_SEGMENT = os.getenv("KB_SHM_CONTEXT", "kb-master-context")
+LOOKUP_SOCKET = os.getenv("KB_IPC_SOCKET", "/tmp/kb-lookup.sock")
+
+EMBEDDING_DIM = 768
+EMBEDDING_SLOTS = 2048  # ~6 MB
+CONTEXT_CAPACITY = 1 << 20  # 1 MB
+
+_MAGIC = 0x4B42534D  # "KBSM"
+
+
+def open_segment(name: str, size: int) -> Tuple[shared_memory.SharedMemory, bool]:
+    """Attach to a named segment, creating it if needed. Returns (segment, created)."""
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+        created = False
+    except FileNotFoundError:
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+            created = True
+        except FileExistsError:  # another process won the race
+            segment = shared_memory.SharedMemory(name=name)
+            created = False
+
+    # Job processes come and go; keep the resource tracker from unlinking
+    # the segment when the process that happened to create it exits.
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:
+        pass
+    return segment, created
+
+
+def _key_hash(key: str) -> int:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1  # 0 marks an empty slot
+
+
+def _slot_checksum(key_hash: int, vector: np.ndarray) -> int:
+    digest = hashlib.blake2b(vector.tobytes(), digest_size=8, key=key_hash.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SharedEmbeddingCache:
+    """Direct-mapped embedding cache in shared memory, shared by every job process"""
+
+    HEADER = struct.Struct("<IIII")  # magic, version, slots, dim
+    LAYOUT_VERSION = 2  # 2: per-slot checksums
+
+    def __init__(self, name: str = EMBEDDING_SEGMENT, slots: int = EMBEDDING_SLOTS, dim: int = EMBEDDING_DIM):
+        size = self.HEADER.size + slots * 16 + slots * dim * 4
+        self._segment, created = open_segment(name, size)
+        buf = self._segment.buf
+
+        if created:
+            self.HEADER.pack_into(buf, 0, _MAGIC, self.LAYOUT_VERSION, slots, dim)
+        magic, version, slots, dim = self.HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != self.LAYOUT_VERSION:
+            raise RuntimeError(f"Shared segment {name} has an unexpected layout")
+
+        self.slots = slots
+        self.dim = dim
+        offset = self.HEADER.size
+        self._keys = np.ndarray((slots,), dtype=np.uint64, buffer=buf, offset=offset)
+        self._checksums = np.ndarray((slots,), dtype=np.uint64, buffer=buf, offset=offset + slots * 8)
+        self._vectors = np.ndarray((slots, dim), dtype=np.float32, buffer=buf, offset=offset + slots * 16)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        h = _key_hash(key)
+        slot = h % self.slots
+        if int(self._keys[slot]) != h:
+            return None
+        vector = self._vectors[slot].copy()
+        checksum = int(self._checksums[slot])
+        if int(self._keys[slot]) != h:  # overwritten while we were copying
+            return None
+        if checksum != _slot_checksum(h, vector):  # concurrent writers interleaved
+            return None
+        return vector.tolist()
+
+    def put(self, key: str, vector: List[float]):
+        if len(vector) != self.dim:
+            return
+        h = _key_hash(key)
+        slot = h % self.slots
+        values = np.asarray(vector, dtype=np.float32)
+        self._keys[slot] = 0
+        self._vectors[slot] = values
+        self._checksums[slot] = _slot_checksum(h, values)
+        self._keys[slot] = h
+
+    def close(self):
+        self._keys = self._checksums = self._vectors = None
+        self._segment.close()
+
+
+class SharedBlob:
+    """
+    A single versioned JSON document in shared memory (e.g. the master business
+    context). The header carries the time the value was written, so readers can
+    refuse a copy older than their TTL and fetch a fresh one from the source.
+    """
+
+    LAYOUT_VERSION = 2  # 2: written_at in the header
+    HEADER = struct.Struct("<IIQQd")  # magic, layout version, sequence, length, written_at (unix time)
+
+    def __init__(self, name: str = CONTEXT_SEGMENT, capacity: int = CONTEXT_CAPACITY):
+        self._segment, created = open_segment(name, self.HEADER.size + capacity)
+        self.capacity = self._segment.size - self.HEADER.size
+        if created:
+            self.HEADER.pack_into(self._segment.buf, 0, _MAGIC, self.LAYOUT_VERSION, 0, 0, 0.0)
+
+    def read(self, max_age: Optional[float] = None) -> Optional[Tuple[Dict, float]]:
+        """(value, written_at), or None if unset, mid-write or older than max_age seconds"""
+        buf = self._segment.buf
+        _, layout, sequence, length, written_at = self.HEADER.unpack_from(buf, 0)
+        if layout != self.LAYOUT_VERSION or sequence == 0 or sequence % 2 == 1 or length == 0:
+            return None  # never written (by this layout), or a write is in progress
+        if max_age is not None and time.time() - written_at > max_age:
+            return None
+        data = bytes(buf[self.HEADER.size:self.HEADER.size + length])
+        if self.HEADER.unpack_from(buf, 0)[2] != sequence:
+            return None
+        try:
+            return json.loads(data), written_at
+        except ValueError:
+            return None
+
+    def write(self, value: Dict, written_at: Optional[float] = None) -> bool:
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.capacity:
+            logger.warning("Shared blob too large (%d bytes), not sharing it", len(data))
+            return False
+        buf = self._segment.buf
+        sequence = self.HEADER.unpack_from(buf, 0)[2]
+        odd = sequence + 1 if sequence % 2 == 0 else sequence
+        self.HEADER.pack_into(buf, 0, _MAGIC, self.LAYOUT_VERSION, odd, 0, 0.0)
+        buf[self.HEADER.size:self.HEADER.size + len(data)] = data
+        self.HEADER.pack_into(
+            buf, 0, _MAGIC, self.LAYOUT_VERSION, odd + 1, len(data),
+            written_at if written_at is not None else time.time(),
+        )
+        return True
+
+    def close(self):
+        self._segment.close()
+
+
+# ---------------------------------------------------------------------------
+# Lookup service
+# ---------------------------------------------------------------------------
+
+class _LookupHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out"""
+
+    def handle(self):
+        kb_service = self.server.kb_service
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get("op")
+            if op == "status":
+                result = {"enabled": kb_service.enabled}
+            elif op == "search":
+                result = kb_service.search(request["query"], top_k=request.get("top_k", 3),
+                                           filter_tags=request.get("filter_tags"))
+            elif op == "search_with_context":
+                result = kb_service.search_with_context(
+                    request["query"],
+                    conversation_history=request.get("conversation_history"),
+                    top_k=request.get("top_k", 5),
+                )
+            elif op == "master_context":
+                result = kb_service.get_master_business_context()
+            else:
+                raise ValueError(f"unknown op: {op}")
+            response = {"ok": True, "result": result}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class KBLookupServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, kb_service):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.kb_service = kb_service
+        super().__init__(path, _LookupHandler)
+
+
+def start_lookup_server(path: str = LOOKUP_SOCKET) -> Optional[KBLookupServer]:
+    """
+    Serve knowledge base lookups for job processes from this process.
+    Call once in the worker's main process; returns None if the KB is disabled.
+    """
+    from knowledge_base import KnowledgeBaseService
+
+    kb_service = KnowledgeBaseService()
+    if not kb_service.enabled:
+        return None
+
+    server = KBLookupServer(path, kb_service)
+    thread = threading.Thread(target=server.serve_forever, name="kb-lookup", daemon=True)
+    thread.start()
+    # Answer text for slim queries; off the startup path, lookups fetch on demand meanwhile
+    threading.Thread(target=kb_service.warm_answer_store, name="kb-answer-warm", daemon=True).start()
+    logger.info("[SUCCESS] Knowledge base lookup service listening on %s", path)
+    return server
+
+
+class RemoteKnowledgeBaseService:
+    """
+    Client for KBLookupServer with the same search interface as
+    KnowledgeBaseService, used by job processes instead of their own clients.
+    """
+
+    def __init__(self, path: str = LOOKUP_SOCKET, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.enabled = bool(self._call("status").get("enabled"))
+
+    def _call(self, op: str, **params):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                response = json.loads(stream.readline())
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error", "lookup failed"))
+        return response["result"]
+
+    def search(self, query: str, top_k: int = 3, filter_tags: Optional[List[str]] = None) -> List[Dict]:
+        try:
+            return self._call("search", query=query, top_k=top_k, filter_tags=filter_tags)
+        except Exception as e:
+            logger.error("Remote KB search failed: %s", e, extra={"event": "kb_query_error"})
+            return []
+
+    def search_with_context(
+        self,
+        query: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        top_k: int = 5
+    ) -> Tuple[Optional[Dict], List[Dict]]:
+        try:
+            master_context, matches = self._call(
+                "search_with_context", query=query, conversation_history=conversation_history, top_k=top_k
+            )
+            return (master_context, matches)
+        except Exception as e:
+            logger.error("Remote KB search failed: %s", e, extra={"event": "kb_search_error"})
+            return (None, [])
+
+    def get_master_business_context(self) -> Optional[Dict]:
+        try:
+            return self._call("master_context")
+        except Exception:
+            return None
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile for the agent worker
+
+With min_machines_running = 1, callers wait through a Fly restart, so import
+time is part of call setup. This runs `python -X importtime -c "import
+voice_agent"` in a fresh interpreter and reports the total import time and
+the most expensive top-level packages, then times the main-process setup
+that runs before cli.run_app (voice_agent.start_worker_services: lookup
+server, readiness probes, HTTP endpoint), each checked against a budget.
+The worker load right after that setup (no calls yet) must stay below half
+the acceptance threshold, or the worker would refuse every call:
+
+    python startup_profile.py                      # human-readable report
+    python startup_profile.py --json profile.json  # also write the report as JSON
+    python startup_profile.py --check              # exit 1 when over budget (CI)
+    python startup_profile.py --prewarm            # include job-process prewarm (needs API keys)
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, List
+
+IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "4000"))
+PREWARM_BUDGET_MS = float(os.getenv("STARTUP_PREWARM_BUDGET_MS", "3000"))
+MAIN_SETUP_BUDGET_MS = float(os.getenv("STARTUP_MAIN_SETUP_BUDGET_MS", "500"))
+TOP_N = 15
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Rows of `-X importtime` output: module, depth, self_ms, cumulative_ms"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        # One space after the bar, then two more per nesting level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append({
+            "module": name.strip(),
+            "depth": depth,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return rows
+
+
+def profile_imports(module: str = "voice_agent") -> Dict:
+    """Import `module` in a fresh interpreter and summarize where the time went"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {module} failed: {error}")
+
+    rows = parse_importtime(result.stderr)
+
+    # A module is reported after everything it imported, so the target's
+    # imports are the rows between the previous top-level row and the target
+    end = max(i for i, row in enumerate(rows) if row["depth"] == 0 and row["module"] == module)
+    start = end
+    while start > 0 and rows[start - 1]["depth"] > 0:
+        start -= 1
+    children = [row for row in rows[start:end] if row["depth"] == 1]
+
+    return {
+        "module": module,
+        "import_ms": round(rows[end]["cumulative_ms"], 1),
+        "process_ms": round(wall_ms, 1),
+        "modules_imported": end - start + 1,
+        "top_packages": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_ms"], 1)}
+            for row in sorted(children, key=lambda row: row["cumulative_ms"], reverse=True)[:TOP_N]
+        ],
+    }
+
+
+_MAIN_SETUP_SCRIPT = """
+import json, time
+import {module}
+import worker_load
+started = time.perf_counter()
+{module}.start_worker_services()
+main_setup_ms = round((time.perf_counter() - started) * 1000, 1)
+print(json.dumps({{
+    "main_setup_ms": main_setup_ms,
+    "idle_load": round(worker_load.compute_load(), 3),
+    "idle_load_limit": worker_load.IDLE_LOAD_LIMIT,
+}}))
+"""
+
+
+def profile_main_setup(module: str = "voice_agent") -> Dict:
+    """Time the `__main__` setup before cli.run_app in a fresh interpreter and read the idle load"""
+    result = subprocess.run(
+        [sys.executable, "-c", _MAIN_SETUP_SCRIPT.format(module=module)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        # Ephemeral port, so profiling never collides with a running worker;
+        # no snapshot rebuild (it would outlive the profile)
+        env={**os.environ, "AGENT_HTTP_PORT": "0", "KB_SNAPSHOT_REFRESH": "0"},
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"{module}.start_worker_services failed: {error}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def profile_prewarm() -> Dict:
+    """Time the job-process prewarm (KB service construction) in this process"""
+    import voice_agent
+
+    class _Proc:
+        userdata: Dict = {}
+
+    started = time.perf_counter()
+    voice_agent.prewarm(_Proc())
+    return {"prewarm_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent worker cold-start profile")
+    parser.add_argument("--module", default="voice_agent")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a budget is exceeded")
+    parser.add_argument("--prewarm", action="store_true", help="Also time the job-process prewarm")
+    args = parser.parse_args()
+
+    report = profile_imports(args.module)
+    report["import_budget_ms"] = IMPORT_BUDGET_MS
+    report.update(profile_main_setup(args.module))
+    report["main_setup_budget_ms"] = MAIN_SETUP_BUDGET_MS
+    if args.prewarm:
+        report.update(profile_prewarm())
+        report["prewarm_budget_ms"] = PREWARM_BUDGET_MS
+
+    print(f"Startup profile: import {report['module']}")
+    print(f"  import time:   {report['import_ms']:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print(f"  process total: {report['process_ms']:.0f} ms, {report['modules_imported']} modules")
+    print(f"  main setup:    {report['main_setup_ms']:.0f} ms (budget {MAIN_SETUP_BUDGET_MS:.0f} ms)")
+    print(f"  idle load:     {report['idle_load']:.2f} (limit {report['idle_load_limit']:.2f})")
+    if "prewarm_ms" in report:
+        print(f"  prewarm:       {report['prewarm_ms']:.0f} ms (budget {PREWARM_BUDGET_MS:.0f} ms)")
+    print("  slowest imports:")
+    for row in report["top_packages"]:
+        print(f"    {row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    over_budget = (
+        report["import_ms"] > IMPORT_BUDGET_MS
+        or report["main_setup_ms"] > MAIN_SETUP_BUDGET_MS
+        or report["idle_load"] >= report["idle_load_limit"]
+        or report.get("prewarm_ms", 0) > PREWARM_BUDGET_MS
+    )
+    if over_budget:
+        print("❌ Startup is over budget")
+    if args.check and over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
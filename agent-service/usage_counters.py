@@ -0,0 +1,90 @@
+"""
+Batched KB usage counters
+
+Counting a hit is a dict increment on the turn path; a background task posts
+the aggregated deltas to the dashboard (POST /api/knowledge-base/usage) once
+per interval and when the call ends. The dashboard applies them as batched
+Firestore increments, so usageCount/lastUsedAt stay useful for cache warming,
+pruning and ranking without a write per turn.
+"""
+
+import os
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("KB_USAGE_FLUSH_INTERVAL", "60"))
+MAX_PENDING_ENTRIES = 5000  # drop counts rather than grow without bound if the API is down
+
+
+class UsageCounters:
+    """In-memory per-entry hit counts for this process"""
+
+    def __init__(self, api_url: str, interval: float = FLUSH_INTERVAL):
+        self.api_url = api_url
+        self.interval = interval
+        self._counts: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, entry_id: Optional[str]):
+        # Master-context sections ("master:<section>") are not knowledgeBase documents
+        if not entry_id or ":" in entry_id:
+            return
+        if entry_id not in self._counts and len(self._counts) >= MAX_PENDING_ENTRIES:
+            return
+        self._counts[entry_id] += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Send and reset the pending deltas; they are kept for the next flush on failure"""
+        if not self._counts:
+            return True
+        counts: Dict[str, int] = dict(self._counts)
+        self._counts.clear()
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"{self.api_url}/api/knowledge-base/usage",
+                    json={"counts": counts},
+                    timeout=aiohttp.ClientTimeout(total=5),
+                ) as response:
+                    result = await response.json()
+                    if not result.get("success"):
+                        raise RuntimeError(result.get("error", f"HTTP {response.status}"))
+            logger.debug("Flushed usage for %d KB entries", len(counts), extra={"event": "kb_usage_flush"})
+            return True
+        except Exception as e:
+            logger.warning("KB usage flush failed: %s", e, extra={"event": "kb_usage_flush_error"})
+            self._counts.update(counts)
+            return False
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+_usage_counters: Optional[UsageCounters] = None
+
+
+def get_usage_counters(api_url: str) -> UsageCounters:
+    """Process-wide counters (job processes are reused across calls)"""
+    global _usage_counters
+    if _usage_counters is None:
+        _usage_counters = UsageCounters(api_url)
+    return _usage_counters
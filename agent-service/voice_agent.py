@@ -4,29 +4,68 @@ Handles actual phone calls with confidence-based escalation
 Integrated with Pinecone knowledge base for semantic search
 """
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import asyncio
 import logging
 import os
+import threading
 from dotenv import load_dotenv
 import aiohttp
 
 from livekit.agents import (
     JobContext,
+    JobProcess,
+    StopResponse,
     WorkerOptions,
     cli,
     llm,
 )
+from livekit import rtc
 from livekit.agents.voice import Agent, AgentSession
+# Plugins register themselves with the worker and must be imported on the main
+# thread at startup; the KB stack (Pinecone, Gemini SDK) is loaded in prewarm
 from livekit.plugins import deepgram, google
 
-from knowledge_base import get_knowledge_base_service
+from agent_logging import setup_logging, bind_call, next_turn
+from audio_cache import get_audio_cache, GREETING, HOLD_MESSAGE, CALLBACK_APOLOGY
+from fast_path import FastPathPolicy
+from usage_counters import get_usage_counters
+from call_recorder import CallRecorder
+from cost_ledger import CallLedger, count
+from prompt_cache import (
+    PROMPT_CACHE_MODEL,
+    build_prefix,
+    build_turn_suffix,
+    get_prefix_cache,
+    llm_cache_options,
+    tool_schemas,
+)
+from worker_load import JobLoadReporter, check_idle_load, compute_load, LOAD_THRESHOLD
 
 load_dotenv()
 
+_IMPORT_DONE = time.perf_counter()
+
 logger = logging.getLogger("salon-voice-agent")
 logger.setLevel(logging.INFO)
 
-# Base system prompt (will be augmented with KB results dynamically)
+TTS_MODEL = "aura-asteria-en"
+
+# Open a help request as soon as retrieval comes back empty or low-confidence,
+# before the LLM decides to escalate; confirmed on escalation, cancelled otherwise
+PREDICTIVE_ESCALATION = os.getenv("PREDICTIVE_ESCALATION", "0") == "1"
+
+# Pause caller audio input (STT) and KB retrieval while waiting for a supervisor
+HOLD_MODE = os.getenv("HOLD_MODE", "1") == "1"
+
+# How long the end of a turn may wait for that turn's KB lookup before the LLM takes over
+KB_LOOKUP_WAIT = 0.8
+
+# Persona: the start of the stable prompt prefix (see prompt_cache.py); per-turn
+# KB results go in a short suffix instead of rewriting this
 BASE_SYSTEM_PROMPT = """You are Pari, a professional receptionist for Luxe Beauty Salon in Bandra, Mumbai.
 
 ## Your Role
@@ -41,18 +80,16 @@ You handle phone calls professionally and answer questions about our salon. You
 6. Keep responses brief (2-3 sentences max for phone calls)
 
 ## CRITICAL: Escalation Protocol
-When you need to escalate to supervisor, you MUST follow this EXACT flow in TWO STEPS:
-
-STEP 1 - SPEAK FIRST (REQUIRED):
-Say exactly: "Let me check with my supervisor on that for you. Please hold for just a moment."
+When you need to escalate to supervisor, follow this EXACT flow:
 
-STEP 2 - CALL FUNCTION:
-Only AFTER speaking, call escalate_to_supervisor(question="exact caller question", confidence_level="low")
+STEP 1 - CALL FUNCTION:
+Call escalate_to_supervisor(question="exact caller question", confidence_level="low")
+The hold message ("Let me check with my supervisor on that for you. Please hold for just a moment.")
+is played to the caller automatically. Do NOT say it yourself.
 
-STEP 3 - SPEAK ANSWER:
-When function returns, say: "Thank you for holding. [supervisor's answer]"
-
-NEVER call escalate_to_supervisor without speaking the hold message first!
+STEP 2 - SPEAK ANSWER:
+When function returns with the supervisor's answer, say: "Thank you for holding. [supervisor's answer]"
+If the function says the caller has already been told about a callback, do not repeat it.
 
 ## When to Escalate
 - No relevant knowledge base results found
@@ -65,41 +102,14 @@ Remember: The knowledge base is your primary source of information. Trust high-c
 """
 
 
-def build_system_prompt_with_kb(kb_results=None):
-    """Build dynamic system prompt with knowledge base context"""
-    prompt = BASE_SYSTEM_PROMPT
-
-    if kb_results and len(kb_results) > 0:
-        top_result = kb_results[0]
-        confidence = top_result['confidence']
-
-        # Add KB context based on confidence
-        if confidence == 'high':
-            prompt += f"\n\n## HIGH CONFIDENCE - Use This Answer:\n"
-            prompt += f"Q: {top_result['question']}\n"
-            prompt += f"A: {top_result['answer']}\n"
-            prompt += f"(Match score: {top_result['score']:.2f})\n"
-            prompt += "\nThis is a highly relevant match. Use this answer to respond to the caller."
-
-        elif confidence == 'medium':
-            prompt += f"\n\n## MEDIUM CONFIDENCE - Consider This Context:\n"
-            prompt += f"Q: {top_result['question']}\n"
-            prompt += f"A: {top_result['answer']}\n"
-            prompt += f"(Match score: {top_result['score']:.2f})\n"
-            prompt += "\nThis may be relevant. Use as guidance, but consider escalating if you're unsure."
-
-        # Show additional results if available
-        if len(kb_results) > 1:
-            prompt += f"\n\n## Additional Related Information:\n"
-            for i, result in enumerate(kb_results[1:3], 2):
-                prompt += f"{i}. {result['question']}: {result['answer'][:100]}...\n"
-
-    return prompt
-
-
 class SupervisorChat:
     """Manages real-time chat with supervisor during calls"""
 
+    # Poll tasks shared by every call in this process: {request_id: Task}.
+    # The dashboard API attaches concurrent near-identical escalations to one
+    # pending help request, so calls waiting on the same request share a poller.
+    _pollers: dict = {}
+
     def __init__(self, api_url: str):
         self.api_url = api_url
         self.pending_questions = {}  # {request_id: question_data}
@@ -110,48 +120,139 @@ class SupervisorChat:
         caller_name: str,
         caller_phone: str,
         conversation_context: str,
-        session_id: str
+        session_id: str,
+        request_id: str = None,
     ) -> dict:
         """
         Ask supervisor for help and wait for response.
-        This creates a help request and polls for supervisor answer.
+        This creates (or attaches to) a help request and polls for supervisor answer.
+        Pass request_id to wait on an already confirmed speculative request instead.
         """
-        logger.info(f"Asking supervisor: {question}")
+        logger.info("Asking supervisor", extra={"event": "escalation_start", "question": question})
 
         try:
-            # Create help request
+            if request_id is None:
+                request_id, _ = await self._create_help_request(
+                    question, caller_name, caller_phone, conversation_context, session_id
+                )
+                if request_id is None:
+                    return {"error": "Failed to create help request"}
+
+            self.pending_questions[request_id] = {"question": question, "session_id": session_id}
+
+            poller = self._pollers.get(request_id)
+            if poller is None:
+                poller = asyncio.create_task(self._poll_for_answer(request_id))
+                self._pollers[request_id] = poller
+                poller.add_done_callback(lambda _: self._pollers.pop(request_id, None))
+
+            # Shield so one caller hanging up does not cancel the poll for the others
+            return await asyncio.shield(poller)
+
+        except Exception as e:
+            logger.error("Error asking supervisor: %s", e, extra={"event": "escalation_error"})
+            return {"error": str(e)}
+
+        finally:
+            if request_id:
+                self.pending_questions.pop(request_id, None)
+
+    async def _create_help_request(
+        self,
+        question: str,
+        caller_name: str,
+        caller_phone: str,
+        conversation_context: str,
+        session_id: str,
+        speculative: bool = False,
+    ):
+        """Create (or attach to) a help request; returns (request_id or None, attached)"""
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{self.api_url}/api/help-requests",
+                json={
+                    "question": question,
+                    "callerPhone": caller_phone,
+                    "callerName": caller_name,
+                    "context": conversation_context,
+                    "sessionId": session_id,
+                    "speculative": speculative,
+                },
+            ) as response:
+                result = await response.json()
+
+        if not result.get("success"):
+            return None, False
+
+        request_id = result["data"]["id"]
+        if result.get("duplicate"):
+            # Speculative duplicate of another call's request: nothing was opened,
+            # a real escalation attaches this caller to it
+            logger.info("Question already pending as help request %s", request_id,
+                        extra={"event": "help_request_duplicate"})
+            return None, False
+        attached = bool(result.get("attached"))
+        if attached:
+            logger.info("Attached to pending help request %s", request_id, extra={"event": "help_request_attached"})
+        else:
+            logger.info(
+                "Created %shelp request %s", "speculative " if speculative else "", request_id,
+                extra={"event": "help_request_created", "speculative": speculative},
+            )
+        return request_id, attached
+
+    async def open_speculative(self, question: str, caller_name: str, caller_phone: str,
+                               conversation_context: str, session_id: str):
+        """Open a help request early; returns (request_id, attached) or (None, False)"""
+        try:
+            return await self._create_help_request(
+                question, caller_name, caller_phone, conversation_context, session_id, speculative=True
+            )
+        except Exception as e:
+            logger.warning("Could not open speculative help request: %s", e, extra={"event": "escalation_error"})
+            return None, False
+
+    async def confirm_speculative(self, request_id: str) -> bool:
+        """Keep a speculative request; False if it no longer exists"""
+        try:
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.api_url}/api/help-requests",
-                    json={
-                        "question": question,
-                        "callerPhone": caller_phone,
-                        "callerName": caller_name,
-                        "context": conversation_context,
-                        "sessionId": session_id,
-                    },
+                async with session.patch(
+                    f"{self.api_url}/api/help-requests/{request_id}", json={"speculative": False}
                 ) as response:
                     result = await response.json()
+            return bool(result.get("success"))
+        except Exception as e:
+            logger.warning("Could not confirm help request %s: %s", request_id, e, extra={"event": "escalation_error"})
+            return False
 
-                    if not result.get("success"):
-                        return {"error": "Failed to create help request"}
-
-                    request_id = result["data"]["id"]
-                    logger.info(f"Created help request: {request_id}")
-
-            # Poll for supervisor response (real-time intervention)
-            # In production, use WebSocket for instant updates
-            max_wait = 300  # 5 minutes max
-            poll_interval = 2  # Check every 2 seconds
-            elapsed = 0
+    async def cancel_speculative(self, request_id: str):
+        """Withdraw a speculative request the LLM did not escalate"""
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.delete(f"{self.api_url}/api/help-requests/{request_id}") as response:
+                    result = await response.json()
+            if result.get("handedOver"):
+                logger.info("Handed speculative help request %s to an attached caller", request_id, extra={"event": "help_request_cancelled"})
+            elif result.get("cancelled"):
+                logger.info("Cancelled speculative help request %s", request_id, extra={"event": "help_request_cancelled"})
+        except Exception as e:
+            logger.warning("Could not cancel help request %s: %s", request_id, e, extra={"event": "escalation_error"})
 
-            logger.info(f"Starting to poll for request {request_id}")
+    async def _poll_for_answer(self, request_id: str) -> dict:
+        """Poll a help request until the supervisor resolves it or we time out"""
+        # Poll for supervisor response (real-time intervention)
+        # In production, use WebSocket for instant updates
+        max_wait = 300  # 5 minutes max
+        poll_interval = 2  # Check every 2 seconds
+        elapsed = 0
 
+        try:
             while elapsed < max_wait:
                 await asyncio.sleep(poll_interval)
                 elapsed += poll_interval
 
                 # Check if supervisor has responded
+                count("escalation_polls")
                 async with aiohttp.ClientSession() as session:
                     async with session.get(
                         f"{self.api_url}/api/help-requests/{request_id}",
@@ -162,29 +263,32 @@ class SupervisorChat:
                     ) as response:
                         result = await response.json()
 
-                        logger.info(f"Poll {elapsed}s - Response: {result.get('success')}, Status: {result.get('data', {}).get('status') if result.get('success') else 'N/A'}")
-
                         if result.get("success"):
                             data = result["data"]
-                            logger.info(f"Request status: {data.get('status')}, has response: {bool(data.get('supervisorResponse'))}")
+                            logger.debug(
+                                "Poll %ss/%ss - status: %s",
+                                elapsed, max_wait, data.get("status"),
+                                extra={"event": "escalation_poll", "request_id": request_id},
+                            )
 
                             if data["status"] == "resolved":
-                                logger.info(f"Supervisor responded: {data['supervisorResponse']}")
+                                logger.info(
+                                    "Supervisor responded after %ss", elapsed,
+                                    extra={"event": "escalation_resolved", "request_id": request_id},
+                                )
                                 return {
                                     "answer": data["supervisorResponse"],
                                     "request_id": request_id
                                 }
                         else:
-                            logger.warning(f"API error: {result.get('error')}")
-
-                logger.info(f"Waiting for supervisor... ({elapsed}s/{max_wait}s)")
+                            logger.warning("API error: %s", result.get("error"), extra={"event": "escalation_poll"})
 
             # Timeout
-            logger.warning("Supervisor response timeout")
+            logger.warning("Supervisor response timeout", extra={"event": "escalation_timeout", "request_id": request_id})
             return {"error": "Supervisor did not respond in time"}
 
         except Exception as e:
-            logger.error(f"Error asking supervisor: {e}")
+            logger.error("Error polling help request %s: %s", request_id, e, extra={"event": "escalation_error"})
             return {"error": str(e)}
 
 
@@ -197,6 +301,15 @@ class VoiceAgentFunctions:
         self.conversation_context = []
         self.caller_name = "Unknown"
         self.caller_phone = "Unknown"
+        self.session = None  # AgentSession, set once the pipeline is built
+        self.audio_cache = None  # UtteranceAudioCache for fixed utterances
+        self.kb_lookup = None  # asyncio.Task with the latest turn's KB matches
+        self.active_tool_calls = 0
+        self.load_reporter = None  # JobLoadReporter for this job process
+        self.on_hold = False
+        self.speculative_request = None  # asyncio.Task -> (request_id, attached) opened on low KB confidence
+        self.recorder = None  # CallRecorder for this call
+        self.turn_id = 0
 
     def add_to_context(self, role: str, content: str):
         """Track conversation for context"""
@@ -231,12 +344,103 @@ class VoiceAgentFunctions:
             question: The EXACT question the caller asked (not your interpretation)
             confidence_level: How confident you are (low, medium, high)
         """
-        logger.info("="*60)
-        logger.info("LIVE ESCALATION DURING CALL")
-        logger.info(f"Question: {question}")
-        logger.info(f"Confidence: {confidence_level}")
-        logger.info(f"Caller: {self.caller_name} ({self.caller_phone})")
-        logger.info("="*60)
+        logger.info(
+            "Live escalation during call",
+            extra={
+                "event": "escalation",
+                "question": question,
+                "confidence_level": confidence_level,
+                "caller_name": self.caller_name,
+            },
+        )
+
+        self.active_tool_calls += 1
+        try:
+            return await self._escalate(question)
+        finally:
+            self.active_tool_calls -= 1
+
+    def open_speculative_request(self, question: str):
+        """Open a help request for this turn before the LLM decides to escalate"""
+        if not PREDICTIVE_ESCALATION or self.speculative_request is not None or self.on_hold:
+            return
+        self.speculative_request = asyncio.create_task(self.supervisor_chat.open_speculative(
+            question=question,
+            caller_name=self.caller_name,
+            caller_phone=self.caller_phone,
+            conversation_context=self.get_context_text(),
+            session_id=self.session_id,
+        ))
+
+    async def cancel_speculative_request(self):
+        """The LLM answered without escalating: withdraw the request silently"""
+        task, self.speculative_request = self.speculative_request, None
+        if task is None:
+            return
+        request_id, attached = await task
+        # Requests we only attached to belong to another call
+        if request_id and not attached:
+            await self.supervisor_chat.cancel_speculative(request_id)
+
+    async def _claim_speculative_request(self):
+        """Confirm the speculative request for this escalation; returns its id or None"""
+        task, self.speculative_request = self.speculative_request, None
+        if task is None:
+            return None
+        request_id, attached = await task
+        if request_id is None:
+            return None
+        if attached or await self.supervisor_chat.confirm_speculative(request_id):
+            logger.info("Escalating on speculative help request %s", request_id, extra={"event": "escalation_predicted"})
+            return request_id
+        return None
+
+    def enter_hold(self):
+        """
+        Stop spending on a call that is only waiting: stop feeding caller audio
+        to STT (no transcribing hold silence), drop the pending user turn and
+        KB lookup, and skip KB retrieval until exit_hold().
+        """
+        if not HOLD_MODE or self.on_hold:
+            return
+        self.on_hold = True
+
+        if self.kb_lookup is not None and not self.kb_lookup.done():
+            self.kb_lookup.cancel()
+        self.kb_lookup = None
+
+        if self.session:
+            try:
+                self.session.input.set_audio_enabled(False)
+                self.session.clear_user_turn()
+            except Exception as e:
+                logger.warning("Could not pause caller audio for hold: %s", e)
+        logger.info("Call on hold", extra={"event": "hold_start"})
+
+    def exit_hold(self):
+        """Resume caller audio and KB retrieval"""
+        if not self.on_hold:
+            return
+        self.on_hold = False
+
+        if self.session:
+            try:
+                self.session.input.set_audio_enabled(True)
+            except Exception as e:
+                logger.warning("Could not resume caller audio after hold: %s", e)
+        logger.info("Call resumed from hold", extra={"event": "hold_end"})
+
+    async def _escalate(self, question: str) -> str:
+        """Put the caller on hold, ask the supervisor and return what the LLM should relay"""
+        if self.load_reporter:
+            with self.load_reporter.holding():
+                return await self._ask_on_hold(question)
+        return await self._ask_on_hold(question)
+
+    async def _ask_on_hold(self, question: str) -> str:
+        # Play the hold message from pre-synthesized audio (no TTS round trip)
+        if self.session and self.audio_cache:
+            await self.audio_cache.say(self.session, HOLD_MESSAGE)
 
         # Get the last few user messages for better context
         recent_user_messages = [
@@ -250,22 +454,46 @@ class VoiceAgentFunctions:
         else:
             full_context = self.get_context_text()
 
+        # Reuse the request opened when retrieval came back low-confidence, if any
+        request_id = await self._claim_speculative_request()
+
         # Ask supervisor (caller is on hold)
-        result = await self.supervisor_chat.ask_supervisor(
-            question=question,
-            caller_name=self.caller_name,
-            caller_phone=self.caller_phone,
-            conversation_context=full_context,
-            session_id=self.session_id
-        )
+        self.enter_hold()
+        hold_started = time.perf_counter()
+        try:
+            result = await self.supervisor_chat.ask_supervisor(
+                question=question,
+                caller_name=self.caller_name,
+                caller_phone=self.caller_phone,
+                conversation_context=full_context,
+                session_id=self.session_id,
+                request_id=request_id,
+            )
+        finally:
+            self.exit_hold()
+            if self.recorder:
+                self.recorder.timing("supervisor_wait", (time.perf_counter() - hold_started) * 1000, self.turn_id)
+
+        if self.recorder:
+            self.recorder.event(
+                "escalation", self.turn_id,
+                question=question, answered="answer" in result, speculative=request_id is not None,
+            )
 
         if "answer" in result:
             # Got answer from supervisor!
-            logger.info(f"Relaying supervisor answer to caller")
+            logger.info("Relaying supervisor answer to caller")
             return result['answer']
         else:
             # Supervisor didn't respond in time
             logger.warning("Supervisor timeout, offering callback")
+            if self.session and self.audio_cache:
+                await self.audio_cache.say(self.session, CALLBACK_APOLOGY)
+                return (
+                    "The supervisor did not respond in time. The caller has already been told "
+                    "we will call them back within the hour and asked if there is anything else. "
+                    "Wait for the caller's reply."
+                )
             return (
                 "I apologize, my supervisor is assisting another client right now. "
                 f"I've noted your question and we'll call you back at {self.caller_phone} "
@@ -275,20 +503,83 @@ class VoiceAgentFunctions:
 
 
 
+class SalonAgent(Agent):
+    """Agent that can answer high-confidence KB hits directly, skipping the LLM turn"""
+
+    def __init__(self, fnc_ctx: VoiceAgentFunctions, fast_path: FastPathPolicy, **kwargs):
+        super().__init__(**kwargs)
+        self.fnc_ctx = fnc_ctx
+        self.fast_path = fast_path
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        # Use the lookup once, so a later turn never replays this turn's matches
+        kb_lookup, self.fnc_ctx.kb_lookup = self.fnc_ctx.kb_lookup, None
+        if kb_lookup is None:
+            return
+
+        try:
+            matches = await asyncio.wait_for(asyncio.shield(kb_lookup), timeout=KB_LOOKUP_WAIT)
+        except asyncio.TimeoutError:
+            return
+
+        match = None
+        if self.fast_path.enabled:
+            match = self.fast_path.choose(matches, tool_call_pending=self.fnc_ctx.active_tool_calls > 0)
+        if match is None:
+            # Per-turn suffix after the conversation; the prefix stays byte-identical
+            turn_ctx.add_message(role="system", content=build_turn_suffix(matches))
+            return
+
+        logger.info(
+            "[FAST PATH] Answering from KB (score: %.3f)", match["score"],
+            extra={"event": "fast_path", "kb_id": match["id"]},
+        )
+        if self.fnc_ctx.recorder:
+            self.fnc_ctx.recorder.event("fast_path", self.fnc_ctx.turn_id, kb_id=match["id"], score=match["score"])
+        self.session.say(match["answer"])
+        raise StopResponse()
+
+
+def prewarm(proc: JobProcess):
+    """Load the KB stack once per job process, before the process is handed a call"""
+    from knowledge_base import get_knowledge_base_service
+
+    started = time.perf_counter()
+    kb_service = get_knowledge_base_service()
+    # Answer text for slim queries, so a turn is one ID-only query (local clients
+    # only). Listing the index can take longer than LiveKit's process init
+    # timeout, so it runs in the background; queries fetch on demand meanwhile
+    if hasattr(kb_service, "warm_answer_store"):
+        threading.Thread(target=kb_service.warm_answer_store, name="kb-answer-warm", daemon=True).start()
+    proc.userdata["kb_service"] = kb_service
+    logger.info(
+        "Job process prewarmed in %.0f ms", (time.perf_counter() - started) * 1000,
+        extra={"event": "prewarm"},
+    )
+
+
 async def entrypoint(ctx: JobContext):
     """
     Main entry point for voice agent.
     Handles incoming phone calls with real-time supervisor intervention.
     Integrated with Pinecone knowledge base for semantic search.
     """
-    logger.info(f"Incoming call to room: {ctx.room.name}")
+    setup_logging()
+    bind_call(ctx.room.name)
+    # Everything this call spends (embeddings, queries, tokens, polls) is counted here
+    ledger = CallLedger(ctx.room.name).bind()
+    logger.info("Incoming call to room %s", ctx.room.name, extra={"event": "call_start"})
 
     # Initialize supervisor chat interface
     api_url = os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000")
-    logger.info(f"Using API URL: {api_url}")
+    logger.info("Using API URL: %s", api_url)
 
-    # Initialize knowledge base service
-    kb_service = get_knowledge_base_service()
+    # Initialize knowledge base service (normally already loaded by prewarm)
+    kb_service = ctx.proc.userdata.get("kb_service")
+    if kb_service is None:
+        from knowledge_base import get_knowledge_base_service
+
+        kb_service = get_knowledge_base_service()
     if kb_service.enabled:
         logger.info("[SUCCESS] Knowledge base enabled")
     else:
@@ -297,63 +588,143 @@ async def entrypoint(ctx: JobContext):
     # Verify API is reachable
     try:
         async with aiohttp.ClientSession() as session:
-            async with session.get(f"{api_url}/api/help-requests/pending", timeout=aiohttp.ClientTimeout(total=5)) as response:
+            async with session.get(f"{api_url}/api/help-requests/pending?limit=1", timeout=aiohttp.ClientTimeout(total=5)) as response:
                 if response.status == 200:
                     logger.info("API connection verified")
                 else:
-                    logger.warning(f"API returned status {response.status}")
+                    logger.warning("API returned status %s", response.status)
     except Exception as e:
-        logger.error(f"Cannot reach API at {api_url}: {e}")
+        logger.error("Cannot reach API at %s: %s", api_url, e)
         logger.error("Escalations may not work properly!")
 
     supervisor_chat = SupervisorChat(api_url=api_url)
 
+    # KB hits are counted in memory and flushed to the dashboard in batches
+    usage_counters = get_usage_counters(api_url)
+    usage_counters.start()
+    ctx.add_shutdown_callback(usage_counters.stop)
+
     # Initialize function context
     fnc_ctx = VoiceAgentFunctions(
         supervisor_chat=supervisor_chat,
         session_id=ctx.room.name
     )
 
+    # Publish this call's load (loop lag, RSS, held calls, KB searches) for job acceptance
+    load_reporter = JobLoadReporter()
+    load_reporter.start()
+    fnc_ctx.load_reporter = load_reporter
+    ctx.add_shutdown_callback(load_reporter.stop)
+    ctx.add_shutdown_callback(fnc_ctx.cancel_speculative_request)
+
+    # Turns, KB hits and stage timings are buffered and written in batches, not per turn
+    recorder = CallRecorder(api_url, ctx.job.id, room_name=ctx.room.name)
+    recorder.start()
+    fnc_ctx.recorder = recorder
+
+    async def finish_call_records():
+        recorder.event("cost", fnc_ctx.turn_id, **await ledger.close())
+        await recorder.stop()
+
+    ctx.add_shutdown_callback(finish_call_records)
+
     # Initialize voice pipeline with Gemini
     logger.info("Initializing voice pipeline...")
 
-    # Create agent with base instructions and tools
-    # Instructions will be dynamically updated based on KB search results
-    agent = Agent(
-        instructions=BASE_SYSTEM_PROMPT,
-        tools=llm.find_function_tools(fnc_ctx),
+    # Stable, versioned prompt prefix: persona + compacted master context. It is
+    # registered with the prompt cache once per version, not rebuilt per turn
+    master_context = None
+    if kb_service.enabled:
+        master_context = await asyncio.to_thread(kb_service.get_master_business_context)
+    # Tool schemas are part of the prefix: a provider cache must declare them
+    agent_tools = llm.find_function_tools(fnc_ctx)
+    prompt_prefix = build_prefix(BASE_SYSTEM_PROMPT, master_context, tool_schemas(agent_tools))
+    prefix_handle = await get_prefix_cache().register(prompt_prefix)
+    llm_cache_kwargs = llm_cache_options(google.LLM, prefix_handle, has_tools=bool(agent_tools))
+    logger.info(
+        "Prompt prefix %s (~%d tokens, cache: %s)",
+        prompt_prefix.version, prompt_prefix.approx_tokens, prefix_handle.backend,
+        extra={"event": "prompt_prefix"},
+    )
+    recorder.event("prompt_prefix", version=prompt_prefix.version, backend=prefix_handle.backend)
+
+    # Create agent with the prefix as instructions (already held by the provider
+    # cache when the LLM is bound to it) and tools
+    agent = SalonAgent(
+        fnc_ctx=fnc_ctx,
+        fast_path=FastPathPolicy.from_env(),
+        instructions="" if llm_cache_kwargs else prompt_prefix.text,
+        tools=agent_tools,
     )
 
+    # Fixed utterances are synthesized once per process and replayed from memory
+    tts = deepgram.TTS(model=TTS_MODEL)
+    audio_cache = get_audio_cache(tts, f"deepgram/{TTS_MODEL}")
+    asyncio.create_task(audio_cache.prewarm())
+
     # Create agent session with models
-    # Note: VAD removed to reduce memory usage (Silero VAD uses ~300MB)
-    # LiveKit will use server-side voice detection instead
+    # Note: Silero VAD removed to reduce memory usage (~300MB). With LOCAL_VAD=1 the
+    # NumPy energy/spectral-flux detector in local_vad.py (a few hundred KB per call)
+    # drives turn detection locally; otherwise LiveKit uses server-side detection.
+    vad_options = {}
+    if os.getenv("LOCAL_VAD", "0") == "1":
+        import local_vad
+
+        vad_options = {"vad": local_vad.VAD.load(), "turn_detection": "vad"}
+
     session = AgentSession(
+        **vad_options,
         stt=deepgram.STT(model="nova-2-phonecall", language="en-US"),
         llm=google.LLM(
-            model="gemini-2.0-flash-exp",
+            # A provider cache is tied to the pinned model it was created for
+            model=PROMPT_CACHE_MODEL.removeprefix("models/") if llm_cache_kwargs else "gemini-2.0-flash-exp",
             api_key=os.getenv("GEMINI_API_KEY"),
             temperature=0.7,
+            **llm_cache_kwargs,
         ),
-        tts=deepgram.TTS(model="aura-asteria-en"),
+        tts=tts,
     )
 
+    fnc_ctx.session = session
+    fnc_ctx.audio_cache = audio_cache
+
     # Track conversation events with KB search integration
     @session.on("user_input_transcribed")
     def on_user_speech(event):
         transcript = event.transcript if hasattr(event, 'transcript') else str(event)
 
+        if not getattr(event, 'is_final', True):
+            logger.debug("Caller (interim): %s", transcript, extra={"event": "caller_interim"})
+            return
+
+        if fnc_ctx.on_hold:
+            return  # transcript that was already in flight when the hold started
+
+        fnc_ctx.turn_id = next_turn()
+        ledger.turn = fnc_ctx.turn_id
+        # Matches belong to one turn; short turns ("yes please") start no lookup
+        fnc_ctx.kb_lookup = None
+
+        # A new caller turn means the previous one was answered without escalating
+        if fnc_ctx.speculative_request is not None and fnc_ctx.active_tool_calls == 0:
+            asyncio.create_task(fnc_ctx.cancel_speculative_request())
+
         # Get confidence score if available
         confidence = getattr(event, 'confidence', None)
-        if confidence is not None:
-            logger.info(f"Caller: {transcript} (confidence: {confidence:.2f})")
-        else:
-            logger.info(f"Caller: {transcript}")
+        logger.info(
+            "Caller: %s", transcript,
+            extra={"event": "caller_transcript", "transcript": transcript, "stt_confidence": confidence},
+        )
 
         # Log low-confidence transcriptions
         if confidence and confidence < 0.7:
-            logger.warning(f"Low confidence transcription: '{transcript}' ({confidence:.2f})")
+            logger.warning(
+                "Low confidence transcription (%.2f)", confidence,
+                extra={"event": "low_confidence_transcript", "transcript": transcript},
+            )
 
         fnc_ctx.add_to_context("user", transcript)
+        recorder.turn("user", transcript, fnc_ctx.turn_id, sttConfidence=confidence)
 
         # Extract caller name from first message
         if fnc_ctx.caller_name == "Unknown":
@@ -365,27 +736,47 @@ async def entrypoint(ctx: JobContext):
                         potential_name = words[i + 1].strip(".,!?")
                         if potential_name and potential_name[0].isupper():
                             fnc_ctx.caller_name = potential_name
-                            logger.info(f"Caller name: {potential_name}")
+                            logger.info("Caller name: %s", potential_name, extra={"event": "caller_name"})
                             break
 
         # Search knowledge base for relevant information
         if kb_service.enabled and len(transcript.split()) > 2:  # Only search substantial queries
-            try:
-                logger.info(f"[KB SEARCH] Searching knowledge base for: {transcript}")
-                # Use context-aware search with conversation history
-                kb_results = kb_service.search_with_context(
+            fnc_ctx.kb_lookup = asyncio.create_task(search_kb(transcript))
+
+    async def search_kb(transcript: str) -> list:
+        """Look up the knowledge base for a caller turn and add the result to the conversation context"""
+        kb_results = []
+        turn_id = fnc_ctx.turn_id
+        count("kb_lookups")
+        try:
+            # Use context-aware search with conversation history
+            # Run off the event loop; concurrent identical lookups are coalesced by the service
+            started = time.perf_counter()
+            with load_reporter.searching():
+                _, kb_results = await asyncio.to_thread(
+                    kb_service.search_with_context,
                     query=transcript,
-                    conversation_history=fnc_ctx.conversation_context,
+                    conversation_history=list(fnc_ctx.conversation_context),
                     top_k=5
                 )
+            recorder.timing("kb_search", (time.perf_counter() - started) * 1000, turn_id)
+            recorder.kb_hit(transcript, kb_results, turn_id)
+
+            if kb_results:
+                top_match = kb_results[0]
+                logger.info(
+                    "[KB MATCH] %s (confidence: %s, score: %.3f)",
+                    top_match['question'][:50], top_match['confidence'], top_match['score'],
+                    extra={"event": "kb_search", "kb_id": top_match['id']},
+                )
+                if top_match['confidence'] != 'low':
+                    usage_counters.record(top_match['id'])
+                else:
+                    fnc_ctx.open_speculative_request(transcript)
 
-                if kb_results:
-                    top_match = kb_results[0]
-                    logger.info(f"[KB MATCH] {top_match['question'][:50]}... (confidence: {top_match['confidence']}, score: {top_match['score']:.3f})")
-
-                    # Build directive KB context based on confidence
-                    if top_match['confidence'] == 'high':
-                        kb_context = f"""
+                # Build directive KB context based on confidence
+                if top_match['confidence'] == 'high':
+                    kb_context = f"""
 KNOWLEDGE BASE - HIGH CONFIDENCE MATCH (score: {top_match['score']:.2f})
 [HIGH CONFIDENCE] USE THIS ANSWER DIRECTLY - This is highly accurate information:
 
@@ -393,8 +784,8 @@ Question: {top_match['question']}
 Answer: {top_match['answer']}
 
 Action: Answer the caller using this information. Do NOT escalate."""
-                    elif top_match['confidence'] == 'medium':
-                        kb_context = f"""
+                elif top_match['confidence'] == 'medium':
+                    kb_context = f"""
 KNOWLEDGE BASE - MEDIUM CONFIDENCE MATCH (score: {top_match['score']:.2f})
 [MEDIUM CONFIDENCE] USE AS GUIDANCE - This is likely relevant:
 
@@ -402,8 +793,8 @@ Question: {top_match['question']}
 Answer: {top_match['answer']}
 
 Action: Use this as a basis for your response. If the caller's question seems different, you may ask for clarification or escalate."""
-                    else:
-                        kb_context = f"""
+                else:
+                    kb_context = f"""
 KNOWLEDGE BASE - LOW CONFIDENCE MATCH (score: {top_match['score']:.2f})
 [LOW CONFIDENCE] ESCALATE RECOMMENDED - This match may not be relevant:
 
@@ -412,26 +803,39 @@ Answer: {top_match['answer']}
 
 Action: This is not a strong match. You should escalate to supervisor."""
 
-                    # Add additional matches if available
-                    if len(kb_results) > 1:
-                        kb_context += "\n\nRelated information also found:"
-                        for i, result in enumerate(kb_results[1:3], 2):
-                            kb_context += f"\n{i}. {result['question']}: {result['answer'][:80]}..."
+                # Add additional matches if available
+                if len(kb_results) > 1:
+                    kb_context += "\n\nRelated information also found:"
+                    for i, result in enumerate(kb_results[1:3], 2):
+                        kb_context += f"\n{i}. {result['question']}: {result['answer'][:80]}..."
 
-                    fnc_ctx.add_to_context("system", kb_context)
-                else:
-                    logger.info("[WARNING] No KB matches found")
-                    # Explicitly tell the LLM to escalate when no KB results
-                    fnc_ctx.add_to_context("system", "\n[WARNING] NO KNOWLEDGE BASE MATCHES - You should escalate this question to supervisor.")
+                fnc_ctx.add_to_context("system", kb_context)
+            else:
+                logger.info("[KB MATCH] No KB matches found", extra={"event": "kb_search"})
+                fnc_ctx.open_speculative_request(transcript)
+                # Explicitly tell the LLM to escalate when no KB results
+                fnc_ctx.add_to_context("system", "\n[WARNING] NO KNOWLEDGE BASE MATCHES - You should escalate this question to supervisor.")
 
-            except Exception as e:
-                logger.error(f"Error searching KB: {e}")
-
-    @session.on("speech_created")
-    def on_agent_speech(speech):
-        if hasattr(speech, 'text') and speech.text:
-            fnc_ctx.add_to_context("assistant", speech.text)
-            logger.info(f"Agent: {speech.text}")
+        except Exception as e:
+            logger.error("Error searching KB: %s", e, extra={"event": "kb_search_error"})
+
+        return kb_results
+
+    # Agent replies (LLM, fast path and session.say) are committed to the chat
+    # context as assistant messages; SpeechCreatedEvent carries no text
+    @session.on("conversation_item_added")
+    def on_agent_speech(event):
+        item = event.item
+        if getattr(item, "role", None) != "assistant":
+            return
+        text = item.text_content
+        if text:
+            fnc_ctx.add_to_context("assistant", text)
+            recorder.turn("assistant", text, fnc_ctx.turn_id)
+            logger.info("Agent: %s", text, extra={"event": "agent_speech"})
+
+    # LLM tokens, TTS characters and STT audio seconds
+    session.on("metrics_collected", ledger.on_metrics)
 
     @session.on("function_tools_executed")
     def on_function_executed(event):
@@ -440,17 +844,21 @@ Action: This is not a strong match. You should escalate to supervisor."""
     # Greet user when they connect
     greeted = False
 
+    def is_caller(participant) -> bool:
+        # Human participants, not agents (kind is an enum in current SDKs)
+        return participant.kind in ("standard", rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD)
+
     @ctx.room.on("participant_connected")
     def on_participant_connected(participant):
         nonlocal greeted
+        if is_caller(participant):
+            load_reporter.mark_active()
         # Only greet human participants (not the agent itself)
-        if not greeted and participant.kind == "standard":
+        if not greeted and is_caller(participant):
             greeted = True
-            logger.info(f"Participant connected: {participant.identity}, sending greeting")
-            # Schedule greeting to run asynchronously
-            asyncio.create_task(session.generate_reply(
-                instructions="Greet the caller warmly by saying: 'Hello! Thank you for calling Luxe Beauty Salon. I'm Bella. How may I help you today?'"
-            ))
+            logger.info("Participant connected: %s, sending greeting", participant.identity)
+            # Schedule greeting to run asynchronously (played from the audio cache)
+            asyncio.create_task(audio_cache.say(session, GREETING))
 
     # Start the agent session
     logger.info("Starting voice agent session")
@@ -459,12 +867,56 @@ Action: This is not a strong match. You should escalate to supervisor."""
     # Start session (this blocks until session ends)
     await session.start(agent=agent, room=ctx.room)
 
+    # A caller who joined before the agent raises no participant_connected
+    if any(is_caller(p) for p in ctx.room.remote_participants.values()):
+        load_reporter.mark_active()
+
     logger.info("Voice agent session ended")
 
 
+def start_worker_services():
+    """Main-process setup before cli.run_app (also timed by startup_profile.py)"""
+    # Serve KB lookups to job processes from the main worker process so calls
+    # share one client, master context and embedding cache (KB_IPC=1)
+    if os.getenv("KB_IPC", "0") == "1":
+        from shared_kb_cache import start_lookup_server
+
+        start_lookup_server()
+
+    # Rebuild the local KB snapshot (kb_snapshot.py) in a subprocess at boot and
+    # every KB_SNAPSHOT_REFRESH seconds, so job processes start from fresh data
+    from kb_snapshot import start_refresh
+
+    start_refresh()
+
+    # /metrics for Fly autoscaling (worker_load) and /ready with cached dependency latencies
+    from agent_http import start_http_server
+    from readiness import start_readiness_probes
+
+    start_readiness_probes()
+    start_http_server()
+
+    # With no calls running the load must sit well below the threshold
+    check_idle_load()
+
+
 if __name__ == "__main__":
+    start_worker_services()
+
+    # Logging is configured by cli.run_app, so report cold start directly
+    print(
+        f"[INFO] Worker startup: imports {(_IMPORT_DONE - _IMPORT_STARTED) * 1000:.0f} ms, "
+        f"{(time.perf_counter() - _IMPORT_STARTED) * 1000:.0f} ms before connecting",
+        flush=True,
+    )
+
+    # Stop accepting calls before audio quality drops: load combines event-loop
+    # lag, memory headroom, active/held calls and in-flight KB searches (see worker_load.py)
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            load_fnc=compute_load,
+            load_threshold=LOAD_THRESHOLD,
         )
     )
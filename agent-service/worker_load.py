@@ -0,0 +1,389 @@
+"""
+Load reporting for job acceptance and autoscaling
+
+The default LiveKit load function only looks at CPU, so a small VM (1 shared
+CPU, 256 MB) keeps accepting calls until audio degrades. Each job process
+publishes what actually hurts call quality into a shared-memory slot table:
+
+    pid, active calls, held calls, in-flight KB searches,
+    event-loop lag (ms), RSS (MB), last update time
+
+Memory is judged by the headroom left on the host (cgroup limit, else
+MemAvailable) rather than by summed RSS: forked job processes share most of
+their pages with the main process, so RSS totals overcount and an idle worker
+would already look full.
+
+The worker's main process folds the table into one number for
+WorkerOptions(load_fnc=compute_load, load_threshold=...) so the dispatcher
+routes new calls elsewhere first, and serves the same signals as Prometheus
+metrics on /metrics for Fly autoscaling.
+"""
+
+import os
+import time
+import struct
+import asyncio
+import logging
+import resource
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from shared_kb_cache import open_segment
+from agent_http import register_route
+
+logger = logging.getLogger(__name__)
+
+LOAD_SEGMENT = os.getenv("WORKER_LOAD_SHM", "worker-load")
+LOAD_THRESHOLD = float(os.getenv("WORKER_LOAD_THRESHOLD", "0.75"))
+
+# Budgets: a signal at its budget counts as full load (1.0)
+MAX_CALLS = int(os.getenv("WORKER_MAX_CALLS", "4"))
+# Free memory one more call needs; headroom at this size counts as full load
+CALL_MEMORY_MB = float(os.getenv("WORKER_CALL_MEMORY_MB", "48"))
+LOOP_LAG_BUDGET_MS = float(os.getenv("WORKER_LOOP_LAG_BUDGET_MS", "100"))
+MAX_INFLIGHT_SEARCHES = int(os.getenv("WORKER_MAX_INFLIGHT_SEARCHES", "8"))
+
+# A held call is mostly idle (no STT/LLM/TTS) but still owns a process
+HELD_CALL_WEIGHT = 0.5
+
+REPORT_INTERVAL = 0.5  # seconds
+STALE_AFTER = 5.0  # rows not updated for this long are ignored
+
+SLOTS = 64
+_MAGIC = 0x574B4C44  # "WKLD"
+_HEADER = struct.Struct("<II")  # magic, slots
+_COLUMNS = ("pid", "active", "held", "searches", "loop_lag_ms", "rss_mb", "updated")
+_COL = {name: i for i, name in enumerate(_COLUMNS)}
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024) if hasattr(os, "sysconf") else 4096 / (1024 * 1024)
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, not current
+
+
+def _read_number(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None  # "max" means no limit
+
+
+def memory_headroom_mb() -> Optional[float]:
+    """
+    Memory still available to this worker: the cgroup limit minus its usage
+    when one is set (containers), otherwise MemAvailable (a Fly VM's own memory)
+    """
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),  # cgroup v2
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),  # v1
+    ):
+        limit, usage = _read_number(limit_path), _read_number(usage_path)
+        # cgroup v1 reports "no limit" as a huge number rather than "max"
+        if limit is not None and usage is not None and limit < 1 << 60:
+            return max(0, limit - usage) / (1024 * 1024)
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class LoadTable:
+    """Per-process load rows in shared memory; each job process owns one row"""
+
+    def __init__(self, name: str = LOAD_SEGMENT, slots: int = SLOTS):
+        size = _HEADER.size + slots * len(_COLUMNS) * 8
+        self._segment, created = open_segment(name, size)
+        buf = self._segment.buf
+        if created:
+            _HEADER.pack_into(buf, 0, _MAGIC, slots)
+        magic, slots = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise RuntimeError(f"Shared segment {name} has an unexpected layout")
+        self.rows = np.ndarray((slots, len(_COLUMNS)), dtype=np.float64, buffer=buf, offset=_HEADER.size)
+
+    def claim(self, pid: int) -> Optional[int]:
+        """Find this pid's row, or take a free/stale one (linear probing from pid)"""
+        slots = len(self.rows)
+        now = time.time()
+        for i in range(slots):
+            slot = (pid + i) % slots
+            owner = int(self.rows[slot, _COL["pid"]])
+            if owner == pid:
+                return slot
+            if owner == 0 or (now - self.rows[slot, _COL["updated"]] > STALE_AFTER and not _pid_alive(owner)):
+                self.rows[slot] = 0
+                self.rows[slot, _COL["pid"]] = pid
+                if int(self.rows[slot, _COL["pid"]]) == pid:
+                    return slot
+        return None
+
+    def write(self, slot: int, pid: int, **values):
+        row = self.rows[slot]
+        if int(row[_COL["pid"]]) != pid:
+            return  # another process took over the row
+        for name, value in values.items():
+            row[_COL[name]] = value
+        row[_COL["updated"]] = time.time()
+
+    def release(self, slot: int, pid: int):
+        if int(self.rows[slot, _COL["pid"]]) == pid:
+            self.rows[slot] = 0
+
+    def live_rows(self) -> np.ndarray:
+        now = time.time()
+        rows = self.rows.copy()
+        rows = rows[(rows[:, _COL["pid"]] > 0) & (now - rows[:, _COL["updated"]] <= STALE_AFTER)]
+        return rows
+
+
+_table: Optional[LoadTable] = None
+_table_lock = threading.Lock()
+
+
+def _get_table() -> Optional[LoadTable]:
+    global _table
+    with _table_lock:
+        if _table is None:
+            try:
+                _table = LoadTable()
+            except Exception as e:
+                logger.warning("Worker load table unavailable: %s", e)
+                return None
+        return _table
+
+
+# ---------------------------------------------------------------------------
+# Job process side
+# ---------------------------------------------------------------------------
+
+class JobLoadReporter:
+    """Measures this job process's load and publishes it to the shared table"""
+
+    def __init__(self):
+        # A pooled room's job waits for its caller (room_pool.py); it only counts
+        # as an active call once a caller joins (mark_active)
+        self.active = 0
+        self.held_calls = 0
+        self.inflight_searches = 0
+        self.loop_lag_ms = 0.0
+        self._table = _get_table()
+        self._pid = os.getpid()
+        self._slot = self._table.claim(self._pid) if self._table else None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._slot is None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + REPORT_INTERVAL
+            await asyncio.sleep(REPORT_INTERVAL)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            # Smooth so one slow frame does not flip acceptance
+            self.loop_lag_ms = 0.7 * self.loop_lag_ms + 0.3 * lag_ms
+            self._publish()
+
+    def _publish(self):
+        self._table.write(
+            self._slot, self._pid,
+            active=self.active,
+            held=self.held_calls,
+            searches=self.inflight_searches,
+            loop_lag_ms=self.loop_lag_ms,
+            rss_mb=rss_mb(),
+        )
+
+    def mark_active(self):
+        """A caller joined: count this job as an active call"""
+        self.active = 1
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._slot is not None:
+            self._table.release(self._slot, self._pid)
+
+    @contextmanager
+    def holding(self):
+        """Mark the call as on hold (waiting for a supervisor)"""
+        self.held_calls += 1
+        try:
+            yield
+        finally:
+            self.held_calls -= 1
+
+    @contextmanager
+    def searching(self):
+        """Count a KB search as in flight"""
+        self.inflight_searches += 1
+        try:
+            yield
+        finally:
+            self.inflight_searches -= 1
+
+
+# ---------------------------------------------------------------------------
+# Main process side
+# ---------------------------------------------------------------------------
+
+_last_signals: Dict[str, float] = {}
+
+# Extra load signals owned by other modules (e.g. readiness): {name: fn() -> 0..1}
+_extra_components: Dict[str, Callable[[], float]] = {}
+
+
+def register_load_component(name: str, fn: Callable[[], float]):
+    """Include fn() (already relative to its budget) in the worker load"""
+    _extra_components[name] = fn
+
+
+# Extra Prometheus lines owned by other modules (e.g. cost_ledger)
+_extra_metrics: List[Callable[[], List[str]]] = []
+
+
+def register_metrics(fn: Callable[[], List[str]]):
+    """Append fn()'s exposition lines to /metrics"""
+    _extra_metrics.append(fn)
+
+
+def collect_signals() -> Dict[str, float]:
+    """Aggregate the live rows into host-wide signals, plus the memory headroom"""
+    table = _get_table()
+    rows = table.live_rows() if table else np.zeros((0, len(_COLUMNS)))
+    headroom = memory_headroom_mb()
+    return {
+        "active_calls": float(rows[:, _COL["active"]].sum()),
+        "held_calls": float(rows[:, _COL["held"]].sum()),
+        "inflight_searches": float(rows[:, _COL["searches"]].sum()),
+        "loop_lag_ms": float(rows[:, _COL["loop_lag_ms"]].max()) if len(rows) else 0.0,
+        # Reported only: shared pages are counted once per process
+        "rss_mb": float(rows[:, _COL["rss_mb"]].sum()) + rss_mb(),
+        "memory_headroom_mb": headroom if headroom is not None else float("inf"),
+    }
+
+
+def load_components(signals: Dict[str, float]) -> Dict[str, float]:
+    busy_calls = signals["active_calls"] - signals["held_calls"] * (1 - HELD_CALL_WEIGHT)
+    components = {
+        "calls": busy_calls / MAX_CALLS,
+        "memory": CALL_MEMORY_MB / max(signals["memory_headroom_mb"], 1.0),
+        "loop_lag": signals["loop_lag_ms"] / LOOP_LAG_BUDGET_MS,
+        "kb_searches": signals["inflight_searches"] / MAX_INFLIGHT_SEARCHES,
+    }
+    for name, fn in _extra_components.items():
+        try:
+            components[name] = fn()
+        except Exception as e:
+            logger.warning("Load component %s failed: %s", name, e)
+    return components
+
+
+def compute_load(worker=None) -> float:
+    """
+    LiveKit load function: the most saturated signal, clipped to [0, 1].
+    The worker stops taking jobs once this passes load_threshold.
+    """
+    signals = collect_signals()
+    components = load_components(signals)
+    load = min(1.0, max(0.0, *components.values()))
+
+    _last_signals.clear()
+    _last_signals.update(signals)
+    _last_signals.update({f"load_{name}": value for name, value in components.items()})
+    _last_signals["load"] = load
+    return load
+
+
+# An idle worker should sit well below the threshold, or it refuses every call
+IDLE_LOAD_LIMIT = LOAD_THRESHOLD / 2
+
+
+def check_idle_load() -> float:
+    """
+    Measure the load before any call is running and warn when it is not well
+    below the threshold (the budgets do not fit this host)
+    """
+    load = compute_load()
+    if load >= IDLE_LOAD_LIMIT:
+        saturated = max(
+            ((k[5:], v) for k, v in _last_signals.items() if k.startswith("load_")),
+            key=lambda item: item[1],
+        )
+        logger.warning(
+            "Idle worker load is %.2f (threshold %.2f), driven by %s=%.2f; "
+            "check the WORKER_* budgets for this host",
+            load, LOAD_THRESHOLD, saturated[0], saturated[1],
+        )
+    return load
+
+
+def metrics_handler():
+    """Prometheus text exposition of the load signals"""
+    compute_load()
+    s = _last_signals
+    lines = [
+        "# HELP agent_worker_load Combined worker load (0-1) used for job acceptance",
+        "# TYPE agent_worker_load gauge",
+        f"agent_worker_load {s['load']:.4f}",
+        "# HELP agent_worker_load_threshold Load above which new calls are routed elsewhere",
+        "# TYPE agent_worker_load_threshold gauge",
+        f"agent_worker_load_threshold {LOAD_THRESHOLD}",
+        "# HELP agent_worker_load_component Load per signal, relative to its budget",
+        "# TYPE agent_worker_load_component gauge",
+    ]
+    for key in [k for k in s if k.startswith("load_")]:
+        lines.append(f'agent_worker_load_component{{signal="{key[5:]}"}} {s[key]:.4f}')
+    lines += [
+        "# TYPE agent_active_calls gauge",
+        f"agent_active_calls {s['active_calls']:.0f}",
+        "# TYPE agent_held_calls gauge",
+        f"agent_held_calls {s['held_calls']:.0f}",
+        "# TYPE agent_inflight_kb_searches gauge",
+        f"agent_inflight_kb_searches {s['inflight_searches']:.0f}",
+        "# TYPE agent_event_loop_lag_ms gauge",
+        f"agent_event_loop_lag_ms {s['loop_lag_ms']:.1f}",
+        "# TYPE agent_rss_mb gauge",
+        f"agent_rss_mb {s['rss_mb']:.1f}",
+    ]
+    if s["memory_headroom_mb"] != float("inf"):
+        lines += [
+            "# TYPE agent_memory_headroom_mb gauge",
+            f"agent_memory_headroom_mb {s['memory_headroom_mb']:.1f}",
+        ]
+    for fn in _extra_metrics:
+        try:
+            lines += fn()
+        except Exception as e:
+            logger.warning("Metrics provider failed: %s", e)
+    return 200, "text/plain; version=0.0.4", "\n".join(lines) + "\n"
+
+
+register_route("/metrics", metrics_handler)
@@ -0,0 +1,27 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getCallRecord } from '@/lib/firebase/callSessions';
+
+// GET /api/calls/[id] - Recorded events of a call, in order (for replay and tuning)
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { id } = await params;
+    const events = await getCallRecord(id);
+
+    return NextResponse.json({
+      success: true,
+      data: { callId: id, events },
+    });
+  } catch (error: any) {
+    console.error('Error fetching call record:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: error.message || 'Failed to fetch call record',
+      },
+      { status: 500 }
+    );
+  }
+}
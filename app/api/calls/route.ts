@@ -0,0 +1,41 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { gunzipSync } from 'zlib';
+import { appendCallRecordBatch } from '@/lib/firebase/callSessions';
+import { CallRecordBatch } from '@/lib/types';
+
+// POST /api/calls - Write-behind batch of call events from the voice agent
+// (gzip-compressed JSON when Content-Encoding: gzip)
+export async function POST(request: NextRequest) {
+  try {
+    const raw = Buffer.from(await request.arrayBuffer());
+    const body =
+      request.headers.get('content-encoding') === 'gzip' ? gunzipSync(raw).toString('utf8') : raw.toString('utf8');
+    const input = JSON.parse(body) as CallRecordBatch;
+
+    if (!input.callId || !Number.isInteger(input.seq) || !Array.isArray(input.events)) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'callId, seq and events are required',
+        },
+        { status: 400 }
+      );
+    }
+
+    await appendCallRecordBatch(input);
+
+    return NextResponse.json({
+      success: true,
+      data: { callId: input.callId, seq: input.seq, events: input.events.length },
+    });
+  } catch (error: any) {
+    console.error('Error recording call events:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: error.message || 'Failed to record call events',
+      },
+      { status: 500 }
+    );
+  }
+}
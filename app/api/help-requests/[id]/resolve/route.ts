@@ -1,8 +1,11 @@
-import { NextRequest, NextResponse } from 'next/server';
+import { NextRequest, NextResponse, after } from 'next/server';
 import { resolveHelpRequest } from '@/lib/firebase/helpRequests';
-import { createKnowledgeBaseEntry } from '@/lib/firebase/knowledgeBase';
-import { upsertKnowledgeBase } from '@/lib/pinecone/operations';
 import { serializeHelpRequest } from '@/lib/firebase/serialize';
+import { processDueJobs, runJobs } from '@/lib/jobs/queue';
+import { enqueueResolvePipeline, HELP_REQUEST_JOB_HANDLERS } from '@/lib/jobs/helpRequestPipeline';
+
+// Due jobs drained after each resolve, on top of its own pipeline
+const RESOLVE_DUE_JOBS_LIMIT = 5;
 
 export async function POST(
   request: NextRequest,
@@ -29,54 +32,22 @@ export async function POST(
 
     console.log(`[SUCCESS] Help request ${id} resolved successfully. Status: ${helpRequest.status}`);
 
-    // Add to knowledge base (Firebase)
-    const knowledgeEntry = await createKnowledgeBaseEntry({
-      question: helpRequest.question,
-      answer: body.supervisorResponse,
-      type: 'learned_answer',
-      learnedFromRequestId: id,
-      tags: body.tags || [],
-      isActive: true,
-    });
-
-    // Also add to Pinecone for semantic search
-    try {
-      await upsertKnowledgeBase({
-        id: knowledgeEntry.id,
-        question: knowledgeEntry.question,
-        answer: knowledgeEntry.answer,
-        type: 'learned_answer',
-        tags: knowledgeEntry.tags,
-        isActive: true,
-      });
-      console.log(`[SUCCESS] Knowledge entry ${knowledgeEntry.id} synced to Pinecone`);
-    } catch (pineconeError) {
-      console.error('Error syncing to Pinecone:', pineconeError);
-      // Continue even if Pinecone sync fails
-    }
+    // Learning the answer (KB entry + Pinecone upsert) and the caller
+    // follow-ups run from the durable job queue after the response is sent
+    const jobIds = await enqueueResolvePipeline(helpRequest, body.supervisorResponse, body.tags || []);
+    after(async () => {
+      const result = await runJobs(jobIds, HELP_REQUEST_JOB_HANDLERS);
+      console.log(`[INFO] Resolve pipeline for ${id}: ${result.succeeded}/${jobIds.length} jobs done, ${result.retried} queued for retry`);
 
-    // Trigger caller follow-up webhook
-    try {
-      const followupUrl = `${process.env.NEXT_PUBLIC_APP_URL}/api/webhooks/caller-followup`;
-      await fetch(followupUrl, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          requestId: id,
-          callerPhone: helpRequest.callerPhone,
-          supervisorResponse: body.supervisorResponse,
-          timestamp: new Date().toISOString(),
-        }),
-      });
-    } catch (webhookError) {
-      console.error('Error calling followup webhook:', webhookError);
-      // Continue even if webhook fails
-    }
+      // Also pick up earlier jobs whose retry is due (the jobs-cron service
+      // covers quiet periods with no resolves)
+      await processDueJobs(HELP_REQUEST_JOB_HANDLERS, RESOLVE_DUE_JOBS_LIMIT);
+    });
 
     return NextResponse.json({
       success: true,
       data: serializeHelpRequest(helpRequest),
-      message: 'Help request resolved and added to knowledge base',
+      message: 'Help request resolved; knowledge base update and follow-up queued',
     });
   } catch (error) {
     console.error('Error resolving help request:', error);
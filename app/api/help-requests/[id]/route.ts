@@ -1,6 +1,11 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { getHelpRequest } from '@/lib/firebase/helpRequests';
+import {
+  getHelpRequest,
+  confirmSpeculativeHelpRequest,
+  cancelSpeculativeHelpRequest,
+} from '@/lib/firebase/helpRequests';
 import { serializeHelpRequest } from '@/lib/firebase/serialize';
+import { notifySupervisor } from '@/lib/jobs/helpRequestPipeline';
 
 // Disable caching for real-time polling
 export const dynamic = 'force-dynamic';
@@ -49,3 +54,89 @@ export async function GET(
     );
   }
 }
+
+// PATCH /api/help-requests/[id] - Confirm a speculative request ({ speculative: false })
+export async function PATCH(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { id } = await params;
+    const body = await request.json();
+
+    if (body.speculative !== false) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'Only { speculative: false } is supported',
+        },
+        { status: 400 }
+      );
+    }
+
+    const result = await confirmSpeculativeHelpRequest(id);
+    if (!result) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'Help request not found',
+        },
+        { status: 404 }
+      );
+    }
+
+    // The supervisor hears about a speculative request once it is real, unless
+    // a caller who escalated for real attached (and notified) earlier
+    if (result.confirmed && (result.helpRequest.attachedCallers || []).length === 0) {
+      await notifySupervisor(result.helpRequest);
+    }
+
+    return NextResponse.json({
+      success: true,
+      data: serializeHelpRequest(result.helpRequest),
+    });
+  } catch (error) {
+    console.error('Error confirming help request:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: 'Failed to confirm help request',
+      },
+      { status: 500 }
+    );
+  }
+}
+
+// DELETE /api/help-requests/[id] - Cancel a speculative request the agent did not need
+export async function DELETE(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  try {
+    const { id } = await params;
+    const outcome = await cancelSpeculativeHelpRequest(id);
+
+    if (outcome === 'cancelled') {
+      console.log(`[INFO] Cancelled speculative help request ${id}`);
+    } else if (outcome === 'handed_over') {
+      // The supervisor was notified when that caller attached
+      console.log(`[INFO] Speculative help request ${id} handed over to its first attached caller`);
+    }
+
+    return NextResponse.json({
+      success: true,
+      // The caller is off the request either way
+      cancelled: outcome !== 'kept',
+      handedOver: outcome === 'handed_over',
+    });
+  } catch (error) {
+    console.error('Error cancelling help request:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: 'Failed to cancel help request',
+      },
+      { status: 500 }
+    );
+  }
+}
@@ -1,24 +1,53 @@
-import { NextResponse } from 'next/server';
-import { getPendingHelpRequests } from '@/lib/firebase/helpRequests';
+import { NextRequest, NextResponse } from 'next/server';
+import {
+  getPendingHelpRequests,
+  getHelpRequestChangesSince,
+} from '@/lib/firebase/helpRequests';
 import { serializeHelpRequest } from '@/lib/firebase/serialize';
 
-export async function GET() {
+// Disable caching for real-time polling
+export const dynamic = 'force-dynamic';
+
+// GET /api/help-requests/pending?limit=50&cursor=... - Pending queue, oldest first
+// GET /api/help-requests/pending?since=<cursor>        - Only what changed since the last poll
+export async function GET(request: NextRequest) {
   try {
-    const requests = await getPendingHelpRequests();
+    const { searchParams } = new URL(request.url);
+    const since = searchParams.get('since');
+
+    if (since) {
+      const changes = await getHelpRequestChangesSince(since);
+      return NextResponse.json({
+        success: true,
+        data: changes.changed.map(serializeHelpRequest),
+        removedIds: changes.removedIds,
+        cursor: changes.cursor,
+        hasMore: changes.hasMore,
+      });
+    }
+
+    // Taken before the read, so changes racing with it are replayed by the next `since` poll
+    const changesCursor = new Date().toISOString();
+    const page = await getPendingHelpRequests({
+      limit: Number(searchParams.get('limit')) || undefined,
+      cursor: searchParams.get('cursor') || undefined,
+    });
 
     // Serialize Firestore Timestamps to ISO strings for JSON response
-    const serializedRequests = requests.map(serializeHelpRequest);
+    const serializedRequests = page.requests.map(serializeHelpRequest);
 
     return NextResponse.json({
       success: true,
       data: serializedRequests,
+      nextCursor: page.nextCursor,
+      cursor: changesCursor,
     });
-  } catch (error) {
+  } catch (error: any) {
     console.error('Error fetching pending help requests:', error);
     return NextResponse.json(
       {
         success: false,
-        error: 'Failed to fetch pending help requests',
+        error: error.message || 'Failed to fetch pending help requests',
       },
       { status: 500 }
     );
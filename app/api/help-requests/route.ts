@@ -1,18 +1,21 @@
 import { NextRequest, NextResponse } from 'next/server';
-import {
-  createHelpRequest,
-  getAllHelpRequests,
-} from '@/lib/firebase/helpRequests';
+import { createOrAttachHelpRequest, getAllHelpRequests } from '@/lib/firebase/helpRequests';
 import { CreateHelpRequestInput } from '@/lib/types';
 import { serializeHelpRequest } from '@/lib/firebase/serialize';
+import { notifySupervisor } from '@/lib/jobs/helpRequestPipeline';
 
-export async function GET() {
+// GET /api/help-requests?limit=50&cursor=... - Newest first, one page at a time
+export async function GET(request: NextRequest) {
   try {
-    const requests = await getAllHelpRequests();
-    const serializedRequests = requests.map(serializeHelpRequest);
+    const { searchParams } = new URL(request.url);
+    const page = await getAllHelpRequests({
+      limit: Number(searchParams.get('limit')) || undefined,
+      cursor: searchParams.get('cursor') || undefined,
+    });
     return NextResponse.json({
       success: true,
-      data: serializedRequests,
+      data: page.requests.map(serializeHelpRequest),
+      nextCursor: page.nextCursor,
     });
   } catch (error) {
     console.error('Error fetching help requests:', error);
@@ -41,28 +44,45 @@ export async function POST(request: NextRequest) {
       );
     }
 
-    const helpRequest = await createHelpRequest(body);
+    // Coalesce concurrent near-identical escalations: attach this caller to the
+    // pending request so the supervisor answers once and every caller gets it
+    const { helpRequest, outcome } = await createOrAttachHelpRequest(body);
+
+    if (outcome === 'duplicate') {
+      // A speculative request must not attach: if the agent never escalates,
+      // the caller would stay on another call's request and get its follow-up.
+      // The agent attaches when (and if) it escalates for real.
+      return NextResponse.json({
+        success: true,
+        data: serializeHelpRequest(helpRequest),
+        attached: false,
+        duplicate: true,
+      });
+    }
+    if (outcome === 'attached') {
+      console.log(`[INFO] Attached caller ${body.callerPhone} to pending help request ${helpRequest.id}`);
+
+      // First real escalation on a speculative request: the supervisor has
+      // not been told yet, and this caller is waiting
+      if (helpRequest.speculative && (helpRequest.attachedCallers || []).length === 1) {
+        await notifySupervisor({
+          ...helpRequest,
+          callerPhone: body.callerPhone,
+          callerName: body.callerName,
+          speculative: false,
+        });
+      }
 
-    // Trigger supervisor notification webhook
-    try {
-      const webhookUrl = process.env.SUPERVISOR_WEBHOOK_URL || '';
-      await fetch(webhookUrl, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          requestId: helpRequest.id,
-          question: helpRequest.question,
-          callerPhone: helpRequest.callerPhone,
-          callerName: helpRequest.callerName,
-          context: helpRequest.context,
-          timestamp: new Date().toISOString(),
-        }),
+      return NextResponse.json({
+        success: true,
+        data: serializeHelpRequest(helpRequest),
+        attached: true,
       });
-    } catch (webhookError) {
-      console.error('Error calling supervisor webhook:', webhookError);
-      // Continue even if webhook fails
     }
 
+    // Trigger supervisor notification webhook (skipped while speculative)
+    await notifySupervisor(helpRequest);
+
     return NextResponse.json(
       {
         success: true,
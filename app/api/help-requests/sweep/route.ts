@@ -0,0 +1,29 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { markTimedOutRequests } from '@/lib/firebase/helpRequests';
+
+// POST /api/help-requests/sweep - Mark stale pending requests as unresolved.
+// Bounded work per call; repeat while `done` is false (e.g. from a cron job).
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json().catch(() => ({}));
+    const timeoutHours = Number(body.timeoutHours) || 24;
+    const maxBatches = Number(body.maxBatches) || undefined;
+
+    const result = await markTimedOutRequests(timeoutHours, maxBatches);
+    console.log(`[INFO] Timeout sweep marked ${result.updated} help requests unresolved (done: ${result.done})`);
+
+    return NextResponse.json({
+      success: true,
+      data: result,
+    });
+  } catch (error: any) {
+    console.error('Error sweeping timed-out help requests:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: error.message || 'Failed to sweep timed-out help requests',
+      },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,36 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { processDueJobs } from '@/lib/jobs/queue';
+import { HELP_REQUEST_JOB_HANDLERS } from '@/lib/jobs/helpRequestPipeline';
+
+// POST /api/jobs - Run due background jobs: retries whose backoff has passed
+// and jobs whose worker died mid-run. Bounded work per call.
+//
+// Triggers: the `jobs-cron` service in docker-compose.yml calls this every
+// JOBS_CRON_INTERVAL seconds (default 60), and every resolve also drains a
+// few due jobs after its response (app/api/help-requests/[id]/resolve).
+// Deployments without docker-compose need an equivalent scheduled POST.
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json().catch(() => ({}));
+    const limit = Number(body.limit) || undefined;
+
+    const result = await processDueJobs(HELP_REQUEST_JOB_HANDLERS, limit);
+    console.log(
+      `[INFO] Job run: ${result.claimed} claimed, ${result.succeeded} done, ${result.retried} retrying, ${result.failed} failed`
+    );
+
+    return NextResponse.json({
+      success: true,
+      data: result,
+    });
+  } catch (error: any) {
+    console.error('Error processing jobs:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: error.message || 'Failed to process jobs',
+      },
+      { status: 500 }
+    );
+  }
+}
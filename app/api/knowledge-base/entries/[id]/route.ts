@@ -5,6 +5,7 @@ import {
   deleteKnowledgeBaseEntry,
 } from '@/lib/firebase/knowledgeBase';
 import { upsertKnowledgeBase, deleteKnowledgeBase } from '@/lib/pinecone/operations';
+import { recordEntrySynced } from '@/lib/pinecone/reconcile';
 import { UpdateKnowledgeBaseEntryInput } from '@/lib/types';
 
 // GET /api/knowledge-base/entries/[id] - Get single entry
@@ -65,6 +66,7 @@ export async function PUT(
           tags: updatedEntry.tags,
           isActive: updatedEntry.isActive,
         });
+        await recordEntrySynced(updatedEntry);
       } catch (pineconeError) {
         console.error('Error updating in Pinecone:', pineconeError);
       }
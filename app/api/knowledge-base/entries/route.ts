@@ -4,6 +4,7 @@ import {
   getAllKnowledgeBaseEntries,
 } from '@/lib/firebase/knowledgeBase';
 import { upsertKnowledgeBase } from '@/lib/pinecone/operations';
+import { recordEntrySynced } from '@/lib/pinecone/reconcile';
 import { CreateKnowledgeBaseEntryInput } from '@/lib/types';
 
 // GET /api/knowledge-base/entries - Get all entries
@@ -56,6 +57,7 @@ export async function POST(request: NextRequest) {
         tags: entry.tags,
         isActive: entry.isActive,
       });
+      await recordEntrySynced(entry);
     } catch (pineconeError) {
       console.error('Error upserting to Pinecone:', pineconeError);
       // Continue even if Pinecone fails - entry is in Firebase
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { searchKnowledgeBase, getConfidenceLevel } from '@/lib/pinecone/operations';
-import { incrementUsageCount } from '@/lib/firebase/knowledgeBase';
+import { getKnowledgeBaseEntry, incrementUsageCount } from '@/lib/firebase/knowledgeBase';
+import { findExactIndexedEntry } from '@/lib/firebase/knowledgeBaseIndex';
 
 export async function POST(request: NextRequest) {
   try {
@@ -16,6 +17,28 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // Exact question/variation hit from the index: two reads, no embedding or vector query
+    if (!filterTags || filterTags.length === 0) {
+      const exactId = await findExactIndexedEntry(query);
+      const exactEntry = exactId ? await getKnowledgeBaseEntry(exactId) : null;
+      if (exactEntry && exactEntry.isActive) {
+        const topResult = { entry: exactEntry, score: 1, confidence: getConfidenceLevel(1) };
+        try {
+          await incrementUsageCount(exactEntry.id);
+        } catch (error) {
+          console.error('Error incrementing usage count:', error);
+        }
+        return NextResponse.json({
+          success: true,
+          data: {
+            query,
+            results: [topResult],
+            topResult,
+          },
+        });
+      }
+    }
+
     // Build filter for Pinecone
     const filter: Record<string, any> = { isActive: true };
     if (filterTags && Array.isArray(filterTags) && filterTags.length > 0) {
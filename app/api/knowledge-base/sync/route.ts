@@ -1,11 +1,19 @@
-import { NextResponse } from 'next/server';
+import { NextRequest, NextResponse } from 'next/server';
 import { getAllKnowledgeBaseEntries } from '@/lib/firebase/knowledgeBase';
-import { batchUpsertKnowledgeBase } from '@/lib/pinecone/operations';
+import { rebuildKnowledgeBaseIndex } from '@/lib/firebase/knowledgeBaseIndex';
+import { reconcileKnowledgeBase } from '@/lib/pinecone/reconcile';
 
 // POST /api/knowledge-base/sync - Sync Firebase to Pinecone
-export async function POST() {
+// Only new/changed entries are embedded; see lib/pinecone/reconcile.ts.
+//   ?full=1          re-embed every entry
+//   ?rebuildIndex=1  also rebuild the Firestore search index
+export async function POST(request: NextRequest) {
   try {
-    console.log('Starting sync from Firebase to Pinecone...');
+    const { searchParams } = new URL(request.url);
+    const full = searchParams.get('full') === '1';
+    const rebuildIndex = searchParams.get('rebuildIndex') === '1';
+
+    console.log(`Starting ${full ? 'full' : 'incremental'} sync from Firebase to Pinecone...`);
 
     // Get all entries from Firebase
     const entries = await getAllKnowledgeBaseEntries();
@@ -18,25 +26,23 @@ export async function POST() {
       });
     }
 
-    // Prepare entries for Pinecone
-    const pineconeEntries = entries.map((entry) => ({
-      id: entry.id,
-      question: entry.question,
-      answer: entry.answer,
-      type: entry.type,
-      tags: entry.tags,
-      isActive: entry.isActive,
-    }));
+    const result = await reconcileKnowledgeBase(entries, { full });
 
-    // Batch upsert to Pinecone
-    await batchUpsertKnowledgeBase(pineconeEntries);
+    console.log(
+      `Sync complete: ${result.created.length} new, ${result.changed.length} changed, ` +
+        `${result.metadataOnly.length} metadata-only, ${result.deleted.length} deleted, ` +
+        `${result.unchanged} unchanged (${result.embedded} embedded)`
+    );
 
-    console.log(`Successfully synced ${entries.length} entries to Pinecone`);
+    if (rebuildIndex) {
+      await rebuildKnowledgeBaseIndex(entries);
+    }
 
     return NextResponse.json({
       success: true,
       message: 'Successfully synced entries to Pinecone',
       count: entries.length,
+      data: result,
     });
   } catch (error: any) {
     console.error('Error syncing to Pinecone:', error);
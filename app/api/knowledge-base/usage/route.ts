@@ -0,0 +1,35 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { incrementUsageCounts } from '@/lib/firebase/knowledgeBase';
+
+// POST /api/knowledge-base/usage - Batched KB hit counts from the voice agent
+export async function POST(request: NextRequest) {
+  try {
+    const { counts } = await request.json();
+
+    if (!counts || typeof counts !== 'object' || Array.isArray(counts)) {
+      return NextResponse.json(
+        {
+          success: false,
+          error: 'counts is required and must be an object of entry id to hit count',
+        },
+        { status: 400 }
+      );
+    }
+
+    const updated = await incrementUsageCounts(counts);
+
+    return NextResponse.json({
+      success: true,
+      data: { updated },
+    });
+  } catch (error: any) {
+    console.error('Error recording knowledge base usage:', error);
+    return NextResponse.json(
+      {
+        success: false,
+        error: error.message || 'Failed to record knowledge base usage',
+      },
+      { status: 500 }
+    );
+  }
+}
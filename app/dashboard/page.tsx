@@ -1,27 +1,75 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { HelpRequest } from '@/lib/types';
 import { RequestCard } from '@/components/dashboard/RequestCard';
 
+const byCreatedAt = (a: HelpRequest, b: HelpRequest) =>
+  String(a.createdAt).localeCompare(String(b.createdAt));
+
 export default function DashboardPage() {
   const [requests, setRequests] = useState<HelpRequest[]>([]);
   const [loading, setLoading] = useState(true);
   const [lastUpdate, setLastUpdate] = useState<Date>(new Date());
+  // Change cursor from the last poll; null until the initial load completes
+  const cursorRef = useRef<string | null>(null);
 
   useEffect(() => {
+    // Initial load: every page of the pending queue
+    const loadPending = async () => {
+      const loaded: HelpRequest[] = [];
+      let pageCursor: string | null = null;
+      let changesCursor: string | null = null;
+      do {
+        const query: string = pageCursor ? `?cursor=${encodeURIComponent(pageCursor)}` : '';
+        const response = await fetch(`/api/help-requests/pending${query}`);
+        const data = await response.json();
+        if (!data.success) {
+          throw new Error(data.error);
+        }
+        loaded.push(...data.data);
+        changesCursor = changesCursor || data.cursor;
+        pageCursor = data.nextCursor;
+      } while (pageCursor);
+
+      setRequests(loaded);
+      cursorRef.current = changesCursor;
+    };
+
+    // Afterwards: only what changed since the last poll
+    const fetchChanges = async () => {
+      let hasMore = true;
+      while (hasMore) {
+        const response = await fetch(
+          `/api/help-requests/pending?since=${encodeURIComponent(cursorRef.current!)}`
+        );
+        const data = await response.json();
+        if (!data.success) {
+          throw new Error(data.error);
+        }
+
+        const changed: HelpRequest[] = data.data;
+        const removed = new Set<string>([...data.removedIds, ...changed.map((r) => r.id)]);
+        setRequests((current) =>
+          current
+            .filter((r) => !removed.has(r.id))
+            .concat(changed.filter((r) => r.status === 'pending'))
+            .sort(byCreatedAt)
+        );
+        cursorRef.current = data.cursor;
+        hasMore = data.hasMore;
+      }
+    };
+
     // Fetch pending requests via API
     const fetchRequests = async () => {
       try {
-        const response = await fetch('/api/help-requests/pending');
-        const data = await response.json();
-
-        if (data.success) {
-          setRequests(data.data);
-          setLastUpdate(new Date());
+        if (cursorRef.current) {
+          await fetchChanges();
         } else {
-          console.error('Failed to fetch requests:', data.error);
+          await loadPending();
         }
+        setLastUpdate(new Date());
       } catch (error) {
         console.error('Error fetching pending requests:', error);
       } finally {
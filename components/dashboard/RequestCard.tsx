@@ -118,7 +118,17 @@ export function RequestCard({ request, onResolve }: RequestCardProps) {
       {/* Header Section */}
       <div className="bg-gradient-to-r from-blue-50 to-indigo-50 px-6 py-4 border-b border-gray-200">
         <div className="flex items-center justify-between mb-3">
-          {getStatusBadge()}
+          <div className="flex items-center gap-2">
+            {getStatusBadge()}
+            {request.speculative && request.status === 'pending' && (
+              <span
+                className="inline-flex items-center px-3 py-1 rounded-full text-xs font-semibold bg-sky-100 text-sky-800"
+                title="Opened early on a low-confidence KB lookup; the agent may still answer without you"
+              >
+                Likely escalation
+              </span>
+            )}
+          </div>
           <div className="flex items-center gap-2 text-sm text-gray-600">
             <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
               <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" />
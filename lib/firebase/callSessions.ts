@@ -0,0 +1,56 @@
+import { adminDb } from './admin';
+import { CallRecordBatch, CallRecordEvent, CallSessionStatus } from '../types';
+import { FieldValue, Timestamp } from 'firebase-admin/firestore';
+
+const COLLECTION_NAME = 'callSessions';
+const RECORDS_SUBCOLLECTION = 'records';
+
+/**
+ * Store one write-behind batch from the agent. Batches are keyed by sequence
+ * number, so a retried batch overwrites itself instead of duplicating events.
+ * One batched write per call: the record document plus the session summary.
+ */
+export async function appendCallRecordBatch(input: CallRecordBatch): Promise<void> {
+  const sessionRef = adminDb.collection(COLLECTION_NAME).doc(input.callId);
+  const batchRef = sessionRef.collection(RECORDS_SUBCOLLECTION).doc(String(input.seq).padStart(6, '0'));
+
+  const session: Record<string, unknown> = {
+    livekitRoomName: input.roomName || input.callId,
+    startTime: Timestamp.fromMillis(Math.round(input.startedAt * 1000)),
+    recordBatches: FieldValue.increment(1),
+  };
+  if (input.final) {
+    session.status = 'completed' as CallSessionStatus;
+    session.endTime = FieldValue.serverTimestamp();
+    if (input.summary) {
+      session.summary = input.summary;
+    }
+  } else {
+    session.status = 'active' as CallSessionStatus;
+  }
+
+  const existing = await batchRef.get();
+  const batch = adminDb.batch();
+  batch.set(batchRef, {
+    seq: input.seq,
+    events: input.events,
+    receivedAt: FieldValue.serverTimestamp(),
+  });
+  if (existing.exists) {
+    delete session.recordBatches; // retry of a batch we already counted
+  }
+  batch.set(sessionRef, session, { merge: true });
+  await batch.commit();
+}
+
+// All events of a call in order, for replay
+export async function getCallRecord(callId: string): Promise<CallRecordEvent[]> {
+  const snapshot = await adminDb
+    .collection(COLLECTION_NAME)
+    .doc(callId)
+    .collection(RECORDS_SUBCOLLECTION)
+    .orderBy('seq', 'asc')
+    .get();
+
+  return snapshot.docs.flatMap((doc) => (doc.data().events || []) as CallRecordEvent[]);
+}
@@ -3,10 +3,50 @@ import {
   HelpRequest,
   CreateHelpRequestInput,
   HelpRequestStatus,
+  AttachedCaller,
 } from '../types';
-import { FieldValue } from 'firebase-admin/firestore';
+import { createHash } from 'crypto';
+import { FieldPath, FieldValue, Timestamp } from 'firebase-admin/firestore';
 
 const COLLECTION_NAME = 'helpRequests';
+// Deleted (cancelled speculative) requests, so incremental fetches can drop them
+const DELETIONS_COLLECTION = 'helpRequestDeletions';
+// One document per normalized question, pointing at its latest request; the
+// escalation transaction locks it so concurrent duplicates are serialized
+const PENDING_QUESTIONS_COLLECTION = 'pendingQuestions';
+
+export const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+// Firestore batches are limited to 500 writes
+const BATCH_LIMIT = 400;
+
+export interface HelpRequestPage {
+  requests: HelpRequest[];
+  nextCursor: string | null; // pass back as `cursor` for the next page
+}
+
+export interface HelpRequestChanges {
+  changed: HelpRequest[]; // created or updated since the cursor, any status
+  removedIds: string[]; // deleted since the cursor
+  cursor: string; // pass back as `since` on the next poll
+  hasMore: boolean; // more changes than fit in one response; poll again right away
+}
+
+export interface TimeoutSweepResult {
+  updated: number;
+  done: boolean; // false when the write budget ran out; call again to resume
+}
+
+// Lowercase, strip punctuation and collapse whitespace so that near-identical
+// questions from different callers map to the same key
+export function normalizeQuestion(question: string): string {
+  return question
+    .toLowerCase()
+    .replace(/[^a-z0-9\s]/g, ' ')
+    .replace(/\s+/g, ' ')
+    .trim();
+}
 
 export async function createHelpRequest(
   input: CreateHelpRequestInput
@@ -21,6 +61,10 @@ export async function createHelpRequest(
     createdAt: FieldValue.serverTimestamp() as any,
     sessionId: input.sessionId,
     context: input.context,
+    normalizedQuestion: normalizeQuestion(input.question),
+    attachedCallers: [],
+    speculative: input.speculative || false,
+    updatedAt: FieldValue.serverTimestamp() as any,
   };
 
   await docRef.set(helpRequest);
@@ -45,29 +89,312 @@ export async function getHelpRequest(id: string): Promise<HelpRequest | null> {
   } as HelpRequest;
 }
 
-export async function getAllHelpRequests(): Promise<HelpRequest[]> {
-  const snapshot = await adminDb
+function clampPageSize(limit?: number): number {
+  return Math.min(Math.max(1, Math.floor(limit || DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE);
+}
+
+// Opaque page cursor: createdAt seconds + nanoseconds + document id of the
+// last row. Full precision matters: serverTimestamp stores microseconds, and a
+// cursor rounded to millis sorts before the row it came from, repeating it
+function encodeCursor(doc: FirebaseFirestore.QueryDocumentSnapshot): string {
+  const createdAt = doc.get('createdAt') as Timestamp | undefined;
+  return Buffer.from(
+    JSON.stringify([createdAt?.seconds ?? 0, createdAt?.nanoseconds ?? 0, doc.id])
+  ).toString('base64url');
+}
+
+function decodeCursor(cursor: string): [Timestamp, string] {
+  let position: unknown;
+  try {
+    position = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+  } catch {
+    throw new Error('Invalid cursor');
+  }
+  if (
+    !Array.isArray(position) ||
+    position.length !== 3 ||
+    !Number.isInteger(position[0]) ||
+    !Number.isInteger(position[1]) ||
+    typeof position[2] !== 'string'
+  ) {
+    throw new Error('Invalid cursor');
+  }
+  const [seconds, nanoseconds, id] = position as [number, number, string];
+  return [new Timestamp(seconds, nanoseconds), id];
+}
+
+async function pageOf(query: FirebaseFirestore.Query, limit: number, cursor?: string): Promise<HelpRequestPage> {
+  let pageQuery = query.limit(limit + 1);
+  if (cursor) {
+    pageQuery = pageQuery.startAfter(...decodeCursor(cursor));
+  }
+
+  const snapshot = await pageQuery.get();
+  const docs = snapshot.docs.slice(0, limit);
+  return {
+    requests: docs.map((doc) => ({ id: doc.id, ...doc.data() })) as HelpRequest[],
+    nextCursor: snapshot.docs.length > limit ? encodeCursor(docs[docs.length - 1]) : null,
+  };
+}
+
+// Newest first, one page at a time
+export async function getAllHelpRequests(
+  options: { limit?: number; cursor?: string } = {}
+): Promise<HelpRequestPage> {
+  const query = adminDb
     .collection(COLLECTION_NAME)
     .orderBy('createdAt', 'desc')
-    .get();
+    .orderBy(FieldPath.documentId(), 'desc');
 
-  return snapshot.docs.map((doc) => ({
-    id: doc.id,
-    ...doc.data(),
-  })) as HelpRequest[];
+  return pageOf(query, clampPageSize(options.limit), options.cursor);
 }
 
-export async function getPendingHelpRequests(): Promise<HelpRequest[]> {
-  const snapshot = await adminDb
+// Oldest first (the supervisor queue order), one page at a time
+export async function getPendingHelpRequests(
+  options: { limit?: number; cursor?: string } = {}
+): Promise<HelpRequestPage> {
+  const query = adminDb
     .collection(COLLECTION_NAME)
     .where('status', '==', 'pending')
     .orderBy('createdAt', 'asc')
+    .orderBy(FieldPath.documentId(), 'asc');
+
+  return pageOf(query, clampPageSize(options.limit), options.cursor);
+}
+
+type StreamPosition = [number, number, string]; // seconds, nanoseconds, document id
+
+// Change cursor: last position read from the updates and deletions streams
+function encodeChangesCursor(changed: StreamPosition, removed: StreamPosition): string {
+  return Buffer.from(JSON.stringify({ c: changed, d: removed })).toString('base64url');
+}
+
+// Accepts a cursor from a previous response, or an ISO timestamp to start from
+function decodeChangesCursor(since: string): { changed: StreamPosition; removed: StreamPosition } {
+  const time = new Date(since);
+  if (!Number.isNaN(time.getTime()) && /^\d{4}-/.test(since)) {
+    const start = Timestamp.fromDate(time);
+    return { changed: [start.seconds, start.nanoseconds, ''], removed: [start.seconds, start.nanoseconds, ''] };
+  }
+  try {
+    const { c, d } = JSON.parse(Buffer.from(since, 'base64url').toString('utf8'));
+    return { changed: c, removed: d };
+  } catch {
+    throw new Error('Invalid since cursor');
+  }
+}
+
+async function readStream(
+  collection: string,
+  field: string,
+  from: StreamPosition,
+  limit: number
+): Promise<{ docs: FirebaseFirestore.QueryDocumentSnapshot[]; position: StreamPosition }> {
+  const [seconds, nanoseconds, id] = from;
+  // (timestamp, id) ordering, so a page boundary inside a batch of writes
+  // sharing one server timestamp neither skips nor repeats documents
+  const snapshot = await adminDb
+    .collection(collection)
+    .orderBy(field, 'asc')
+    .orderBy(FieldPath.documentId(), 'asc')
+    .startAfter(new Timestamp(seconds, nanoseconds), id)
+    .limit(limit)
     .get();
 
-  return snapshot.docs.map((doc) => ({
-    id: doc.id,
-    ...doc.data(),
-  })) as HelpRequest[];
+  const last = snapshot.docs[snapshot.size - 1];
+  const lastTime = last?.get(field) as Timestamp | undefined;
+  return {
+    docs: snapshot.docs,
+    position: last && lastTime ? [lastTime.seconds, lastTime.nanoseconds, last.id] : from,
+  };
+}
+
+/**
+ * Requests created, updated or deleted after `since` (the cursor from a
+ * previous response, or an ISO timestamp). Reads only what changed, so a
+ * dashboard poll costs the same however much history has accumulated.
+ */
+export async function getHelpRequestChangesSince(
+  since: string,
+  limit: number = MAX_PAGE_SIZE
+): Promise<HelpRequestChanges> {
+  const from = decodeChangesCursor(since);
+  const pageSize = clampPageSize(limit);
+
+  const [changed, removed] = await Promise.all([
+    readStream(COLLECTION_NAME, 'updatedAt', from.changed, pageSize),
+    readStream(DELETIONS_COLLECTION, 'deletedAt', from.removed, pageSize),
+  ]);
+
+  return {
+    changed: changed.docs.map((doc) => ({ id: doc.id, ...doc.data() })) as HelpRequest[],
+    removedIds: removed.docs.map((doc) => doc.id),
+    cursor: encodeChangesCursor(changed.position, removed.position),
+    hasMore: changed.docs.length === pageSize || removed.docs.length === pageSize,
+  };
+}
+
+// created: new request; attached: caller added to a pending request for the
+// same question; duplicate: speculative request matching a pending one (no write)
+export type EscalationOutcome = 'created' | 'attached' | 'duplicate';
+
+export interface EscalationResult {
+  helpRequest: HelpRequest;
+  outcome: EscalationOutcome;
+}
+
+// Deterministic lock document ID for a normalized question
+function pendingQuestionId(normalizedQuestion: string): string {
+  return 'q_' + createHash('sha1').update(normalizedQuestion).digest('hex');
+}
+
+/**
+ * Create a help request, or attach the caller to the pending request that
+ * asks the same (normalized) question. The check and the write happen in
+ * one transaction on a per-question lock document, so callers escalating
+ * the same question at the same moment end up on a single request.
+ */
+export async function createOrAttachHelpRequest(
+  input: CreateHelpRequestInput
+): Promise<EscalationResult> {
+  const collection = adminDb.collection(COLLECTION_NAME);
+  const normalizedQuestion = normalizeQuestion(input.question);
+  const lockRef = adminDb.collection(PENDING_QUESTIONS_COLLECTION).doc(pendingQuestionId(normalizedQuestion));
+
+  const { requestId, outcome } = await adminDb.runTransaction(async (transaction) => {
+    const lock = await transaction.get(lockRef);
+    let pendingRef = lock.exists ? collection.doc(lock.data()!.requestId) : null;
+    let pending = pendingRef ? await transaction.get(pendingRef) : null;
+
+    if (!pending?.exists || pending.data()!.status !== 'pending') {
+      // Requests created before the lock documents existed
+      const legacy = await transaction.get(
+        collection
+          .where('status', '==', 'pending')
+          .where('normalizedQuestion', '==', normalizedQuestion)
+          .limit(1)
+      );
+      pending = legacy.empty ? null : legacy.docs[0];
+      pendingRef = pending ? pending.ref : null;
+    }
+
+    if (pending && pendingRef) {
+      if (input.speculative) {
+        return { requestId: pendingRef.id, outcome: 'duplicate' as EscalationOutcome };
+      }
+      const caller: AttachedCaller = {
+        callerPhone: input.callerPhone,
+        callerName: input.callerName || '',
+        sessionId: input.sessionId || '',
+      };
+      transaction.update(pendingRef, {
+        attachedCallers: FieldValue.arrayUnion(caller),
+        updatedAt: FieldValue.serverTimestamp(),
+      });
+      transaction.set(lockRef, { requestId: pendingRef.id, normalizedQuestion });
+      return { requestId: pendingRef.id, outcome: 'attached' as EscalationOutcome };
+    }
+
+    const docRef = collection.doc();
+    const helpRequest: Omit<HelpRequest, 'id'> = {
+      question: input.question,
+      callerPhone: input.callerPhone,
+      callerName: input.callerName,
+      status: 'pending' as HelpRequestStatus,
+      createdAt: FieldValue.serverTimestamp() as any,
+      sessionId: input.sessionId,
+      context: input.context,
+      normalizedQuestion,
+      attachedCallers: [],
+      speculative: input.speculative || false,
+      updatedAt: FieldValue.serverTimestamp() as any,
+    };
+    transaction.set(docRef, helpRequest);
+    transaction.set(lockRef, { requestId: docRef.id, normalizedQuestion });
+    return { requestId: docRef.id, outcome: 'created' as EscalationOutcome };
+  });
+
+  const doc = await collection.doc(requestId).get();
+  return {
+    helpRequest: { id: doc.id, ...doc.data() } as HelpRequest,
+    outcome,
+  };
+}
+
+export interface SpeculativeConfirmResult {
+  helpRequest: HelpRequest;
+  confirmed: boolean; // this call turned it into a real escalation
+}
+
+// The agent escalated for real: keep the speculative request
+export async function confirmSpeculativeHelpRequest(requestId: string): Promise<SpeculativeConfirmResult | null> {
+  const docRef = adminDb.collection(COLLECTION_NAME).doc(requestId);
+
+  const confirmed = await adminDb.runTransaction(async (transaction) => {
+    const doc = await transaction.get(docRef);
+    if (!doc.exists) {
+      return null;
+    }
+    if (!doc.data()!.speculative) {
+      return false;
+    }
+    transaction.update(docRef, { speculative: false, updatedAt: FieldValue.serverTimestamp() });
+    return true;
+  });
+  if (confirmed === null) {
+    return null;
+  }
+
+  const doc = await docRef.get();
+  return {
+    helpRequest: { id: doc.id, ...doc.data() } as HelpRequest,
+    confirmed,
+  };
+}
+
+// cancelled: request withdrawn; handed_over: other callers escalated the same
+// question, so the first of them now owns it; kept: answered or already real
+export type SpeculativeCancelOutcome = 'cancelled' | 'handed_over' | 'kept';
+
+// The agent answered without escalating: withdraw this caller from the request.
+// Callers that attached with a real escalation keep it, with the first of them
+// as the owner, so the withdrawing caller never gets their follow-up.
+export async function cancelSpeculativeHelpRequest(requestId: string): Promise<SpeculativeCancelOutcome> {
+  const docRef = adminDb.collection(COLLECTION_NAME).doc(requestId);
+
+  return adminDb.runTransaction(async (transaction) => {
+    const doc = await transaction.get(docRef);
+    const data = doc.data();
+    if (!doc.exists || !data?.speculative || data.status !== 'pending') {
+      return 'kept' as SpeculativeCancelOutcome;
+    }
+
+    const [owner, ...attachedCallers]: AttachedCaller[] = data.attachedCallers || [];
+    if (owner) {
+      transaction.update(docRef, {
+        callerPhone: owner.callerPhone,
+        callerName: owner.callerName || '',
+        sessionId: owner.sessionId || '',
+        attachedCallers,
+        speculative: false,
+        updatedAt: FieldValue.serverTimestamp(),
+      });
+      return 'handed_over' as SpeculativeCancelOutcome;
+    }
+
+    const lockRef = adminDb
+      .collection(PENDING_QUESTIONS_COLLECTION)
+      .doc(pendingQuestionId(data.normalizedQuestion || normalizeQuestion(data.question)));
+    const lock = await transaction.get(lockRef);
+    if (lock.data()?.requestId === requestId) {
+      transaction.delete(lockRef);
+    }
+    transaction.delete(docRef);
+    transaction.set(adminDb.collection(DELETIONS_COLLECTION).doc(requestId), {
+      deletedAt: FieldValue.serverTimestamp(),
+    });
+    return 'cancelled' as SpeculativeCancelOutcome;
+  });
 }
 
 export async function resolveHelpRequest(
@@ -80,6 +407,7 @@ export async function resolveHelpRequest(
     status: 'resolved',
     supervisorResponse,
     resolvedAt: FieldValue.serverTimestamp(),
+    updatedAt: FieldValue.serverTimestamp(),
   });
 
   const doc = await docRef.get();
@@ -93,27 +421,52 @@ export async function markAsUnresolved(requestId: string): Promise<void> {
   await adminDb.collection(COLLECTION_NAME).doc(requestId).update({
     status: 'unresolved',
     timeout: true,
+    updatedAt: FieldValue.serverTimestamp(),
   });
 }
 
-export async function markTimedOutRequests(timeoutHours: number = 24): Promise<number> {
+/**
+ * Mark pending requests older than `timeoutHours` as unresolved, in batches
+ * of at most BATCH_LIMIT writes. Each batch drops its documents out of the
+ * pending query, so the sweep resumes where it stopped on the next call;
+ * `maxBatches` bounds the work done per call (e.g. per cron invocation).
+ */
+export async function markTimedOutRequests(
+  timeoutHours: number = 24,
+  maxBatches: number = 25
+): Promise<TimeoutSweepResult> {
   const cutoffTime = new Date();
   cutoffTime.setHours(cutoffTime.getHours() - timeoutHours);
 
-  const snapshot = await adminDb
-    .collection(COLLECTION_NAME)
-    .where('status', '==', 'pending')
-    .where('createdAt', '<', cutoffTime)
-    .get();
+  let updated = 0;
+  for (let i = 0; i < maxBatches; i++) {
+    const snapshot = await adminDb
+      .collection(COLLECTION_NAME)
+      .where('status', '==', 'pending')
+      .where('createdAt', '<', cutoffTime)
+      .orderBy('createdAt', 'asc')
+      .limit(BATCH_LIMIT)
+      .get();
+
+    if (snapshot.empty) {
+      return { updated, done: true };
+    }
 
-  const batch = adminDb.batch();
-  snapshot.docs.forEach((doc) => {
-    batch.update(doc.ref, {
-      status: 'unresolved',
-      timeout: true,
+    const batch = adminDb.batch();
+    snapshot.docs.forEach((doc) => {
+      batch.update(doc.ref, {
+        status: 'unresolved',
+        timeout: true,
+        updatedAt: FieldValue.serverTimestamp(),
+      });
     });
-  });
+    await batch.commit();
+    updated += snapshot.size;
+
+    if (snapshot.size < BATCH_LIMIT) {
+      return { updated, done: true };
+    }
+  }
 
-  await batch.commit();
-  return snapshot.size;
+  return { updated, done: false };
 }
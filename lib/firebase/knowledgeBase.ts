@@ -2,8 +2,14 @@ import { adminDb } from './admin';
 import {
   KnowledgeBaseEntry,
   CreateKnowledgeBaseEntryInput,
+  PineconeSyncState,
 } from '../types';
 import { FieldValue } from 'firebase-admin/firestore';
+import {
+  findIndexedMatch,
+  indexKnowledgeBaseEntry,
+  removeFromKnowledgeBaseIndex,
+} from './knowledgeBaseIndex';
 
 const COLLECTION_NAME = 'knowledgeBase';
 
@@ -26,6 +32,7 @@ export async function createKnowledgeBaseEntry(
   };
 
   await docRef.set(entry);
+  await indexKnowledgeBaseEntry({ id: docRef.id, ...entry });
 
   const doc = await docRef.get();
   return {
@@ -61,60 +68,20 @@ export async function getAllKnowledgeBaseEntries(): Promise<KnowledgeBaseEntry[]
   })) as KnowledgeBaseEntry[];
 }
 
+// Exact question/variation hash lookup, then token overlap via the inverted
+// index in knowledgeBaseIndex.ts (a few reads, independent of collection size)
 export async function searchKnowledgeBase(query: string): Promise<KnowledgeBaseEntry | null> {
-  const normalizedQuery = query.toLowerCase().trim();
-
-  // Get all entries (for MVP, we'll do client-side filtering)
-  // In production, use vector embeddings or Algolia for better search
-  const snapshot = await adminDb.collection(COLLECTION_NAME).get();
-
-  const entries = snapshot.docs.map((doc) => ({
-    id: doc.id,
-    ...doc.data(),
-  })) as KnowledgeBaseEntry[];
-
-  // Simple fuzzy matching
-  for (const entry of entries) {
-    const normalizedQuestion = entry.question.toLowerCase().trim();
-
-    // Exact match
-    if (normalizedQuestion === normalizedQuery) {
-      return entry;
-    }
-
-    // Check variations
-    if (entry.variations) {
-      for (const variation of entry.variations) {
-        if (variation.toLowerCase().trim() === normalizedQuery) {
-          return entry;
-        }
-      }
-    }
-
-    // Partial match (contains)
-    if (
-      normalizedQuestion.includes(normalizedQuery) ||
-      normalizedQuery.includes(normalizedQuestion)
-    ) {
-      return entry;
-    }
+  const match = await findIndexedMatch(query);
+  if (!match) {
+    return null;
   }
 
-  // Check for keyword matches
-  const queryWords = normalizedQuery.split(' ');
-  for (const entry of entries) {
-    const entryWords = entry.question.toLowerCase().split(' ');
-    const matchCount = queryWords.filter((word) =>
-      entryWords.some((entryWord) => entryWord.includes(word) || word.includes(entryWord))
-    ).length;
-
-    // If more than 50% of words match, consider it a match
-    if (matchCount / queryWords.length > 0.5) {
-      return entry;
-    }
+  const entry = await getKnowledgeBaseEntry(match.entryId);
+  if (!entry) {
+    // Stale posting for a deleted entry; clean it up
+    await removeFromKnowledgeBaseIndex(match.entryId);
   }
-
-  return null;
+  return entry;
 }
 
 export async function updateKnowledgeBaseEntry(
@@ -131,10 +98,40 @@ export async function updateKnowledgeBaseEntry(
   await docRef.update(updateData);
 
   const doc = await docRef.get();
-  return {
+  const updated = {
+    id: doc.id,
+    ...doc.data(),
+  } as KnowledgeBaseEntry;
+
+  if (updates.question !== undefined || updates.variations !== undefined) {
+    await indexKnowledgeBaseEntry(updated);
+  }
+  return updated;
+}
+
+// Fold a paraphrased question into an existing entry instead of creating a new one.
+// The latest supervisor answer replaces the stored answer.
+export async function mergeIntoKnowledgeBaseEntry(
+  id: string,
+  question: string,
+  answer: string
+): Promise<KnowledgeBaseEntry> {
+  const docRef = adminDb.collection(COLLECTION_NAME).doc(id);
+
+  await docRef.update({
+    answer,
+    variations: FieldValue.arrayUnion(question),
+    updatedAt: FieldValue.serverTimestamp(),
+  });
+
+  const doc = await docRef.get();
+  const merged = {
     id: doc.id,
     ...doc.data(),
   } as KnowledgeBaseEntry;
+
+  await indexKnowledgeBaseEntry(merged);
+  return merged;
 }
 
 export async function incrementUsageCount(id: string): Promise<void> {
@@ -146,6 +143,52 @@ export async function incrementUsageCount(id: string): Promise<void> {
   });
 }
 
+// Apply aggregated hit counts ({ entryId: delta }) reported by the voice agent.
+// Unknown ids (entries deleted since the hit) are skipped.
+export async function incrementUsageCounts(counts: Record<string, number>): Promise<number> {
+  const ids = Object.keys(counts).filter((id) => Number.isInteger(counts[id]) && counts[id] > 0);
+  const collection = adminDb.collection(COLLECTION_NAME);
+  let applied = 0;
+
+  // Firestore batches are limited to 500 writes
+  for (let i = 0; i < ids.length; i += 400) {
+    const refs = ids.slice(i, i + 400).map((id) => collection.doc(id));
+    const docs = await adminDb.getAll(...refs);
+    const batch = adminDb.batch();
+    docs.forEach((doc) => {
+      if (doc.exists) {
+        batch.update(doc.ref, {
+          usageCount: FieldValue.increment(counts[doc.id]),
+          lastUsedAt: FieldValue.serverTimestamp(),
+        });
+        applied += 1;
+      }
+    });
+    await batch.commit();
+  }
+
+  return applied;
+}
+
+// Record what the Pinecone reconciler wrote for each entry
+export async function markKnowledgeBaseEntriesSynced(
+  states: Array<{ id: string; sync: Omit<PineconeSyncState, 'syncedAt'> }>
+): Promise<void> {
+  const collection = adminDb.collection(COLLECTION_NAME);
+
+  // Firestore batches are limited to 500 writes
+  for (let i = 0; i < states.length; i += 400) {
+    const batch = adminDb.batch();
+    states.slice(i, i + 400).forEach(({ id, sync }) => {
+      batch.update(collection.doc(id), {
+        pineconeSync: { ...sync, syncedAt: FieldValue.serverTimestamp() },
+      });
+    });
+    await batch.commit();
+  }
+}
+
 export async function deleteKnowledgeBaseEntry(id: string): Promise<void> {
   await adminDb.collection(COLLECTION_NAME).doc(id).delete();
+  await removeFromKnowledgeBaseIndex(id);
 }
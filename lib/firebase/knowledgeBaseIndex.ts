@@ -0,0 +1,213 @@
+import { createHash } from 'crypto';
+import { adminDb } from './admin';
+import { normalizeQuestion } from './helpRequests';
+import { KnowledgeBaseEntry } from '../types';
+import { FieldValue } from 'firebase-admin/firestore';
+
+// Search index for the knowledgeBase collection, kept up to date on every
+// create/update/delete so a lookup reads a handful of documents instead of
+// the whole collection:
+//   q_<sha1(normalized question)>  -> { entryId }                  exact question/variation hash
+//   t_<token>                      -> { entries: { [id]: tokens } } inverted token index
+//   e_<entryId>                    -> { phrases, tokens }            what is indexed for an entry
+const INDEX_COLLECTION = 'knowledgeBaseIndex';
+
+// Keeps postings for very common words from growing without bound
+const STOPWORDS = new Set([
+  'a', 'an', 'the', 'is', 'are', 'do', 'does', 'you', 'your', 'i', 'we', 'me', 'my',
+  'can', 'to', 'of', 'for', 'in', 'on', 'at', 'and', 'or', 'it', 'what', 'how', 'there', 'any',
+]);
+
+// Bounds the reads per search regardless of query length
+const MAX_QUERY_TOKENS = 12;
+
+// Firestore batches are limited to 500 writes
+const BATCH_LIMIT = 400;
+
+export interface IndexedMatch {
+  entryId: string;
+  exact: boolean;
+  matchRatio: number; // fraction of query tokens found in the entry's question
+}
+
+function phraseKey(phrase: string): string {
+  return 'q_' + createHash('sha1').update(normalizeQuestion(phrase)).digest('hex');
+}
+
+export function tokenize(text: string): string[] {
+  const tokens = normalizeQuestion(text)
+    .split(' ')
+    .filter((token) => token.length > 1 && !STOPWORDS.has(token));
+  return Array.from(new Set(tokens));
+}
+
+function phrasesFor(entry: Pick<KnowledgeBaseEntry, 'question' | 'variations'>): string[] {
+  const phrases = [entry.question, ...(entry.variations || [])]
+    .map(normalizeQuestion)
+    .filter((phrase) => phrase.length > 0);
+  return Array.from(new Set(phrases));
+}
+
+type IndexState = { phrases: string[]; tokens: string[] };
+
+/**
+ * Phrase documents that still point at `entryId`. A phrase can move to another
+ * entry (e.g. consolidation adds a duplicate's question as a variation of the
+ * survivor), and that entry's mapping must survive the old owner's cleanup.
+ */
+async function ownedPhraseRefs(
+  transaction: FirebaseFirestore.Transaction,
+  entryId: string,
+  phrases: string[]
+): Promise<FirebaseFirestore.DocumentReference[]> {
+  if (phrases.length === 0) {
+    return [];
+  }
+  const indexRef = adminDb.collection(INDEX_COLLECTION);
+  const docs = await transaction.getAll(...phrases.map((phrase) => indexRef.doc(phraseKey(phrase))));
+  return docs.filter((doc) => doc.data()?.entryId === entryId).map((doc) => doc.ref);
+}
+
+/**
+ * Add or refresh an entry in the index. Reads the entry's previous index
+ * state (plus the phrases it drops) and writes only what changed.
+ */
+export async function indexKnowledgeBaseEntry(
+  entry: Pick<KnowledgeBaseEntry, 'id' | 'question' | 'variations'>
+): Promise<void> {
+  const indexRef = adminDb.collection(INDEX_COLLECTION);
+  const stateRef = indexRef.doc(`e_${entry.id}`);
+  const phrases = phrasesFor(entry);
+  const tokens = tokenize(entry.question);
+
+  await adminDb.runTransaction(async (transaction) => {
+    const previous = (await transaction.get(stateRef)).data() as IndexState | undefined;
+    const dropped = (previous?.phrases || []).filter((phrase) => !phrases.includes(phrase));
+    for (const ref of await ownedPhraseRefs(transaction, entry.id, dropped)) {
+      transaction.delete(ref);
+    }
+    for (const token of previous?.tokens || []) {
+      if (!tokens.includes(token)) {
+        transaction.set(indexRef.doc(`t_${token}`), { entries: { [entry.id]: FieldValue.delete() } }, { merge: true });
+      }
+    }
+
+    for (const phrase of phrases) {
+      transaction.set(indexRef.doc(phraseKey(phrase)), { entryId: entry.id, phrase });
+    }
+    for (const token of tokens) {
+      transaction.set(indexRef.doc(`t_${token}`), { entries: { [entry.id]: tokens.length } }, { merge: true });
+    }
+
+    transaction.set(stateRef, { phrases, tokens });
+  });
+}
+
+export async function removeFromKnowledgeBaseIndex(id: string): Promise<void> {
+  const indexRef = adminDb.collection(INDEX_COLLECTION);
+  const stateRef = indexRef.doc(`e_${id}`);
+
+  await adminDb.runTransaction(async (transaction) => {
+    const previous = (await transaction.get(stateRef)).data() as IndexState | undefined;
+    if (!previous) {
+      return;
+    }
+    for (const ref of await ownedPhraseRefs(transaction, id, previous.phrases)) {
+      transaction.delete(ref);
+    }
+    for (const token of previous.tokens) {
+      transaction.set(indexRef.doc(`t_${token}`), { entries: { [id]: FieldValue.delete() } }, { merge: true });
+    }
+    transaction.delete(stateRef);
+  });
+}
+
+/**
+ * Exact lookup of a question or one of its variations (one read).
+ */
+export async function findExactIndexedEntry(query: string): Promise<string | null> {
+  if (!normalizeQuestion(query)) {
+    return null;
+  }
+  const doc = await adminDb.collection(INDEX_COLLECTION).doc(phraseKey(query)).get();
+  return doc.exists ? (doc.data()!.entryId as string) : null;
+}
+
+/**
+ * Best indexed entry for a query: an exact question/variation hit, otherwise
+ * the entry sharing the most tokens, when more than half of the query's tokens
+ * match or the query contains all of the entry's tokens.
+ * Reads at most 1 + MAX_QUERY_TOKENS documents, independent of collection size.
+ */
+export async function findIndexedMatch(query: string): Promise<IndexedMatch | null> {
+  const exactId = await findExactIndexedEntry(query);
+  if (exactId) {
+    return { entryId: exactId, exact: true, matchRatio: 1 };
+  }
+
+  const tokens = tokenize(query).slice(0, MAX_QUERY_TOKENS);
+  if (tokens.length === 0) {
+    return null;
+  }
+
+  const indexRef = adminDb.collection(INDEX_COLLECTION);
+  const postings = await adminDb.getAll(...tokens.map((token) => indexRef.doc(`t_${token}`)));
+
+  const matched = new Map<string, { count: number; entryTokens: number }>();
+  for (const posting of postings) {
+    const entries = (posting.data()?.entries || {}) as Record<string, number>;
+    for (const [entryId, entryTokens] of Object.entries(entries)) {
+      const current = matched.get(entryId) || { count: 0, entryTokens };
+      current.count += 1;
+      matched.set(entryId, current);
+    }
+  }
+
+  let best: IndexedMatch | null = null;
+  for (const [entryId, { count, entryTokens }] of matched) {
+    const matchRatio = count / tokens.length;
+    const coversEntry = count >= entryTokens;
+    if ((matchRatio > 0.5 || coversEntry) && (!best || matchRatio > best.matchRatio)) {
+      best = { entryId, exact: false, matchRatio };
+    }
+  }
+  return best;
+}
+
+/**
+ * Rebuild the whole index from the knowledgeBase collection. Only needed for
+ * migration or repair; normal writes keep the index current.
+ */
+export async function rebuildKnowledgeBaseIndex(entries: KnowledgeBaseEntry[]): Promise<number> {
+  const indexRef = adminDb.collection(INDEX_COLLECTION);
+
+  const existing = await indexRef.listDocuments();
+  for (let i = 0; i < existing.length; i += BATCH_LIMIT) {
+    const batch = adminDb.batch();
+    existing.slice(i, i + BATCH_LIMIT).forEach((ref) => batch.delete(ref));
+    await batch.commit();
+  }
+
+  const postings = new Map<string, Record<string, number>>();
+  const writes: Array<[string, Record<string, unknown>]> = [];
+  for (const entry of entries) {
+    const phrases = phrasesFor(entry);
+    const tokens = tokenize(entry.question);
+    phrases.forEach((phrase) => writes.push([phraseKey(phrase), { entryId: entry.id, phrase }]));
+    tokens.forEach((token) => {
+      const posting = postings.get(token) || {};
+      posting[entry.id] = tokens.length;
+      postings.set(token, posting);
+    });
+    writes.push([`e_${entry.id}`, { phrases, tokens }]);
+  }
+  postings.forEach((entriesForToken, token) => writes.push([`t_${token}`, { entries: entriesForToken }]));
+
+  for (let i = 0; i < writes.length; i += BATCH_LIMIT) {
+    const batch = adminDb.batch();
+    writes.slice(i, i + BATCH_LIMIT).forEach(([docId, data]) => batch.set(indexRef.doc(docId), data));
+    await batch.commit();
+  }
+
+  return entries.length;
+}
@@ -0,0 +1,166 @@
+import { createHash } from 'crypto';
+import {
+  createKnowledgeBaseEntry,
+  getKnowledgeBaseEntry,
+  mergeIntoKnowledgeBaseEntry,
+} from '../firebase/knowledgeBase';
+import { upsertKnowledgeBase } from '../pinecone/operations';
+import { findNearDuplicateLearnedAnswer } from '../pinecone/consolidation';
+import { recordEntrySynced } from '../pinecone/reconcile';
+import {
+  CallerFollowupPayload,
+  HelpRequest,
+  Job,
+  KnowledgeBaseEntry,
+  SupervisorNotificationPayload,
+} from '../types';
+import { enqueueJobs, EnqueueJobInput, JobContext, JobHandlers } from './queue';
+
+export const LEARN_ANSWER_JOB = 'help-request.learn';
+export const CALLER_FOLLOWUP_JOB = 'help-request.followup';
+
+interface LearnAnswerPayload {
+  requestId: string;
+  question: string;
+  answer: string;
+  tags: string[];
+}
+
+function answerHash(answer: string): string {
+  return createHash('sha256').update(answer).digest('hex').slice(0, 16);
+}
+
+/**
+ * Merge the supervisor's answer into a near-duplicate learned answer or
+ * create a new entry, then embed it into Pinecone. The entry ID is
+ * checkpointed, so a retry after a Pinecone failure only redoes the upsert.
+ */
+async function learnAnswer(job: Job<LearnAnswerPayload>, context: JobContext): Promise<void> {
+  const { requestId, question, answer, tags } = job.payload;
+
+  let knowledgeEntry: KnowledgeBaseEntry | null = null;
+  const entryId = job.progress?.knowledgeEntryId as string | undefined;
+  if (entryId) {
+    knowledgeEntry = await getKnowledgeBaseEntry(entryId);
+  }
+
+  if (!knowledgeEntry) {
+    const duplicate = await findNearDuplicateLearnedAnswer(question);
+    if (duplicate) {
+      console.log(`[INFO] Merging into existing entry ${duplicate.entry.id} (similarity: ${duplicate.score.toFixed(3)})`);
+      knowledgeEntry = await mergeIntoKnowledgeBaseEntry(duplicate.entry.id, question, answer);
+    } else {
+      knowledgeEntry = await createKnowledgeBaseEntry({
+        question,
+        answer,
+        type: 'learned_answer',
+        learnedFromRequestId: requestId,
+        tags,
+        isActive: true,
+      });
+    }
+    await context.checkpoint({ knowledgeEntryId: knowledgeEntry.id });
+  }
+
+  await upsertKnowledgeBase({
+    id: knowledgeEntry.id,
+    question: knowledgeEntry.question,
+    answer: knowledgeEntry.answer,
+    type: 'learned_answer',
+    tags: knowledgeEntry.tags,
+    isActive: true,
+  });
+  await recordEntrySynced(knowledgeEntry);
+  console.log(`[SUCCESS] Knowledge entry ${knowledgeEntry.id} synced to Pinecone`);
+}
+
+async function sendCallerFollowup(job: Job<CallerFollowupPayload>): Promise<void> {
+  const followupUrl = `${process.env.NEXT_PUBLIC_APP_URL}/api/webhooks/caller-followup`;
+  const response = await fetch(followupUrl, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(job.payload),
+  });
+  if (!response.ok) {
+    throw new Error(`Follow-up webhook returned ${response.status}`);
+  }
+}
+
+/**
+ * Tell the supervisor a caller is waiting. Only for real escalations: a
+ * speculative request is announced when it is confirmed or when a caller
+ * who escalated for real attaches to it, never when it is opened.
+ */
+export async function notifySupervisor(helpRequest: HelpRequest): Promise<void> {
+  if (helpRequest.speculative) {
+    return;
+  }
+  const payload: SupervisorNotificationPayload = {
+    requestId: helpRequest.id,
+    question: helpRequest.question,
+    callerPhone: helpRequest.callerPhone,
+    callerName: helpRequest.callerName,
+    context: helpRequest.context,
+    timestamp: new Date().toISOString(),
+  };
+  try {
+    const webhookUrl = process.env.SUPERVISOR_WEBHOOK_URL || '';
+    await fetch(webhookUrl, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(payload),
+    });
+  } catch (webhookError) {
+    console.error('Error calling supervisor webhook:', webhookError);
+    // Continue even if webhook fails
+  }
+}
+
+export const HELP_REQUEST_JOB_HANDLERS: JobHandlers = {
+  [LEARN_ANSWER_JOB]: learnAnswer,
+  [CALLER_FOLLOWUP_JOB]: sendCallerFollowup,
+};
+
+/**
+ * Queue the work that follows a resolve: learning the answer and one
+ * follow-up per caller (the original and every attached caller). Keys
+ * include a hash of the answer, so a retried resolve is deduplicated while
+ * a corrected answer is learned and sent again.
+ */
+export async function enqueueResolvePipeline(
+  helpRequest: HelpRequest,
+  supervisorResponse: string,
+  tags: string[] = []
+): Promise<string[]> {
+  const version = answerHash(supervisorResponse);
+  const timestamp = new Date().toISOString();
+  const callerPhones = [
+    helpRequest.callerPhone,
+    ...(helpRequest.attachedCallers || []).map((caller) => caller.callerPhone),
+  ];
+
+  const jobs: EnqueueJobInput[] = [
+    {
+      key: `learn:${helpRequest.id}:${version}`,
+      type: LEARN_ANSWER_JOB,
+      payload: {
+        requestId: helpRequest.id,
+        question: helpRequest.question,
+        answer: supervisorResponse,
+        tags,
+      },
+    },
+    ...[...new Set(callerPhones)].map((callerPhone) => ({
+      key: `followup:${helpRequest.id}:${callerPhone}:${version}`,
+      type: CALLER_FOLLOWUP_JOB,
+      payload: {
+        requestId: helpRequest.id,
+        callerPhone,
+        supervisorResponse,
+        timestamp,
+      },
+    })),
+  ];
+
+  return enqueueJobs(jobs);
+}
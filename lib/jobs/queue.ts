@@ -0,0 +1,171 @@
+import { adminDb } from '../firebase/admin';
+import { Job, ProcessJobsResult } from '../types';
+import { FieldValue, Timestamp } from 'firebase-admin/firestore';
+
+const COLLECTION_NAME = 'jobs';
+
+export const DEFAULT_MAX_ATTEMPTS = 5;
+// A claimed job is invisible to other workers for this long; if its worker
+// dies, the job becomes due again and is retried
+const LEASE_MS = 2 * 60 * 1000;
+const RETRY_BASE_MS = 30 * 1000;
+const RETRY_MAX_MS = 30 * 60 * 1000;
+const DEFAULT_PROCESS_LIMIT = 20;
+
+// Firestore gRPC status for a create() on an existing document
+const ALREADY_EXISTS = 6;
+
+export interface EnqueueJobInput<P = Record<string, unknown>> {
+  key: string; // idempotency key; enqueueing the same key twice is a no-op
+  type: string;
+  payload: P;
+  maxAttempts?: number;
+}
+
+export interface JobContext {
+  // Persist intermediate results so a retry can skip steps that already ran
+  checkpoint(progress: Record<string, unknown>): Promise<void>;
+}
+
+export type JobHandler = (job: Job<any>, context: JobContext) => Promise<void>;
+export type JobHandlers = Record<string, JobHandler>;
+
+// Document IDs may not contain '/'
+function jobId(key: string): string {
+  return encodeURIComponent(key);
+}
+
+function retryDelayMs(attempts: number): number {
+  return Math.min(RETRY_BASE_MS * 2 ** Math.max(attempts - 1, 0), RETRY_MAX_MS);
+}
+
+/**
+ * Store jobs durably. Each job's ID is its idempotency key, so a retried
+ * request that enqueues the same work again does not duplicate it.
+ * Returns the IDs of all jobs, including ones that already existed.
+ */
+export async function enqueueJobs(inputs: EnqueueJobInput[]): Promise<string[]> {
+  const now = Timestamp.now();
+  return Promise.all(
+    inputs.map(async (input) => {
+      const id = jobId(input.key);
+      try {
+        await adminDb.collection(COLLECTION_NAME).doc(id).create({
+          type: input.type,
+          payload: input.payload,
+          status: 'queued',
+          attempts: 0,
+          maxAttempts: input.maxAttempts || DEFAULT_MAX_ATTEMPTS,
+          runAt: now,
+          createdAt: FieldValue.serverTimestamp(),
+          updatedAt: FieldValue.serverTimestamp(),
+        });
+      } catch (error: any) {
+        if (error?.code !== ALREADY_EXISTS) {
+          throw error;
+        }
+        console.log(`[INFO] Job ${id} already enqueued, skipping`);
+      }
+      return id;
+    })
+  );
+}
+
+/**
+ * Take the lease on a job if it is still queued and due. Runs in a
+ * transaction so two workers never run the same attempt.
+ */
+async function claimJob(id: string): Promise<Job | null> {
+  const docRef = adminDb.collection(COLLECTION_NAME).doc(id);
+  return adminDb.runTransaction(async (transaction) => {
+    const doc = await transaction.get(docRef);
+    const data = doc.data();
+    if (!data || data.status !== 'queued' || data.runAt.toMillis() > Date.now()) {
+      return null;
+    }
+    const attempts = (data.attempts || 0) + 1;
+    transaction.update(docRef, {
+      attempts,
+      runAt: Timestamp.fromMillis(Date.now() + LEASE_MS),
+      updatedAt: FieldValue.serverTimestamp(),
+    });
+    return { id: doc.id, ...data, attempts } as Job;
+  });
+}
+
+async function runJob(job: Job, handlers: JobHandlers, result: ProcessJobsResult): Promise<void> {
+  const docRef = adminDb.collection(COLLECTION_NAME).doc(job.id);
+  const handler = handlers[job.type];
+  const context: JobContext = {
+    async checkpoint(progress) {
+      job.progress = { ...(job.progress || {}), ...progress };
+      await docRef.update({ progress: job.progress, updatedAt: FieldValue.serverTimestamp() });
+    },
+  };
+
+  try {
+    if (!handler) {
+      throw new Error(`No handler for job type ${job.type}`);
+    }
+    await handler(job, context);
+    await docRef.update({
+      status: 'done',
+      lastError: FieldValue.delete(),
+      updatedAt: FieldValue.serverTimestamp(),
+    });
+    result.succeeded += 1;
+  } catch (error: any) {
+    const message = error?.message || String(error);
+    const exhausted = job.attempts >= job.maxAttempts;
+    await docRef.update({
+      status: exhausted ? 'failed' : 'queued',
+      runAt: Timestamp.fromMillis(Date.now() + retryDelayMs(job.attempts)),
+      lastError: message,
+      updatedAt: FieldValue.serverTimestamp(),
+    });
+    if (exhausted) {
+      result.failed += 1;
+      console.error(`[ERROR] Job ${job.id} (${job.type}) failed after ${job.attempts} attempts: ${message}`);
+    } else {
+      result.retried += 1;
+      console.warn(`[WARN] Job ${job.id} (${job.type}) attempt ${job.attempts} failed, will retry: ${message}`);
+    }
+  }
+}
+
+/**
+ * Run the given jobs now (e.g. right after enqueueing them). Jobs that are
+ * not due or already claimed elsewhere are skipped.
+ */
+export async function runJobs(ids: string[], handlers: JobHandlers): Promise<ProcessJobsResult> {
+  const result: ProcessJobsResult = { claimed: 0, succeeded: 0, retried: 0, failed: 0 };
+  await Promise.all(
+    ids.map(async (id) => {
+      const job = await claimJob(id);
+      if (job) {
+        result.claimed += 1;
+        await runJob(job, handlers, result);
+      }
+    })
+  );
+  return result;
+}
+
+/**
+ * Run up to `limit` due jobs: retries whose backoff has passed and jobs whose
+ * worker died mid-lease. Call periodically (cron) and after enqueueing.
+ */
+export async function processDueJobs(
+  handlers: JobHandlers,
+  limit: number = DEFAULT_PROCESS_LIMIT
+): Promise<ProcessJobsResult> {
+  const snapshot = await adminDb
+    .collection(COLLECTION_NAME)
+    .where('status', '==', 'queued')
+    .where('runAt', '<=', Timestamp.now())
+    .orderBy('runAt', 'asc')
+    .limit(limit)
+    .get();
+
+  return runJobs(snapshot.docs.map((doc) => doc.id), handlers);
+}
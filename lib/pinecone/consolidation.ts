@@ -0,0 +1,36 @@
+import { searchKnowledgeBase } from './operations';
+import { KnowledgeBaseEntry } from '../types';
+
+// Cosine similarity above which a newly learned question is treated as a
+// paraphrase of an existing learned answer instead of a new entry.
+// Keep in sync with DUPLICATE_SIMILARITY in agent-service/consolidate_kb.py
+export const DUPLICATE_SIMILARITY_THRESHOLD = 0.92;
+
+export interface NearDuplicateMatch {
+  entry: KnowledgeBaseEntry;
+  score: number;
+}
+
+/**
+ * Find an existing learned answer whose question is a near-duplicate of `question`.
+ * Returns null when nothing is similar enough (or Pinecone is unavailable).
+ */
+export async function findNearDuplicateLearnedAnswer(
+  question: string
+): Promise<NearDuplicateMatch | null> {
+  try {
+    const results = await searchKnowledgeBase(question, {
+      topK: 1,
+      filter: { type: 'learned_answer', isActive: true },
+      includeMetadata: true,
+    });
+
+    if (results.length > 0 && results[0].score >= DUPLICATE_SIMILARITY_THRESHOLD) {
+      return { entry: results[0].entry, score: results[0].score };
+    }
+  } catch (error) {
+    console.error('Error checking for near-duplicate learned answers:', error);
+  }
+
+  return null;
+}
@@ -0,0 +1,178 @@
+import { createHash } from 'crypto';
+import { Pinecone } from '@pinecone-database/pinecone';
+import { batchUpsertKnowledgeBase } from './operations';
+import { markKnowledgeBaseEntriesSynced } from '../firebase/knowledgeBase';
+import { KnowledgeBaseEntry } from '../types';
+
+// Bump when the embedding model changes so every entry is re-embedded once
+export const EMBEDDING_MODEL_VERSION = 'text-embedding-004';
+
+// Entries per upsert call, and how many of those run at once
+const UPSERT_BATCH_SIZE = 20;
+const UPSERT_CONCURRENCY = 3;
+const METADATA_CONCURRENCY = 10;
+const DELETE_BATCH_SIZE = 1000;
+
+export interface ReconcileOptions {
+  full?: boolean; // re-embed everything (e.g. after an index rebuild)
+  deleteOrphans?: boolean; // remove vectors whose entry no longer exists
+}
+
+export interface ReconcileResult {
+  total: number;
+  created: string[];
+  changed: string[];
+  metadataOnly: string[];
+  deleted: string[];
+  unchanged: number;
+  embedded: number;
+}
+
+function getIndex() {
+  const pinecone = new Pinecone({ apiKey: process.env.PINECONE_API_KEY! });
+  return pinecone.index(process.env.PINECONE_INDEX_NAME || 'luxe-salon-knowledge');
+}
+
+function hash(value: unknown): string {
+  return createHash('sha256').update(JSON.stringify(value)).digest('hex').slice(0, 32);
+}
+
+export function contentHash(entry: KnowledgeBaseEntry): string {
+  return hash([entry.question, entry.answer]);
+}
+
+export function metadataHash(entry: KnowledgeBaseEntry): string {
+  return hash([entry.type, [...(entry.tags || [])].sort(), entry.isActive]);
+}
+
+export function syncStateFor(entry: KnowledgeBaseEntry) {
+  return {
+    contentHash: contentHash(entry),
+    metadataHash: metadataHash(entry),
+    embeddingModel: EMBEDDING_MODEL_VERSION,
+  };
+}
+
+// Call after a single-entry upsert so the next sync does not re-embed it
+export async function recordEntrySynced(entry: KnowledgeBaseEntry): Promise<void> {
+  await markKnowledgeBaseEntriesSynced([{ id: entry.id, sync: syncStateFor(entry) }]);
+}
+
+async function listIndexedIds(index: ReturnType<typeof getIndex>): Promise<Set<string>> {
+  const ids = new Set<string>();
+  let paginationToken: string | undefined;
+  do {
+    const page = await index.listPaginated({ paginationToken });
+    page.vectors?.forEach((vector) => vector.id && ids.add(vector.id));
+    paginationToken = page.pagination?.next;
+  } while (paginationToken);
+  return ids;
+}
+
+// Run fn over items with at most `limit` in flight
+async function mapWithConcurrency<T>(items: T[], limit: number, fn: (item: T) => Promise<void>) {
+  let next = 0;
+  const workers = Array.from({ length: Math.min(limit, items.length) }, async () => {
+    while (next < items.length) {
+      await fn(items[next++]);
+    }
+  });
+  await Promise.all(workers);
+}
+
+/**
+ * Bring Pinecone in line with Firestore, touching only what differs:
+ * - new or changed question/answer (or a new embedding model) -> embed + upsert
+ * - changed type/tags/isActive only -> metadata update, no embedding
+ * - vector without a Firestore entry -> delete
+ */
+export async function reconcileKnowledgeBase(
+  entries: KnowledgeBaseEntry[],
+  options: ReconcileOptions = {}
+): Promise<ReconcileResult> {
+  const { full = false, deleteOrphans = true } = options;
+  const index = getIndex();
+  const indexedIds = await listIndexedIds(index);
+
+  const toEmbed: KnowledgeBaseEntry[] = [];
+  const toUpdateMetadata: KnowledgeBaseEntry[] = [];
+  const result: ReconcileResult = {
+    total: entries.length,
+    created: [],
+    changed: [],
+    metadataOnly: [],
+    deleted: [],
+    unchanged: 0,
+    embedded: 0,
+  };
+
+  for (const entry of entries) {
+    const sync = entry.pineconeSync;
+    if (!indexedIds.has(entry.id)) {
+      result.created.push(entry.id);
+      toEmbed.push(entry);
+    } else if (
+      full ||
+      !sync ||
+      sync.embeddingModel !== EMBEDDING_MODEL_VERSION ||
+      sync.contentHash !== contentHash(entry)
+    ) {
+      result.changed.push(entry.id);
+      toEmbed.push(entry);
+    } else if (sync.metadataHash !== metadataHash(entry)) {
+      result.metadataOnly.push(entry.id);
+      toUpdateMetadata.push(entry);
+    } else {
+      result.unchanged += 1;
+    }
+  }
+
+  const batches: KnowledgeBaseEntry[][] = [];
+  for (let i = 0; i < toEmbed.length; i += UPSERT_BATCH_SIZE) {
+    batches.push(toEmbed.slice(i, i + UPSERT_BATCH_SIZE));
+  }
+
+  await mapWithConcurrency(batches, UPSERT_CONCURRENCY, async (batch) => {
+    await batchUpsertKnowledgeBase(
+      batch.map((entry) => ({
+        id: entry.id,
+        question: entry.question,
+        answer: entry.answer,
+        type: entry.type,
+        tags: entry.tags,
+        isActive: entry.isActive,
+      }))
+    );
+    result.embedded += batch.length;
+    await markKnowledgeBaseEntriesSynced(
+      batch.map((entry) => ({ id: entry.id, sync: syncStateFor(entry) }))
+    );
+  });
+
+  await mapWithConcurrency(toUpdateMetadata, METADATA_CONCURRENCY, async (entry) => {
+    await index.update({
+      id: entry.id,
+      metadata: { type: entry.type, tags: entry.tags || [], isActive: entry.isActive },
+    });
+  });
+  await markKnowledgeBaseEntriesSynced(
+    toUpdateMetadata.map((entry) => ({
+      id: entry.id,
+      sync: {
+        contentHash: entry.pineconeSync!.contentHash,
+        metadataHash: metadataHash(entry),
+        embeddingModel: entry.pineconeSync!.embeddingModel,
+      },
+    }))
+  );
+
+  if (deleteOrphans) {
+    const entryIds = new Set(entries.map((entry) => entry.id));
+    result.deleted = Array.from(indexedIds).filter((id) => !entryIds.has(id));
+    for (let i = 0; i < result.deleted.length; i += DELETE_BATCH_SIZE) {
+      await index.deleteMany(result.deleted.slice(i, i + DELETE_BATCH_SIZE));
+    }
+  }
+
+  return result;
+}
@@ -10,11 +10,21 @@ export interface HelpRequest {
   callerName?: string;
   status: HelpRequestStatus;
   createdAt: Timestamp | string; // Timestamp in DB, string when serialized for API
+  updatedAt?: Timestamp | string; // Set on every write; drives incremental dashboard fetches
   resolvedAt?: Timestamp | string;
   supervisorResponse?: string;
   timeout?: boolean;
   sessionId?: string;
   context?: string; // Additional context from the conversation
+  normalizedQuestion?: string; // Used to coalesce concurrent near-identical escalations
+  attachedCallers?: AttachedCaller[]; // Other callers waiting on the same answer
+  speculative?: boolean; // Opened early on low KB confidence; the agent may still cancel it
+}
+
+export interface AttachedCaller {
+  callerPhone: string;
+  callerName?: string;
+  sessionId?: string;
 }
 
 export interface CreateHelpRequestInput {
@@ -23,6 +33,7 @@ export interface CreateHelpRequestInput {
   callerName?: string;
   sessionId?: string;
   context?: string;
+  speculative?: boolean;
 }
 
 export interface ResolveHelpRequestInput {
@@ -47,6 +58,14 @@ export interface KnowledgeBaseEntry {
   isActive: boolean; // Enable/disable entry
   usageCount?: number; // Track how often this is used
   lastUsedAt?: Timestamp | string;
+  pineconeSync?: PineconeSyncState; // What was last written to Pinecone, for incremental sync
+}
+
+export interface PineconeSyncState {
+  contentHash: string; // Hash of the embedded text (question + answer)
+  metadataHash: string; // Hash of the filterable metadata (type, tags, isActive)
+  embeddingModel: string;
+  syncedAt: Timestamp | string;
 }
 
 export interface CreateKnowledgeBaseEntryInput {
@@ -86,6 +105,58 @@ export interface CallSession {
   helpRequestIds: string[];
   transcript?: string;
   livekitRoomName?: string;
+  recordBatches?: number; // write-behind batches received from the agent
+  summary?: CallRecordSummary;
+}
+
+// One event recorded by the agent during a call (turn, KB hit, stage timing, ...)
+export interface CallRecordEvent {
+  kind: 'turn' | 'kb' | 'timing' | 'event';
+  t: number; // seconds since call start
+  turn?: number;
+  [key: string]: unknown;
+}
+
+export interface CallRecordSummary {
+  turns: number;
+  kbHits: number;
+  escalations: number;
+  durationSec: number;
+}
+
+// Batch posted by the agent's write-behind recorder
+export interface CallRecordBatch {
+  callId: string; // LiveKit job ID: unique per call, unlike the room name
+  roomName?: string;
+  seq: number;
+  final: boolean;
+  startedAt: number; // unix seconds
+  events: CallRecordEvent[];
+  summary?: CallRecordSummary;
+}
+
+// Background job queue (resolve -> learn -> notify pipeline)
+export type JobStatus = 'queued' | 'done' | 'failed';
+
+export interface Job<P = Record<string, unknown>> {
+  id: string; // idempotency key
+  type: string;
+  payload: P;
+  status: JobStatus;
+  attempts: number;
+  maxAttempts: number;
+  runAt: Timestamp; // next time the job may run; pushed forward while it runs (lease)
+  progress?: Record<string, unknown>; // checkpoints saved by the handler, kept across retries
+  lastError?: string;
+  createdAt: Timestamp;
+  updatedAt: Timestamp;
+}
+
+export interface ProcessJobsResult {
+  claimed: number;
+  succeeded: number;
+  retried: number;
+  failed: number;
 }
 
 // API Response Types